@@ -87,7 +87,11 @@ const context = {
     listSource: null,
 
     // Mapping of characters that can come with an apostrophe to the version with the apostrophe.
-    apostropheMapping: {}
+    apostropheMapping: {},
+
+    // Content hash of each word-list, used to request a specific version of it so that it can be cached.
+    // Structure is: etags["<source>/<category>_e<length>.<DB type>"] = <hash>.
+    etags: {}
 }
 
 /**
@@ -121,11 +125,13 @@ async function initModule() {
         return;
     }
 
-    const response = await fetch(`wordlists/config.json?${Date.now()}`);
+    // Always revalidate the configuration, the server answers with "304 Not Modified" if it didn't change
+    const response = await fetch(`wordlists/config.json`, {cache: "no-cache"});
     const config = await response.json();
     context.translateMapping = config["translate_mapping"];
     context.finalFormMapping = config["final_form_mapping"];
     context.listSource = config["list_source"];
+    context.etags = config["etags"] || {};
 
     context.dictAttributes = {};
 
@@ -231,7 +237,9 @@ async function loadWordlist(source, length, category) {
 
         console.log(`Loading ${dbType} database for word length ${length}`);
 
-        const response = await fetch(`wordlists/${source}/${category}_e${length}.${dbType}`);
+        const path = `${source}/${category}_e${length}.${dbType}`;
+        const version = (path in context.etags) ? `?v=${context.etags[path]}` : "";
+        const response = await fetch(`wordlists/${path}${version}`);
         if (!response.ok) {
             if (response.status == 404) {
                 console.log(`Can't find database for word length ${length}`);
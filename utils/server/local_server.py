@@ -1,11 +1,182 @@
 #!/usr/bin/env python3
 
+import argparse
+import email.utils
+import hashlib
+import json
 import os
-from http.server import HTTPServer, CGIHTTPRequestHandler
+import sys
+import time
+
+from functools import lru_cache
+from http import HTTPStatus
+from http.server import HTTPServer, ThreadingHTTPServer, CGIHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent / ".."))
+
+from solver import BACKENDS, CATEGORIES, IllegalTemplateError, Solver
 
 PORT = 8080
+ROOT_DIR = Path(__file__).parent / ".." / ".."
+API_PREFIX = "/api/"
+CACHE_SIZE = 4096
+
+# Precompressed siblings created by utils/words/word_processor.py, in order of preference
+CONTENT_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+ETAG_LENGTH = 16
+# Requests for a specific version of a file (?v=<etag>, as sent by the application) can be cached forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+solver = None
+etags = {}
+
+def file_etag(path: str) -> str:
+    # Content hash of the (uncompressed) file, matching the etags listed in config.json
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = etags.get(path)
+    if cached is None or cached[0] != key:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        cached = (key, h.hexdigest()[:ETAG_LENGTH])
+        etags[path] = cached
+    return cached[1]
+
+def to_json(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii = False).encode("utf8")
+
+@lru_cache(maxsize = CACHE_SIZE)
+def query(category: str, source: str, template: str) -> tuple:
+    # Returns the status and the JSON body of the response, which mirrors getWords() in CrosswordSolver.js
+    try:
+        return HTTPStatus.OK, to_json({"words": solver.get_words(source, template, category)})
+    except IllegalTemplateError as e:
+        return HTTPStatus.BAD_REQUEST, to_json({"error": str(e),
+                                               "allowSpaces": e.allow_spaces,
+                                               "allowQuestionMarks": e.allow_question_marks})
+    except ValueError as e:
+        return HTTPStatus.BAD_REQUEST, to_json({"error": str(e)})
+
+class RequestHandler(CGIHTTPRequestHandler):
+    # Serves the application's static files, plus a search API:
+    #   /api/dictionary?source=hspell&template=...
+    #   /api/anagram?source=hspell&template=...
+    #   /api/related?source=wikidict&template=...
+    # Static files are served with ETags (answering If-None-Match with 304) and, if the client
+    # accepts it, from their precompressed siblings.
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.startswith(API_PREFIX):
+            self.handle_api(url)
+        else:
+            super().do_GET()
+
+    def send_head(self):
+        if self.is_cgi():
+            return super().send_head()
+
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            # Directories and missing files
+            return super().send_head()
+
+        encoding, served_path = self.negotiate_encoding(path)
+        etag = f'"{file_etag(path)}-{encoding}"' if encoding else f'"{file_etag(path)}"'
+        version = parse_qs(urlsplit(self.path).query).get("v", [None])[0]
+        cache_control = IMMUTABLE_CACHE_CONTROL if version == file_etag(path) else REVALIDATE_CACHE_CONTROL
+
+        requested_etags = self.requested_etags()
+        if etag in requested_etags or "*" in requested_etags:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", cache_control)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return None
+
+        f = open(served_path, "rb")
+        try:
+            stat = os.fstat(f.fileno())
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", self.guess_type(path))
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(stat.st_size))
+            self.send_header("Last-Modified", email.utils.formatdate(stat.st_mtime, usegmt = True))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", cache_control)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return f
+        except:
+            f.close()
+            raise
+
+    def negotiate_encoding(self, path: str) -> tuple:
+        accepted = set()
+        for value in self.headers.get("Accept-Encoding", "").split(","):
+            name, _, params = value.partition(";")
+            if params.replace(" ", "") not in ["q=0", "q=0.0", "q=0.00", "q=0.000"]:
+                accepted.add(name.strip())
+        for encoding, suffix in CONTENT_ENCODINGS:
+            if encoding in accepted and os.path.isfile(path + suffix):
+                return encoding, path + suffix
+        return None, path
+
+    def requested_etags(self) -> set:
+        values = [value.strip() for value in self.headers.get("If-None-Match", "").split(",")]
+        return {value[2:] if value.startswith("W/") else value for value in values}
+
+    def handle_api(self, url):
+        category = url.path[len(API_PREFIX):]
+        if category not in CATEGORIES:
+            self.send_json(HTTPStatus.NOT_FOUND, to_json({"error": f"Unknown category: {category}"}))
+            return
+
+        params = parse_qs(url.query)
+        source = params.get("source", [""])[0]
+        template = params.get("template", [""])[0]
+        status, body = query(category, source, template)
+        self.send_json(status, body)
+
+    def send_json(self, status: HTTPStatus, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def main():
+    global solver
+
+    parser = argparse.ArgumentParser(description = "Serve the application locally")
+    parser.add_argument("-p", "--port", type = int, default = PORT, help = f"Port to listen on (default: {PORT})")
+    parser.add_argument("--single-threaded", action = "store_true", help = "Handle one request at a time")
+    parser.add_argument("--lazy", action = "store_true",
+                        help = "Build the search indexes on first use instead of at startup")
+    parser.add_argument("--backend", choices = BACKENDS, default = "index",
+                        help = "Storage for template search: bitset indexes (default), the memory-mapped fixed-width "
+                               "word-lists, shared between server processes (requires NumPy), or the DAWGs")
+    args = parser.parse_args()
+
+    solver = Solver(backend = args.backend)
+    if not args.lazy:
+        print("Loading search indexes")
+        start = time.perf_counter()
+        solver.preload()
+        print(f"Loaded search indexes in {time.perf_counter() - start:.2f}s")
+
+    os.chdir(ROOT_DIR)
+    print (f"Serving on http://localhost:{args.port}/")
+    server_class = HTTPServer if args.single_threaded else ThreadingHTTPServer
+    server_object = server_class(server_address=('', args.port), RequestHandlerClass=RequestHandler)
+    server_object.serve_forever()
 
-os.chdir('../../')
-print (f"Serving on http://localhost:{PORT}/")
-server_object = HTTPServer(server_address=('', PORT), RequestHandlerClass=CGIHTTPRequestHandler)
-server_object.serve_forever()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+from .anagram_index import AnagramIndex
+from .bloom import BloomFilter
+from .dawg import DawgIndex
+from .engine import BACKENDS, CATEGORIES, Solver
+from .fixed_width import FixedWidthIndex
+from .index import RelatedIndex, TemplateIndex
+from .letter_matrix import LetterMatrix
+from .related_index import PostingsIndex, RelatedLookup
+from .shards import ShardLayout
+from .snapshot import Snapshot
+from .template import IllegalTemplateError, parse_template, tokenize
+from .wordlists import Wordlists
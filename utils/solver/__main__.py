@@ -0,0 +1,38 @@
+import argparse
+import sys
+
+from . import Solver
+
+def main():
+    parser = argparse.ArgumentParser(prog = "python -m solver", description = "Find the words matching a template")
+    parser.add_argument("source", help = "Source name (e.g. hspell)")
+    parser.add_argument("templates", nargs = "+", help = "Templates, with ? as a wildcard (e.g. ש??ו?)")
+    parser.add_argument("-s", "--subanagram", action = "store_true",
+                        help = "Find the words which can be made from some of the template's letters")
+    parser.add_argument("-w", "--words", type = int, default = 0,
+                        help = "Split all the template's letters into up to this many words")
+    parser.add_argument("-l", "--min-length", type = int, default = 2,
+                        help = "Minimal word length for --subanagram and --words (default: 2)")
+    args = parser.parse_args()
+
+    sys.stdout.reconfigure(encoding = "utf8")
+    solver = Solver()
+    for template in args.templates:
+        try:
+            if args.words > 0:
+                words = [" + ".join("/".join(group) for group in partition)
+                         for partition in solver.multi_anagram(args.source, template, args.words, args.min_length)]
+            elif args.subanagram:
+                words = solver.subanagram(args.source, template, args.min_length)
+            else:
+                words = solver.search(args.source, template)
+        except ValueError as e:
+            parser.error(str(e))
+        except RuntimeError as e:
+            parser.error(str(e))
+        if len(args.templates) > 1:
+            print(f"{template}: {len(words)} words")
+        print("\n".join(words))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import array
+import hashlib
+import struct
+import sys
+
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+# Reader for the binary anagram index (anagram_eN.bin), see utils/words/anagram_index.py for the format
+
+MAGIC = b"ANAG"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+
+def signature_hash(signature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(signature.encode("utf8"), digest_size = 4).digest(), "little")
+
+class AnagramIndex:
+    def __init__(self, data: bytes):
+        magic, version, num_buckets, num_words = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not an anagram index, or an unsupported version")
+
+        offset = HEADER.size
+        self.buckets = struct.unpack_from(f"<{num_buckets}H", data, offset)
+        offset += 2 * num_buckets
+
+        self.hashes = array.array("I")
+        self.hashes.frombytes(data[offset:offset + 4 * num_words])
+        offset += 4 * num_words
+
+        self.refs = array.array("I")
+        self.refs.frombytes(data[offset:offset + 4 * num_words])
+
+        if sys.byteorder == "big":
+            self.hashes.byteswap()
+            self.refs.byteswap()
+
+    @classmethod
+    def load(cls, path: Path) -> "AnagramIndex":
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def lookup(self, signature: str) -> list:
+        # Returns (bucket, line number) references into the dictionary_eN.txt files.
+        # Hash collisions are possible, so the caller should verify the signatures of the words.
+        h = signature_hash(signature)
+        start = bisect_left(self.hashes, h)
+        end = bisect_right(self.hashes, h, start)
+        return [(self.buckets[ref >> 24], ref & 0xFFFFFF) for ref in self.refs[start:end]]
@@ -0,0 +1,194 @@
+import argparse
+import json
+import sys
+import time
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from . import fixed_width
+from .engine import BACKENDS, Solver
+from .template import IllegalTemplateError, parse_template, tokenize
+from .wordlists import WORDLISTS_DIR, Wordlists
+
+#
+# Batch queries: reads queries from a JSONL file, one object per line, e.g.
+#   {"id": 17, "category": "dictionary", "source": "hspell", "template": "ש??ו?"}
+# and writes a result per query as JSONL, with the semantics of getWords() (and of the local server's API):
+#   {"id": 17, "words": [...]}  or  {"id": 17, "error": "..."}
+# "category" defaults to dictionary and "id" to the line number of the query.
+#
+# Queries are read in chunks and grouped by the bucket which answers them (source, category and length).
+# Every group is assigned to a single worker process, which keeps its own Solver, so that every bucket is loaded
+# by one worker only, the first time one of its queries comes up. Results are written as soon as the chunks are
+# answered, in the order of the chunks but grouped by bucket within a chunk.
+#
+
+CHUNK_SIZE = 10000
+# Groups being answered at a time, per worker (beyond the groups of the chunk just read)
+MAX_PENDING_PER_WORKER = 4
+
+worker_solver = None
+
+def init_worker(wordlists_path: Path, backend: str):
+    global worker_solver
+    worker_solver = Solver(Wordlists(wordlists_path), backend)
+
+def error_result(query_id, e: Exception) -> dict:
+    if isinstance(e, IllegalTemplateError):
+        return {"id": query_id, "error": str(e), "allowSpaces": e.allow_spaces, "allowQuestionMarks": e.allow_question_marks}
+    if isinstance(e, KeyError):
+        return {"id": query_id, "error": f"Missing field: {e.args[0]}"}
+    return {"id": query_id, "error": str(e) or type(e).__name__}
+
+def answer(solver: Solver, query_id, category: str, source: str, template: str) -> dict:
+    # Any failure only fails its own query, not the group or the rest of the batch
+    try:
+        return {"id": query_id, "words": solver.get_words(source, template, category)}
+    except Exception as e:
+        return error_result(query_id, e)
+
+def run_queries(queries: list) -> str:
+    # queries: (id, category, source, template) of a single group, returns the JSONL of their results
+    return "".join(json.dumps(answer(worker_solver, *query), ensure_ascii = False) + "\n" for query in queries)
+
+def bucket_key(wordlists: Wordlists, category: str, source: str, template: str) -> tuple:
+    # The bucket which answers the query, like Solver.get_words() picks it
+    if category == "dictionary":
+        length = len(parse_template(template, wordlists, wordlists.allow_spaces(source)))
+    elif category == "anagram":
+        length = len(tokenize(template.replace(" ", ""), wordlists, allow_spaces = True, allow_question_marks = False))
+    elif category == "related":
+        length = 0
+    else:
+        raise ValueError(f"Unknown category: {category}")
+    return source, category, length
+
+def read_queries(f, wordlists: Wordlists, chunk_size = CHUNK_SIZE):
+    # Yields the queries of every chunk of the input grouped by bucket, and the results of the queries which
+    # can be answered without one (malformed lines and templates)
+    groups = {}
+    errors = []
+    num_queries = 0
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        num_queries += 1
+        query_id = line_number
+        try:
+            query = json.loads(line)
+            query_id = query.get("id", line_number)
+            category = query.get("category", "dictionary")
+            source = query["source"]
+            template = query["template"]
+            key = bucket_key(wordlists, category, source, template)
+            groups.setdefault(key, []).append((query_id, category, source, template))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            errors.append(error_result(query_id, e))
+
+        if num_queries % chunk_size == 0:
+            yield groups, errors
+            groups = {}
+            errors = []
+    if groups or errors:
+        yield groups, errors
+
+class WorkerPool:
+    # Single-process executors, so that every group keeps going to the process which loaded its bucket.
+    # New groups go to the worker with the fewest queries so far.
+
+    def __init__(self, num_workers: int, wordlists_path: Path, backend: str):
+        if num_workers == 1:
+            # Everything runs inline
+            init_worker(wordlists_path, backend)
+            self.executors = [None]
+        else:
+            self.executors = [ProcessPoolExecutor(max_workers = 1, initializer = init_worker,
+                                                  initargs = (wordlists_path, backend))
+                              for _ in range(num_workers)]
+        self.assignments = {}
+        self.loads = [0] * num_workers
+
+    def submit(self, key: tuple, queries: list) -> Future:
+        worker = self.assignments.get(key)
+        if worker is None:
+            worker = self.assignments[key] = min(range(len(self.loads)), key = lambda i: self.loads[i])
+        self.loads[worker] += len(queries)
+
+        executor = self.executors[worker]
+        if executor is not None:
+            return executor.submit(run_queries, queries)
+        future = Future()
+        future.set_result(run_queries(queries))
+        return future
+
+    def shutdown(self):
+        for executor in self.executors:
+            if executor is not None:
+                executor.shutdown()
+
+def run_batch(input_file, output_file, wordlists_path = WORDLISTS_DIR, num_workers = 1, backend = "index",
+              chunk_size = CHUNK_SIZE) -> dict:
+    wordlists = Wordlists(wordlists_path)
+    pool = WorkerPool(num_workers, wordlists_path, backend)
+    pending = deque()
+    num_queries = 0
+    num_errors = 0
+    start = time.perf_counter()
+    try:
+        for groups, errors in read_queries(input_file, wordlists, chunk_size):
+            num_queries += sum(len(queries) for queries in groups.values()) + len(errors)
+            num_errors += len(errors)
+            output_file.write("".join(json.dumps(error, ensure_ascii = False) + "\n" for error in errors))
+            pending.extend(pool.submit(key, queries) for key, queries in groups.items())
+            # Bounds the number of results held in memory
+            while len(pending) > MAX_PENDING_PER_WORKER * num_workers:
+                output_file.write(pending.popleft().result())
+        while pending:
+            output_file.write(pending.popleft().result())
+    finally:
+        pool.shutdown()
+
+    duration = time.perf_counter() - start
+    return {"queries": num_queries, "rejected": num_errors, "buckets": len(pool.assignments),
+            "duration": duration, "queries_per_sec": num_queries / duration if duration > 0 else 0}
+
+def main():
+    parser = argparse.ArgumentParser(prog = "python -m solver.batch",
+                                     description = "Answer dictionary, anagram and related queries from a JSONL file")
+    parser.add_argument("input", help = "JSONL file of queries (- for stdin)")
+    parser.add_argument("-o", "--output", default = "-", help = "Where to write the JSONL results (default: stdout)")
+    parser.add_argument("-w", "--workers", type = int, default = 1,
+                        help = "Number of worker processes (default: 1, answering the queries in-process)")
+    parser.add_argument("-b", "--backend", choices = BACKENDS, default = "index",
+                        help = "Storage to search with the dictionary queries (default: index)")
+    parser.add_argument("--chunk-size", type = int, default = CHUNK_SIZE,
+                        help = f"Number of queries read and grouped at a time (default: {CHUNK_SIZE})")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.backend == "mmap" and fixed_width.np is None:
+        parser.error("--backend mmap requires NumPy (pip install numpy)")
+
+    input_file = sys.stdin if args.input == "-" else open(args.input, "r", encoding = "utf8")
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w", encoding = "utf8")
+    if input_file is sys.stdin:
+        sys.stdin.reconfigure(encoding = "utf8")
+    if output_file is sys.stdout:
+        sys.stdout.reconfigure(encoding = "utf8")
+    try:
+        stats = run_batch(input_file, output_file, WORDLISTS_DIR, args.workers, args.backend, args.chunk_size)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    # The results may be on stdout
+    print(f"Answered {stats['queries']} queries ({stats['rejected']} rejected) from {stats['buckets']} buckets "
+          f"with {args.workers} workers in {stats['duration']:.2f}s ({stats['queries_per_sec']:.0f} queries/sec)",
+          file = sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import itertools
+import random
+import re
+import statistics
+import time
+
+from . import BACKENDS, Solver, fixed_width, parse_template
+from .template import WILDCARD
+
+#
+# The application's approach (constructSearchRegex in CrosswordSolver.js):
+# an alternation of every apostrophe variant, run over the newline-joined word-list
+#
+
+def construct_search_regex(positions: list) -> str:
+    options = [["[a-zA-Z]"] if chars is WILDCARD else sorted(chars) for chars in positions]
+    return "|".join("".join(combination) for combination in itertools.product(*options))
+
+def regex_search(text: str, positions: list) -> list:
+    return re.findall(construct_search_regex(positions), text)
+
+def random_templates(solver: Solver, source: str, count: int, rng: random.Random) -> list:
+    # Templates made from actual words, with a random number of letters replaced by wildcards
+    templates = []
+    lengths = [length for length in solver.wordlists.lengths(source) if length > 1]
+    while len(templates) < count:
+        words = solver.wordlists.read_dictionary(source, rng.choice(lengths))
+        letters = list(solver.wordlists.decode(rng.choice(words)))
+        chars = []
+        for char in letters:
+            if char == "'":
+                chars[-1] += char
+            else:
+                chars.append(char)
+        for i in rng.sample(range(len(chars)), rng.randint(1, len(chars))):
+            if chars[i] != " ":
+                # Dropping the apostrophe matches both versions of the letter, like the user would
+                chars[i] = "?" if rng.random() < 0.7 else chars[i][0]
+        templates.append("".join(chars))
+    return templates
+
+def main():
+    parser = argparse.ArgumentParser(prog = "python -m solver.benchmark",
+                                     description = "Compare template search using the indexes with regex scanning")
+    parser.add_argument("-s", "--source", default = "hspell", help = "Source to search (default: hspell)")
+    parser.add_argument("-n", "--count", type = int, default = 200, help = "Number of random templates")
+    parser.add_argument("--seed", type = int, default = 0, help = "Seed for the random templates")
+    parser.add_argument("-b", "--backend", choices = BACKENDS, default = "index",
+                        help = "Storage to search (default: index)")
+    args = parser.parse_args()
+    if args.backend == "mmap" and fixed_width.np is None:
+        parser.error("--backend mmap requires NumPy (pip install numpy)")
+
+    solver = Solver(backend = args.backend)
+    rng = random.Random(args.seed)
+    templates = random_templates(solver, args.source, args.count, rng)
+
+    start = time.perf_counter()
+    for length in solver.wordlists.lengths(args.source):
+        solver.index(args.source, length)
+    print(f"Built the indexes of {args.source} in {time.perf_counter() - start:.2f}s")
+
+    # Buckets which aren't available for the backend are searched with the bitset indexes, and timed separately
+    backends = {length: solver.index_backend(args.source, length) for length in solver.wordlists.lengths(args.source)}
+    fallbacks = sum(backend != args.backend for backend in backends.values())
+    if fallbacks == len(backends):
+        parser.error(f"No bucket of {args.source} is available for the {args.backend} backend")
+    if fallbacks:
+        print(f"{fallbacks} of {len(backends)} buckets of {args.source} aren't available for the {args.backend} backend "
+              f"and fall back to the bitset indexes")
+
+    texts = {length: "\n".join(solver.wordlists.read_dictionary(args.source, length))
+             for length in solver.wordlists.lengths(args.source)}
+
+    regex_times = []
+    index_times = {}
+    bucket_bytes = 0
+    shard_bytes = 0
+    for template in templates:
+        positions = parse_template(template, solver.wordlists)
+        text = texts.get(len(positions), "")
+
+        start = time.perf_counter()
+        expected = regex_search(text, positions)
+        regex_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        result = solver.index(args.source, len(positions)).match(positions)
+        index_times.setdefault(backends[len(positions)], []).append(time.perf_counter() - start)
+
+        assert sorted(result) == sorted(expected), template
+
+        # Bytes a client would fetch and scan with and without the prefix shards
+        names = solver.shard_names(args.source, template)
+        bucket_bytes += len(text)
+        shard_text = "\n".join("\n".join(solver.wordlists.read_words(name)) for name in names)
+        shard_bytes += len(shard_text)
+        assert sorted(regex_search(shard_text, positions)) == sorted(expected), template
+
+    print(f"{len(templates)} templates, results are identical\n")
+    print(f"{'':<10}{'Templates':>10}{'Mean':>12}{'Median':>12}{'Max':>12}")
+    for name, times in [("Regex", regex_times), *((backend.capitalize(), times) for backend, times in index_times.items())]:
+        print(f"{name:<10}{len(times):>10}{statistics.mean(times) * 1000:>10.2f}ms"
+              f"{statistics.median(times) * 1000:>10.2f}ms{max(times) * 1000:>10.2f}ms")
+    if shard_bytes < bucket_bytes:
+        print(f"\nShards: {shard_bytes / len(templates) / 1024:.1f} KB per template instead of "
+              f"{bucket_bytes / len(templates) / 1024:.1f} KB ({shard_bytes / bucket_bytes:.1%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import hashlib
+import struct
+
+from pathlib import Path
+
+# Reader for the Bloom filters of the words of a source (words.bloom), see utils/words/bloom.py for the format
+
+MAGIC = b"BLOM"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+BLOOM_NAME = "words.bloom"
+
+class BloomFilter:
+    def __init__(self, data: bytes):
+        magic, version, self.num_hashes, self.num_bits, self.num_words = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a Bloom filter, or an unsupported version")
+        self.bits = bytes(data[HEADER.size:HEADER.size + (self.num_bits + 7) // 8])
+
+    @classmethod
+    def load(cls, path: Path) -> "BloomFilter":
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def __len__(self):
+        return self.num_words
+
+    def __contains__(self, word: str) -> bool:
+        # False if the (encoded) word is certainly not in the source, True if it may be
+        digest = int.from_bytes(hashlib.blake2b(word.encode("utf8"), digest_size = 8).digest(), "little")
+        h1 = digest & 0xFFFFFFFF
+        h2 = (digest >> 32) | 1
+        for i in range(self.num_hashes):
+            bit = (h1 + i * h2) % self.num_bits
+            if not self.bits[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
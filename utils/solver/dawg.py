@@ -0,0 +1,134 @@
+import array
+import string
+import sys
+
+from pathlib import Path
+
+from .template import WILDCARD
+
+# Reader for the DAWGs created by utils/words/dawg_builder.py (the dawgdic format, like modules/dawg/wrapper.js):
+# the number of units (uint32) and the units of the double-array dictionary (uint32 each),
+# followed by the number of guide units (uint32) and the guide (2 bytes per unit: first child label, next sibling label)
+
+IS_LEAF_BIT = 1 << 31
+HAS_LEAF_BIT = 1 << 8
+EXTENSION_BIT = 1 << 9
+SPACE = ord("_")
+# DAWGs built from word-lists with CRLF line endings end every key with "\r", which is read as the end of the word
+CARRIAGE_RETURN = ord("\r")
+
+def next_row(row: list, target: bytes, label: int) -> list:
+    # Edit distances from every prefix of target to a word, given those to the word without its last letter (label)
+    new = [row[0] + 1]
+    for j, char in enumerate(target):
+        new.append(min(new[j] + 1, row[j + 1] + 1, row[j] + (char != label)))
+    return new
+
+class DawgIndex:
+    # Template search over a DAWG without expanding it into a word-list:
+    # the automaton is walked one template position at a time, following only the edges
+    # which the position allows, so memory stays at the size of the DAWG.
+
+    def __init__(self, data: bytes, alphabet = None):
+        # alphabet: the encoded letters which a wildcard can match (ASCII letters by default)
+        self.alphabet = frozenset(ord(char) for char in (alphabet if alphabet is not None else string.ascii_letters))
+
+        num_units = int.from_bytes(data[:4], "little")
+        self.units = array.array("I")
+        self.units.frombytes(data[4:4 + 4 * num_units])
+        if sys.byteorder == "big":
+            self.units.byteswap()
+
+        offset = 4 + 4 * num_units
+        num_guide_units = int.from_bytes(data[offset:offset + 4], "little")
+        self.guide = bytes(data[offset + 4:offset + 4 + 2 * num_guide_units])
+
+    @classmethod
+    def load(cls, path: Path, alphabet = None) -> "DawgIndex":
+        with open(path, "rb") as f:
+            return cls(f.read(), alphabet)
+
+    def follow(self, index: int, label: int):
+        base = self.units[index]
+        next_index = index ^ ((base >> 10) << ((base & EXTENSION_BIT) >> 6)) ^ label
+        if next_index >= len(self.units) or self.units[next_index] & (IS_LEAF_BIT | 0xFF) != label:
+            return None
+        return next_index
+
+    def has_value(self, index: int) -> bool:
+        return bool(self.units[index] & HAS_LEAF_BIT)
+
+    def is_word(self, index: int) -> bool:
+        # Whether the path to index spells a whole word, with or without a trailing "\r"
+        if self.has_value(index):
+            return True
+        child = self.follow(index, CARRIAGE_RETURN)
+        return child is not None and self.has_value(child)
+
+    def children(self, index: int):
+        # (label, index) of every child, in label order, except for the "\r" which ends a word
+        if not self.guide:
+            return
+        label = self.guide[index * 2]
+        while label:
+            child = self.follow(index, label)
+            if child is None:
+                return
+            if label != CARRIAGE_RETURN:
+                yield label, child
+            label = self.guide[child * 2 + 1]
+
+    def __contains__(self, word: str) -> bool:
+        index = 0
+        for label in word.encode("utf8"):
+            index = self.follow(index, label)
+            if index is None:
+                return False
+        return self.is_word(index)
+
+    def keys(self):
+        # Every word, in sorted order (what dawg.keys() returns in the application)
+        stack = [(0, b"")]
+        while stack:
+            index, prefix = stack.pop()
+            if prefix and self.is_word(index):
+                yield prefix.decode("utf8")
+            stack.extend((child, prefix + bytes([label])) for label, child in reversed(list(self.children(index))))
+
+    def iter_match(self, positions: list):
+        # Lazily yields the words matching the parsed template, in sorted order
+        options = [None if chars is WILDCARD else sorted(ord(char) for char in chars) for chars in positions]
+        stack = [(0, b"")]
+        while stack:
+            index, prefix = stack.pop()
+            depth = len(prefix)
+            if depth == len(options):
+                if self.is_word(index):
+                    yield prefix.decode("utf8")
+                continue
+
+            if options[depth] is None:
+                # A wildcard matches any letter, but not a space
+                edges = [(label, child) for label, child in self.children(index) if label in self.alphabet]
+            else:
+                edges = [(label, self.follow(index, label)) for label in options[depth]]
+            stack.extend((child, prefix + bytes([label])) for label, child in reversed(edges) if child is not None)
+
+    def match(self, positions: list) -> list:
+        return list(self.iter_match(positions))
+
+    def iter_near(self, word: str, max_distance: int):
+        # Lazily yields (word, distance) for the words within max_distance edits (Levenshtein) of the word, in sorted order.
+        # Every path carries the edit distances of its prefix, and is abandoned once none of them is within max_distance.
+        target = word.encode("utf8")
+        stack = [(0, b"", list(range(len(target) + 1)))]
+        while stack:
+            index, prefix, row = stack.pop()
+            if prefix and row[-1] <= max_distance and self.is_word(index):
+                yield prefix.decode("utf8"), row[-1]
+            edges = []
+            for label, child in self.children(index):
+                child_row = next_row(row, target, label)
+                if min(child_row) <= max_distance:
+                    edges.append((child, prefix + bytes([label]), child_row))
+            stack.extend(reversed(edges))
@@ -0,0 +1,258 @@
+from bisect import bisect_left
+
+from .anagram_index import AnagramIndex
+from .dawg import next_row
+from .index import RelatedIndex, TemplateIndex
+from .letter_matrix import LetterMatrix
+from .template import parse_template, tokenize
+from .wordlists import Wordlists
+
+CATEGORIES = ["dictionary", "anagram", "related"]
+# Storage used for template queries:
+#   index: bitset indexes built from the text word-lists
+#   mmap:  the memory-mapped fixed-width buckets (requires NumPy)
+#   dawg:  walking the DAWGs, without expanding them
+BACKENDS = ["index", "mmap", "dawg"]
+
+class Solver:
+    # Server-side counterpart of getWords() in CrosswordSolver.js.
+    # Indexes are built lazily, the first time a (source, length) pair is queried, or up front by preload().
+    # With another backend, buckets which aren't available in its format fall back to the bitset indexes.
+    # Buckets are read from the snapshot of their source when there is an up-to-date one, instead of the word-lists.
+
+    def __init__(self, wordlists = None, backend = "index", use_snapshots = True):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        self.wordlists = wordlists if wordlists is not None else Wordlists()
+        self.backend = backend
+        self.use_snapshots = use_snapshots
+        self._indexes = {}
+        self._words = {}
+        self._snapshots = {}
+
+    def _check_source(self, source: str, category: str):
+        if source not in self.wordlists.sources(category):
+            raise ValueError(f"Unknown source: {source}")
+
+    def snapshot(self, source: str):
+        # The up-to-date snapshot of the source, or None
+        if source not in self._snapshots:
+            self._snapshots[source] = self.wordlists.read_snapshot(source) if self.use_snapshots else None
+        return self._snapshots[source]
+
+    def words(self, source: str, length: int) -> list:
+        key = (source, length)
+        if key not in self._words:
+            self._check_source(source, "dictionary")
+            snapshot = self.snapshot(source)
+            words = snapshot.words(length) if snapshot is not None else None
+            self._words[key] = words if words is not None else self.wordlists.read_dictionary(source, length)
+        return self._words[key]
+
+    def index(self, source: str, length: int):
+        key = ("dictionary", source, length)
+        if key not in self._indexes:
+            index = None
+            if self.backend == "mmap":
+                self._check_source(source, "dictionary")
+                index = self.wordlists.read_fixed_width(source, length)
+            elif self.backend == "dawg":
+                index = self.dawg(source, length)
+            if index is None:
+                snapshot = self.snapshot(source)
+                postings = snapshot.postings(length) if snapshot is not None else None
+                index = TemplateIndex(self.words(source, length), postings)
+            self._indexes[key] = index
+        return self._indexes[key]
+
+    def index_backend(self, source: str, length: int) -> str:
+        # The storage which answers template queries for the bucket: the backend, or "index" if it fell back
+        return "index" if isinstance(self.index(source, length), TemplateIndex) else self.backend
+
+    def anagram_index(self, source: str, length: int):
+        # The binary index if there is one, otherwise the mapping from anagram_eN.json
+        key = ("anagram", source, length)
+        if key not in self._indexes:
+            self._check_source(source, "anagram")
+            snapshot = self.snapshot(source)
+            index = snapshot.anagram_index(length) if snapshot is not None else None
+            if index is None:
+                index = self.wordlists.read_anagram_index(source, length)
+            self._indexes[key] = index if index is not None else self.wordlists.read_anagrams(source, length)
+        return self._indexes[key]
+
+    def anagram_words(self, source: str, length: int, signature: str) -> list:
+        index = self.anagram_index(source, length)
+        if not isinstance(index, AnagramIndex):
+            return index.get(signature, [])
+        words = [self.words(source, bucket)[i] for bucket, i in index.lookup(signature)]
+        # Guard against hash collisions
+        return [word for word in words if self.word_signature(word) == signature]
+
+    def related_index(self, source: str):
+        # The token and n-gram indexes if there are any, otherwise a scan over the expressions
+        key = ("related", source, 0)
+        if key not in self._indexes:
+            self._check_source(source, "related")
+            snapshot = self.snapshot(source)
+            index = snapshot.related_lookup() if snapshot is not None else None
+            if index is None:
+                index = self.wordlists.read_related_lookup(source)
+            self._indexes[key] = index if index is not None else RelatedIndex(self.wordlists.read_related(source))
+        return self._indexes[key]
+
+    def bloom_filter(self, source: str):
+        key = ("bloom", source, 0)
+        if key not in self._indexes:
+            self._check_source(source, "dictionary")
+            self._indexes[key] = self.wordlists.read_bloom_filter(source)
+        return self._indexes[key]
+
+    def dawg(self, source: str, length: int):
+        # The DAWG of the bucket, or None if it wasn't built or its keys don't look like the words of the bucket
+        # (then the sorted words are searched instead)
+        key = ("dawg", source, length)
+        if key not in self._indexes:
+            self._check_source(source, "dictionary")
+            dawg = self.wordlists.read_dawg(source, length)
+            if dawg is not None:
+                first = next(dawg.keys(), None)
+                if first is None or len(first) != length:
+                    dawg = None
+            self._indexes[key] = dawg
+        return self._indexes[key]
+
+    def letter_matrix(self, source: str) -> LetterMatrix:
+        # All the words of the source, of every length (needs NumPy)
+        key = ("letters", source, 0)
+        if key not in self._indexes:
+            words = [word for length in self.wordlists.lengths(source, "dictionary") for word in self.words(source, length)]
+            self._indexes[key] = LetterMatrix(words, self.wordlists.translate_mapping, self.wordlists.final_form_mapping)
+        return self._indexes[key]
+
+    def preload(self):
+        for source in self.wordlists.sources("dictionary"):
+            for length in self.wordlists.lengths(source, "dictionary"):
+                self.index(source, length)
+        for source in self.wordlists.sources("anagram"):
+            for length in self.wordlists.lengths(source, "anagram"):
+                self.anagram_index(source, length)
+        for source in self.wordlists.sources("related"):
+            self.related_index(source)
+
+    def shard_names(self, source: str, template: str) -> list:
+        # The word-list files which a client has to fetch to answer the template:
+        # only the shards which can hold its fixed prefix, or the whole bucket if it wasn't sharded
+        self._check_source(source, "dictionary")
+        positions = parse_template(template, self.wordlists, self.wordlists.allow_spaces(source))
+        layout = self.wordlists.shard_layout(source, len(positions))
+        if layout is None:
+            return [f"{source}/dictionary_e{len(positions)}.txt"]
+        return [f"{source}/shard_e{len(positions)}_{i}.txt" for i in layout.resolve(positions)]
+
+    def search_encoded(self, source: str, template: str) -> list:
+        positions = parse_template(template, self.wordlists, self.wordlists.allow_spaces(source))
+        return self.index(source, len(positions)).match(positions)
+
+    def search(self, source: str, template: str) -> list:
+        # Hebrew words matching the template, sorted like in the application
+        return sorted(self.wordlists.decode(word) for word in self.search_encoded(source, template))
+
+    def word_signature(self, word: str) -> str:
+        # Same encoding as anagramEncoder() in CrosswordSolver.js, for an encoded word
+        letters = "".join(self.wordlists.final_form_mapping.get(char, char) for char in word if char.isalpha())
+        return "".join(f"{char}{letters.count(char)}" for char in sorted(set(letters)))
+
+    def anagram_signature(self, chars: list) -> str:
+        return self.word_signature("".join(self.wordlists.encode(char) for char in chars))
+
+    def anagram(self, source: str, template: str) -> list:
+        chars = tokenize(template.replace(" ", ""), self.wordlists, allow_spaces = True, allow_question_marks = False)
+        words = self.anagram_words(source, len(chars), self.anagram_signature(chars))
+        return sorted(self.wordlists.decode(word) for word in words)
+
+    def anagram_letters(self, source: str, template: str):
+        self._check_source(source, "dictionary")
+        chars = tokenize(template.replace(" ", ""), self.wordlists, allow_spaces = True, allow_question_marks = False)
+        matrix = self.letter_matrix(source)
+        return matrix, matrix.vector("".join(self.wordlists.encode(char) for char in chars))
+
+    def subanagram(self, source: str, template: str, min_length = 2) -> list:
+        # Words which can be made from some of the letters, longest first
+        matrix, vector = self.anagram_letters(source, template)
+        words = {self.wordlists.decode(matrix.words[i]) for i in matrix.dominated(vector, min_length)}
+        return sorted(words, key = lambda word: (-len(word), word))
+
+    def multi_anagram(self, source: str, template: str, max_words = 2, min_length = 2, limit = 1000) -> list:
+        # Ways to split all the letters into up to max_words words, as lists of groups of interchangeable words
+        matrix, vector = self.anagram_letters(source, template)
+        return [[sorted(self.wordlists.decode(matrix.words[i]) for i in group) for group in partition]
+                for partition in matrix.partitions(vector, max_words, min_length, limit)]
+
+    def related(self, source: str, template: str) -> list:
+        chars = tokenize(template, self.wordlists, self.wordlists.allow_spaces(source), allow_question_marks = False)
+        # Like the application, letters are matched exactly here, apostrophe variants aren't expanded
+        substring = "".join(self.wordlists.encode(char) for char in chars)
+        return sorted(self.wordlists.decode(word) for word in self.related_index(source).match(substring))
+
+    def encode_word(self, source: str, word: str) -> str:
+        chars = tokenize(word, self.wordlists, self.wordlists.allow_spaces(source), allow_question_marks = False)
+        return "".join(self.wordlists.encode(char) for char in chars)
+
+    def contains_encoded(self, source: str, word: str) -> bool:
+        # Most words which aren't in the source are ruled out by its Bloom filter, the others are looked up in their bucket
+        bloom_filter = self.bloom_filter(source)
+        if bloom_filter is not None and word not in bloom_filter:
+            return False
+        if len(word) not in self.wordlists.lengths(source, "dictionary"):
+            return False
+        dawg = self.dawg(source, len(word))
+        if dawg is not None:
+            return word in dawg
+        words = self.words(source, len(word))
+        i = bisect_left(words, word)
+        return i < len(words) and words[i] == word
+
+    def contains(self, source: str, word: str) -> bool:
+        return self.contains_encoded(source, self.encode_word(source, word))
+
+    def neighbours_encoded(self, source: str, word: str, k = 1) -> list:
+        # (word, distance) for the words of the source within k edits of the word, other than itself.
+        # An edit can change the length, so the buckets of length len(word) - k to len(word) + k are searched,
+        # through their DAWGs, or by scanning the words when there is no DAWG.
+        self._check_source(source, "dictionary")
+        target = word.encode("utf8")
+        lengths = self.wordlists.lengths(source, "dictionary")
+        matches = []
+        for length in range(max(len(word) - k, 1), len(word) + k + 1):
+            if length not in lengths:
+                continue
+            dawg = self.dawg(source, length)
+            if dawg is not None:
+                matches += dawg.iter_near(word, k)
+                continue
+            for candidate in self.words(source, length):
+                row = list(range(len(target) + 1))
+                for label in candidate.encode("utf8"):
+                    row = next_row(row, target, label)
+                    if min(row) > k:
+                        break
+                else:
+                    if row[-1] <= k:
+                        matches.append((candidate, row[-1]))
+        return [(candidate, distance) for candidate, distance in matches if candidate != word]
+
+    def neighbours(self, source: str, word: str, k = 1) -> list:
+        # Hebrew words within k edits (insertions, deletions or substitutions of a letter) of the word, closest first
+        matches = self.neighbours_encoded(source, self.encode_word(source, word), k)
+        return [self.wordlists.decode(candidate) for candidate, _ in
+                sorted(matches, key = lambda match: (match[1], self.wordlists.decode(match[0])))]
+
+    def get_words(self, source: str, template: str, category: str) -> list:
+        if category == "dictionary":
+            return self.search(source, template)
+        if category == "anagram":
+            return self.anagram(source, template)
+        if category == "related":
+            return self.related(source, template)
+        raise ValueError(f"Unknown category: {category}")
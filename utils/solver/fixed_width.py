@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from .template import WILDCARD
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Reader for the fixed-width dictionary buckets (dictionary_eN.bin), see utils/words/fixed_width.py for the format
+
+class FixedWidthIndex:
+    # A bucket mapped into memory as a (words x length) uint8 array.
+    # Nothing is parsed at startup, and processes which map the same file share its pages.
+    # A template is answered by comparing the constrained columns of the array, like TemplateIndex.match().
+
+    def __init__(self, records, length: int):
+        if np is None:
+            raise RuntimeError("NumPy is required for memory-mapped word-lists (pip install numpy)")
+
+        self.length = length
+        self.records = np.asarray(records, dtype = np.uint8).reshape(-1, length)
+
+    @classmethod
+    def load(cls, path: Path, length: int) -> "FixedWidthIndex":
+        if np is None:
+            raise RuntimeError("NumPy is required for memory-mapped word-lists (pip install numpy)")
+        if path.stat().st_size == 0:
+            return cls(np.zeros(0, dtype = np.uint8), length)
+        return cls(np.memmap(path, dtype = np.uint8, mode = "r"), length)
+
+    def __len__(self):
+        return len(self.records)
+
+    def match_mask(self, positions: list):
+        if len(positions) != self.length:
+            return np.zeros(len(self.records), dtype = bool)
+
+        mask = np.ones(len(self.records), dtype = bool)
+        for position, options in enumerate(positions):
+            column = self.records[:, position]
+            if options is WILDCARD:
+                # A wildcard matches any letter, but not a space
+                mask &= column != ord("_")
+            else:
+                codes = [ord(char) for char in options]
+                mask &= column == codes[0] if len(codes) == 1 else np.isin(column, codes)
+        return mask
+
+    def match(self, positions: list) -> list:
+        # Returns the matching words, in the order of the word-list
+        data = self.records[self.match_mask(positions)].tobytes().decode("ascii")
+        return [data[i:i + self.length] for i in range(0, len(data), self.length)]
@@ -0,0 +1,428 @@
+import argparse
+import random
+import re
+import sys
+import time
+
+from pathlib import Path
+
+from .engine import Solver
+from .index import TemplateIndex
+
+#
+# Grid filling: every across and down slot of a crossword grid is a template whose cells are shared with the slots
+# crossing it. Every cell holds a domain of letters, and every slot the bitset of the words of its length which
+# fit the domains of its cells (see TemplateIndex), so that propagating a cell to the crossing slots costs a few
+# bitset operations. The search maintains arc consistency: after every choice, the domains of the cells are narrowed
+# to the letters which some candidate of every slot through them has, until nothing changes. The next slot to fill
+# is the one with the fewest candidates relative to how often it ran out of them, and its least constraining words
+# are tried first.
+#
+# A cell holds a letter regardless of its form: the final form at the end of an across word is the regular form in
+# the middle of the down word crossing it, so letters are compared in their regular form.
+#
+# Grid files have a row per line, listed from the top, with the cells of a row in reading order (right to left):
+#   #  a block
+#   ?  an empty cell (. works as well)
+#   a letter, optionally with an apostrophe, for a given letter; like in templates, a letter which can have
+#   an apostrophe matches both versions unless the apostrophe is given
+#
+
+GRID_CHARS = re.compile(r"([#?.]|[\u0590-\u05fe]'?)")
+# Candidate sets of slots, by their length and the domains of their cells
+MAX_CACHED_CANDIDATES = 1 << 16
+# The letters used by up to this many candidates are collected from the words, beyond it by intersecting bitsets
+NARROW_LIMIT = 1024
+# Choices before the first restart of fill(), the budget doubles with every restart
+RESTART_STEPS = 1000
+# Slots with more candidates than this try them in the order of the word-list (or at random)
+ORDER_LIMIT = 4096
+
+class IllegalGridError(ValueError):
+    pass
+
+class Slot:
+    def __init__(self, number: int, direction: str, cells: list):
+        self.number = number
+        self.direction = direction
+        self.cells = cells
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __repr__(self):
+        return f"{self.number} {self.direction} ({len(self)})"
+
+class Grid:
+    # cells[row][column] is None for a block, or the set of (regular, encoded) letters the cell can hold
+
+    def __init__(self, cells: list):
+        self.cells = cells
+        self.height = len(cells)
+        self.width = len(cells[0]) if cells else 0
+        self.slots = self.find_slots()
+
+    def open(self, row: int, column: int) -> bool:
+        return 0 <= row < self.height and 0 <= column < self.width and self.cells[row][column] is not None
+
+    def find_slots(self) -> list:
+        # Runs of 2 or more cells, numbered like a printed crossword: row by row, in reading order
+        slots = []
+        number = 0
+        for row in range(self.height):
+            for column in range(self.width):
+                if not self.open(row, column):
+                    continue
+                starts = False
+                for direction, (dr, dc) in [("across", (0, 1)), ("down", (1, 0))]:
+                    if self.open(row - dr, column - dc) or not self.open(row + dr, column + dc):
+                        continue
+                    if not starts:
+                        number += 1
+                        starts = True
+                    cells = []
+                    r, c = row, column
+                    while self.open(r, c):
+                        cells.append((r, c))
+                        r, c = r + dr, c + dc
+                    slots.append(Slot(number, direction, cells))
+        return slots
+
+class LetterForms:
+    # Maps the encoded letters to their regular form (the final forms, with or without an apostrophe)
+
+    def __init__(self, wordlists):
+        translate_mapping = wordlists.translate_mapping
+        hebrew = {v: k for k, v in translate_mapping.items()}
+        self.regular = {}
+        for char, encoded in translate_mapping.items():
+            base = translate_mapping[char[0]]
+            if base in wordlists.final_form_mapping:
+                self.regular[encoded] = translate_mapping[hebrew[wordlists.final_form_mapping[base]] + char[1:]]
+            else:
+                self.regular[encoded] = encoded
+        self.letters = frozenset(self.regular.values())
+
+def parse_grid(text: str, wordlists) -> Grid:
+    forms = LetterForms(wordlists)
+    rows = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        cells = []
+        end = 0
+        for match in GRID_CHARS.finditer(line):
+            char = match.group(1)
+            if match.start() != end or not (char in "#?." or char in wordlists.translate_mapping):
+                break
+            end = match.end()
+            if char == "#":
+                cells.append(None)
+            elif char in "?.":
+                cells.append(forms.letters)
+            else:
+                options = {wordlists.encode(char)}
+                if char in wordlists.apostrophe_mapping:
+                    options.add(wordlists.encode(wordlists.apostrophe_mapping[char]))
+                cells.append(frozenset(forms.regular[option] for option in options))
+        if end != len(line):
+            raise IllegalGridError(f"Illegal cell in line {line_number}: '{line[end:]}'")
+        rows.append(cells)
+
+    if not rows or any(len(cells) != len(rows[0]) for cells in rows):
+        raise IllegalGridError("Every row of the grid must have the same number of cells")
+    return Grid(rows)
+
+def read_grid(path: Path, wordlists) -> Grid:
+    with open(path, "r", encoding = "utf8") as f:
+        return parse_grid(f.read(), wordlists)
+
+def iter_bits(bits: int):
+    # Indexes of the set bits, in increasing order
+    string = format(bits, "b")[::-1]
+    i = string.find("1")
+    while i != -1:
+        yield i
+        i = string.find("1", i + 1)
+
+class GridWords:
+    # The words of a source as the grid search uses them, shared by all the grids filled with the source:
+    # every word length is indexed once, and the candidates of a slot are cached by the domains of its cells.
+
+    def __init__(self, solver: Solver, source: str):
+        solver._check_source(source, "dictionary")
+        self.solver = solver
+        self.source = source
+        self.forms = LetterForms(solver.wordlists)
+        self.lengths = set(solver.wordlists.lengths(source, "dictionary"))
+        self.indexes = {}
+        self.postings = {}
+        self.regular_words = {}
+        self.cache = {}
+
+    def index(self, length: int) -> TemplateIndex:
+        if length not in self.indexes:
+            index = self.solver.index(self.source, length)
+            if not isinstance(index, TemplateIndex):
+                index = TemplateIndex(self.solver.words(self.source, length))
+            self.indexes[length] = index
+            # The bitsets of every position by regular letter, without spaces
+            postings = []
+            for position_postings in index.postings:
+                merged = {}
+                for char, bits in position_postings.items():
+                    if char in self.forms.regular:
+                        regular = self.forms.regular[char]
+                        merged[regular] = merged.get(regular, 0) | bits
+                postings.append(merged)
+            self.postings[length] = postings
+            table = str.maketrans(self.forms.regular)
+            self.regular_words[length] = [word.translate(table) for word in index.words]
+        return self.indexes[length]
+
+    def candidates(self, domains: tuple) -> tuple:
+        # The bitset of the words which fit the domains of the cells of a slot, and the domains narrowed
+        # to the letters these words use
+        if len(domains) not in self.lengths:
+            # No word of the source fits a slot of this length
+            return 0, None
+        result = self.cache.get(domains)
+        if result is None:
+            index = self.index(len(domains))
+            postings = self.postings[len(domains)]
+            bits = index.all
+            for position, letters in enumerate(domains):
+                allowed = 0
+                for letter in letters:
+                    allowed |= postings[position].get(letter, 0)
+                bits &= allowed
+                if not bits:
+                    break
+
+            narrowed = None
+            if bits and bits.bit_count() <= NARROW_LIMIT:
+                words = self.regular_words[len(domains)]
+                columns = zip(*(words[k] for k in iter_bits(bits)))
+                narrowed = tuple(letters.intersection(column) for letters, column in zip(domains, columns))
+            elif bits:
+                narrowed = tuple(frozenset(letter for letter in letters if postings[position].get(letter, 0) & bits)
+                                 for position, letters in enumerate(domains))
+
+            if len(self.cache) >= MAX_CACHED_CANDIDATES:
+                self.cache.clear()
+            result = self.cache[domains] = (bits, narrowed)
+        return result
+
+class GridFiller:
+    # Fills the slots of a grid with the words of a source
+
+    def __init__(self, words: GridWords, grid: Grid, allow_repeats = False, seed = None):
+        self.words = words
+        self.grid = grid
+        self.allow_repeats = allow_repeats
+        self.seed = seed
+        self.rng = random.Random(seed) if seed is not None else None
+        self.weights = [1] * len(grid.slots)
+        self.steps = 0
+        self.budget = None
+        self.aborted = False
+
+        # The slots through every cell, with the position of the cell in the slot
+        self.crossings = {}
+        for i, slot in enumerate(grid.slots):
+            for position, cell in enumerate(slot.cells):
+                self.crossings.setdefault(cell, []).append((i, position))
+
+    def candidates(self, slot: Slot, domains: dict) -> tuple:
+        return self.words.candidates(tuple(domains[cell] for cell in slot.cells))
+
+    def propagate(self, domains: dict, queue: list) -> dict:
+        # Narrows the domains until every letter of every cell is used by a candidate of every slot through it.
+        # Returns the candidates of every slot, or None if some slot has none left.
+        slots = self.grid.slots
+        candidates = {}
+        pending = set(queue)
+        while queue:
+            i = queue.pop()
+            pending.discard(i)
+            slot = slots[i]
+            bits, narrowed = self.candidates(slot, domains)
+            if not bits:
+                # Slots which fail often are filled earlier
+                self.weights[i] += 1
+                return None
+            candidates[i] = bits
+            for cell, letters in zip(slot.cells, narrowed):
+                if len(letters) == len(domains[cell]):
+                    continue
+                domains[cell] = letters
+                for j, _ in self.crossings[cell]:
+                    if j != i and j not in pending:
+                        pending.add(j)
+                        queue.append(j)
+                        candidates.pop(j, None)
+        for i, slot in enumerate(slots):
+            if i not in candidates:
+                candidates[i] = self.candidates(slot, domains)[0]
+        return candidates
+
+    def word(self, i: int, bits: int) -> str:
+        # The first candidate of slot i
+        return self.words.indexes[len(self.grid.slots[i])].words[next(iter_bits(bits))]
+
+    def order(self, i: int, options: list, candidates: dict) -> list:
+        # Least constraining words first: by the product of the number of candidates their letters leave
+        # to the slots crossing them
+        if len(options) > ORDER_LIMIT:
+            return options
+        slot = self.grid.slots[i]
+        support = []
+        for cell in slot.cells:
+            counts = {}
+            for j, position in self.crossings[cell]:
+                if j == i:
+                    continue
+                postings = self.words.postings[len(self.grid.slots[j])][position]
+                for letter, bits in postings.items():
+                    counts[letter] = counts.get(letter, 1) * (bits & candidates[j]).bit_count()
+            support.append(counts)
+        words = self.words.regular_words[len(slot)]
+        scores = {}
+        for option in options:
+            score = 1
+            for counts, char in zip(support, words[option]):
+                score *= counts.get(char, 1)
+            scores[option] = score
+        return sorted(options, key = lambda option: -scores[option])
+
+    def search(self, domains: dict, candidates: dict, chosen: dict):
+        # Yields the words of every slot for each completion of the grid.
+        # chosen holds the words chosen so far, as bits: words whose letters only differ in their form would
+        # otherwise become candidates of their slot again
+        candidates.update(chosen)
+        counts = {i: bits.bit_count() for i, bits in candidates.items()}
+        open_slots = [i for i, count in counts.items() if count > 1]
+        if not open_slots:
+            words = [self.word(i, candidates[i]) for i in range(len(self.grid.slots))]
+            if self.allow_repeats or len(set(words)) == len(words):
+                yield words
+            return
+
+        i = min(open_slots, key = lambda i: counts[i] / self.weights[i])
+        slot = self.grid.slots[i]
+        index = self.words.indexes[len(slot)]
+        used = {self.word(j, candidates[j]) for j, count in counts.items() if count == 1}
+        options = list(iter_bits(candidates[i]))
+        if self.rng is not None:
+            self.rng.shuffle(options)
+        options = self.order(i, options, candidates)
+        for option in options:
+            word = index.words[option]
+            if not self.allow_repeats and word in used:
+                continue
+            if self.budget is not None and self.steps >= self.budget:
+                self.aborted = True
+                return
+            self.steps += 1
+            assigned = dict(domains)
+            for cell, char in zip(slot.cells, word):
+                assigned[cell] = frozenset([self.words.forms.regular[char]])
+            queue = [j for cell in slot.cells for j, _ in self.crossings[cell] if j != i]
+            narrowed = self.propagate(assigned, queue)
+            if narrowed is not None:
+                yield from self.search(assigned, narrowed, {**chosen, i: 1 << option})
+
+    def solutions(self, max_steps = None):
+        # Stops after max_steps more choices, setting aborted
+        self.budget = self.steps + max_steps if max_steps is not None else None
+        self.aborted = False
+        domains = {(row, column): cell for row, cells in enumerate(self.grid.cells)
+                   for column, cell in enumerate(cells) if cell is not None}
+        candidates = self.propagate(domains, list(range(len(self.grid.slots))))
+        if candidates is not None:
+            yield from self.search(domains, candidates, {})
+
+    def fill(self, max_steps = None) -> list:
+        # The words of every slot of the first completion found, or None if there is none (or if max_steps choices
+        # weren't enough, see aborted). The search restarts with a growing budget and the candidates in a new random
+        # order, so that an early bad choice doesn't keep it busy; the weights of the slots are kept across restarts.
+        budget = RESTART_STEPS
+        attempt = 0
+        while True:
+            if max_steps is not None:
+                budget = min(budget, max_steps - self.steps)
+            words = next(self.solutions(budget), None)
+            if words is not None or not self.aborted or (max_steps is not None and self.steps >= max_steps):
+                return words
+            attempt += 1
+            self.rng = random.Random(f"{self.seed}:{attempt}")
+            budget *= 2
+
+    def count(self, limit = None, max_steps = None) -> int:
+        # The number of completions, up to limit
+        count = 0
+        for _ in self.solutions(max_steps):
+            count += 1
+            if limit is not None and count >= limit:
+                break
+        return count
+
+    def render(self, words: list) -> list:
+        # The rows of the filled grid, in Hebrew; every cell shows the letter of the across word through it,
+        # or of the down word if there is none
+        letters = {}
+        for slot, word in sorted(zip(self.grid.slots, words), key = lambda item: item[0].direction == "across"):
+            for cell, char in zip(slot.cells, word):
+                letters[cell] = self.words.solver.wordlists.decode(char)
+        return ["".join(letters.get((row, column), "#" if cell is None else "?") for column, cell in enumerate(cells))
+                for row, cells in enumerate(self.grid.cells)]
+
+def main():
+    parser = argparse.ArgumentParser(prog = "python -m solver.grid", description = "Fill crossword grids with the words of a source")
+    parser.add_argument("source", help = "Source name (e.g. hspell)")
+    parser.add_argument("grids", nargs = "+", type = Path, help = "Grid files")
+    parser.add_argument("-c", "--count", action = "store_true", help = "Count the completions instead of filling the grid")
+    parser.add_argument("-l", "--limit", type = int, default = None, help = "Stop counting after this many completions")
+    parser.add_argument("-m", "--max-steps", type = int, default = 100000,
+                        help = "Give up after trying this many words per grid (default: 100000)")
+    parser.add_argument("--allow-repeats", action = "store_true", help = "Allow using a word more than once in a grid")
+    parser.add_argument("--seed", type = int, default = None,
+                        help = "Try the candidates of every slot in a random order (default: in the order of the word-list)")
+    args = parser.parse_args()
+
+    sys.stdout.reconfigure(encoding = "utf8")
+    solver = Solver()
+    try:
+        grid_words = GridWords(solver, args.source)
+    except ValueError as e:
+        parser.error(str(e))
+
+    for path in args.grids:
+        try:
+            grid = read_grid(path, solver.wordlists)
+        except ValueError as e:
+            parser.error(str(e))
+        lengths = sorted({len(slot.cells) for slot in grid.slots} - grid_words.lengths)
+        if lengths:
+            parser.error(f"{path}: {args.source} has no words of length {', '.join(map(str, lengths))}")
+        filler = GridFiller(grid_words, grid, args.allow_repeats, args.seed)
+        start = time.perf_counter()
+        if args.count:
+            count = filler.count(args.limit, args.max_steps)
+            stopped = " (gave up)" if filler.aborted else ""
+            print(f"{path}: {count} completions{stopped} in {time.perf_counter() - start:.2f}s ({filler.steps} steps)")
+            continue
+
+        words = filler.fill(args.max_steps)
+        if words is None:
+            result = "gave up" if filler.aborted else "no completion"
+            print(f"{path}: {result} ({time.perf_counter() - start:.2f}s, {filler.steps} steps)")
+            continue
+        print(f"{path}: filled {len(words)} slots in {time.perf_counter() - start:.2f}s ({filler.steps} steps)")
+        print("\n".join(filler.render(words)))
+        for slot, word in zip(grid.slots, words):
+            print(f"{slot.number:>3} {slot.direction:<7}{solver.wordlists.decode(word)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from .template import WILDCARD
+
+class TemplateIndex:
+    # Index of the (encoded) words of a single length.
+    # For every (position, letter) pair it holds a bitset of the words that have that letter
+    # at that position, where a bitset is a Python int in which bit i stands for words[i].
+    # A template is answered by OR-ing the bitsets of the letters allowed at every constrained
+    # position and AND-ing the positions together, instead of scanning every word.
+    # The bitsets can also be given, e.g. from a snapshot (see snapshot.py).
+
+    def __init__(self, words: list, postings = None):
+        self.words = words
+        self.length = len(words[0]) if words else 0
+        self.all = (1 << len(words)) - 1
+        self.postings = postings if postings is not None else [self.column_postings(position) for position in range(self.length)]
+        # A wildcard matches any letter, but not a space
+        self.letters = [self.all & ~postings.get("_", 0) for postings in self.postings]
+
+    def column_postings(self, position: int) -> dict:
+        column = "".join(word[position] for word in self.words)
+        alphabet = set(column)
+        postings = {}
+        for char in alphabet:
+            # One character per word, "1" where it is the current letter
+            table = str.maketrans({c: "1" if c == char else "0" for c in alphabet})
+            postings[char] = int(column.translate(table)[::-1], 2)
+        return postings
+
+    def __len__(self):
+        return len(self.words)
+
+    def match_bits(self, positions: list) -> int:
+        if len(positions) != self.length:
+            return 0
+
+        result = self.all
+        for position, options in enumerate(positions):
+            if options is WILDCARD:
+                bits = self.letters[position]
+            else:
+                bits = 0
+                for char in options:
+                    bits |= self.postings[position].get(char, 0)
+            result &= bits
+            if not result:
+                break
+        return result
+
+    def match(self, positions: list) -> list:
+        # Returns the matching words, in the order of the word-list
+        bits = format(self.match_bits(positions), "b")[::-1]
+        matches = []
+        i = bits.find("1")
+        while i != -1:
+            matches.append(self.words[i])
+            i = bits.find("1", i + 1)
+        return matches
+
+class RelatedIndex:
+    # Multi-word expressions of a source, searched by substring like the application does
+
+    def __init__(self, words: list):
+        self.text = "\n".join(word for word in words if "_" in word)
+
+    def match(self, substring: str) -> list:
+        matches = []
+        start = self.text.find(substring)
+        while start != -1:
+            line_start = self.text.rfind("\n", 0, start) + 1
+            line_end = self.text.find("\n", start)
+            if line_end == -1:
+                line_end = len(self.text)
+            matches.append(self.text[line_start:line_end])
+            start = self.text.find(substring, line_end)
+        return matches
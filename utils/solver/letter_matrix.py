@@ -0,0 +1,99 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class LetterMatrix:
+    # Letter counts of every word of a source, as a (words x letters) uint8 matrix.
+    # The columns are the letters of the Latin encoding, with final forms counted as their regular
+    # forms (27 letters), like the anagram signatures of anagramEncoder() / codec.anagram_signature().
+    # A word can be made from a set of letters iff its row is dominated by their count vector,
+    # which is checked for all words at once.
+
+    def __init__(self, words: list, translate_mapping: dict, final_form_mapping: dict):
+        if np is None:
+            raise RuntimeError("NumPy is required for sub-anagram search (pip install numpy)")
+
+        self.words = words
+        self.alphabet = sorted(set(translate_mapping.values()) - set(final_form_mapping))
+        self.columns = {char: i for i, char in enumerate(self.alphabet)}
+        self.columns.update({final: self.columns[regular] for final, regular in final_form_mapping.items()})
+
+        # Byte -> column, anything which isn't a letter (e.g. "_" for spaces) goes to an extra column
+        table = np.full(256, len(self.alphabet), dtype = np.intp)
+        for char, column in self.columns.items():
+            table[ord(char)] = column
+
+        lengths = np.fromiter(map(len, words), dtype = np.intp, count = len(words))
+        data = np.frombuffer("".join(words).encode("ascii", errors = "replace"), dtype = np.uint8)
+        rows = np.repeat(np.arange(len(words)), lengths)
+        columns = table[data]
+
+        self.matrix = np.zeros((len(words), len(self.alphabet)), dtype = np.uint8)
+        for column in range(len(self.alphabet)):
+            self.matrix[:, column] = np.bincount(rows[columns == column], minlength = len(words))
+        self.sizes = self.matrix.sum(axis = 1, dtype = np.intp)
+
+    def __len__(self):
+        return len(self.words)
+
+    def vector(self, word: str) -> "np.ndarray":
+        # Letter counts of an encoded word
+        vector = np.zeros(len(self.alphabet), dtype = np.uint8)
+        for char in word:
+            if char in self.columns:
+                vector[self.columns[char]] += 1
+        return vector
+
+    def dominated(self, vector: "np.ndarray", min_length = 1) -> "np.ndarray":
+        # Indexes of the words that can be made from (a subset of) the given letters
+        candidates = np.flatnonzero((self.sizes >= min_length) & (self.sizes <= int(vector.sum())))
+        # Words using a letter which isn't available at all are discarded first, which is cheap and
+        # typically rules out most of the words before the full comparison
+        missing = np.flatnonzero(vector == 0)
+        if len(missing) > 0:
+            candidates = candidates[~self.matrix[np.ix_(candidates, missing)].any(axis = 1)]
+        return candidates[(self.matrix[candidates] <= vector).all(axis = 1)]
+
+    def partitions(self, vector: "np.ndarray", max_words = 2, min_length = 2, limit = 1000) -> list:
+        # Splits the letters into up to max_words words which use all of them.
+        # Returns a list of partitions, each a list of groups of word indexes (the words in a group
+        # are anagrams of each other, so any word of every group can be picked).
+        candidates = self.dominated(vector, min_length)
+
+        # Anagrams are interchangeable, so the search runs over distinct letter counts
+        groups = {}
+        for index in candidates:
+            groups.setdefault(self.matrix[index].tobytes(), []).append(int(index))
+        keys = sorted(groups)
+        vectors = np.array([np.frombuffer(key, dtype = np.uint8) for key in keys]).reshape(len(keys), len(self.alphabet))
+        sizes = vectors.sum(axis = 1, dtype = np.intp)
+        positions = {key: i for i, key in enumerate(keys)}
+
+        results = []
+
+        def search(start: int, remaining: "np.ndarray", chosen: list):
+            if len(results) >= limit:
+                return
+
+            # The last word has to use all the remaining letters, which is a single lookup
+            position = positions.get(remaining.tobytes())
+            if position is not None and position >= start:
+                results.append(chosen + [position])
+
+            if len(chosen) + 2 > max_words:
+                return
+
+            # Otherwise pick the next word (in order, so that every partition is only found once),
+            # leaving enough letters for at least one more word
+            left = int(remaining.sum())
+            options = np.arange(start, len(keys))
+            options = options[(sizes[start:] <= left - min_length) & (vectors[start:] <= remaining).all(axis = 1)]
+            for position in options:
+                search(int(position), remaining - vectors[position], chosen + [int(position)])
+                if len(results) >= limit:
+                    return
+
+        if len(keys) > 0:
+            search(0, vector, [])
+        return [[groups[keys[position]] for position in partition] for partition in results]
@@ -0,0 +1,86 @@
+import array
+import struct
+import sys
+
+from pathlib import Path
+
+# Reader for the related expression indexes (related_e0.tokens.bin, related_e0.ngrams.bin),
+# see utils/words/related_index.py for the format
+
+MAGIC = b"RIDX"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIII")
+
+class PostingsIndex:
+    def __init__(self, data: bytes):
+        magic, version, self.ngram_size, num_keys, num_postings, keys_size = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a related expression index, or an unsupported version")
+
+        offset = HEADER.size
+        keys = data[offset:offset + keys_size].decode("utf8").split("\n") if num_keys else []
+        self.keys = {key: i for i, key in enumerate(keys)}
+        offset += keys_size
+
+        self.offsets = array.array("I")
+        self.offsets.frombytes(data[offset:offset + 4 * (num_keys + 1)])
+        offset += 4 * (num_keys + 1)
+
+        self.postings = array.array("I")
+        self.postings.frombytes(data[offset:offset + 4 * num_postings])
+
+        if sys.byteorder == "big":
+            self.offsets.byteswap()
+            self.postings.byteswap()
+
+    @classmethod
+    def load(cls, path: Path) -> "PostingsIndex":
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self, key: str):
+        # The line numbers of the expressions containing the key, ascending
+        i = self.keys.get(key)
+        if i is None:
+            return self.postings[0:0]
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+class RelatedLookup:
+    # Same results as RelatedIndex, without scanning every expression:
+    # a substring is looked up through its n-grams, and only the expressions which contain all of them are checked.
+    # Substrings shorter than an n-gram are looked up through the tokens which contain them.
+
+    def __init__(self, lines: list, tokens: PostingsIndex, ngrams: PostingsIndex):
+        self.lines = lines
+        self.tokens = tokens
+        self.ngrams = ngrams
+
+    def token(self, token: str) -> list:
+        # The expressions which contain the whole word
+        return [self.lines[i] for i in self.tokens.get(token)]
+
+    def candidates(self, substring: str):
+        n = self.ngrams.ngram_size
+        if len(substring) >= n:
+            postings = sorted((self.ngrams.get(substring[j:j + n]) for j in range(len(substring) - n + 1)), key = len)
+            result = set(postings[0])
+            for p in postings[1:]:
+                if not result:
+                    break
+                result.intersection_update(p)
+            return result
+        if "_" not in substring:
+            result = set()
+            for token in self.tokens.keys:
+                if substring in token:
+                    result.update(self.tokens.get(token))
+            return result
+        # A short substring across words, e.g. "M_": check every expression
+        return {i for i, line in enumerate(self.lines) if "_" in line}
+
+    def match(self, substring: str) -> list:
+        # Returns the matching expressions, in the order of the word-list
+        return [self.lines[i] for i in sorted(self.candidates(substring)) if substring in self.lines[i]]
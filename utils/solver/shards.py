@@ -0,0 +1,46 @@
+import itertools
+
+from bisect import bisect_left, bisect_right
+
+from .template import WILDCARD
+
+# Resolver for the prefix shards of the dictionary buckets (shard_eN_I.txt), see utils/words/shards.py
+
+# Every encoded character sorts below this one, so it bounds the words starting with a prefix
+PREFIX_END = "\x7f"
+# Templates whose fixed prefix expands to more alternatives than this are resolved by a shorter prefix
+MAX_PREFIXES = 256
+
+def template_prefixes(positions: list) -> list:
+    # The alternatives for the leading positions which aren't wildcards (apostrophe variants multiply them)
+    options = []
+    count = 1
+    for chars in positions:
+        if chars is WILDCARD or count * len(chars) > MAX_PREFIXES:
+            break
+        options.append(sorted(chars))
+        count *= len(chars)
+    if not options:
+        return []
+    return ["".join(prefix) for prefix in itertools.product(*options)]
+
+class ShardLayout:
+    # The shards of a single bucket: shard i holds the words w with boundaries[i] <= w < boundaries[i + 1]
+
+    def __init__(self, boundaries: list):
+        self.boundaries = boundaries
+
+    def __len__(self):
+        return len(self.boundaries)
+
+    def shards_for_prefix(self, prefix: str) -> range:
+        first = max(bisect_right(self.boundaries, prefix) - 1, 0)
+        last = bisect_left(self.boundaries, prefix + PREFIX_END) - 1
+        return range(first, last + 1)
+
+    def resolve(self, positions: list) -> list:
+        # The minimal set of shards which can hold words matching the parsed template, in order
+        prefixes = template_prefixes(positions)
+        if not prefixes:
+            return list(range(len(self.boundaries)))
+        return sorted({i for prefix in prefixes for i in self.shards_for_prefix(prefix)})
@@ -0,0 +1,83 @@
+import json
+import mmap
+import struct
+
+from pathlib import Path
+
+from .anagram_index import AnagramIndex
+from .related_index import PostingsIndex, RelatedLookup
+
+# Reader for the snapshots of the query indexes of a source (snapshot.bin), see utils/words/snapshot.py for the format
+
+MAGIC = b"SNAP"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+SNAPSHOT_NAME = "snapshot.bin"
+
+class Snapshot:
+    # The file is mapped into memory and only its contents are parsed when it is opened,
+    # every section is read the first time its bucket is queried.
+
+    def __init__(self, data):
+        magic, version, contents_size = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a snapshot, or an unsupported version")
+
+        contents = json.loads(bytes(data[HEADER.size:HEADER.size + contents_size]).decode("utf8"))
+        self.inputs = contents["inputs"]
+        self.sections = contents["sections"]
+        self.data = data
+        self.start = HEADER.size + contents_size
+
+    @classmethod
+    def load(cls, path: Path) -> "Snapshot":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ))
+
+    def is_fresh(self, hashes: dict) -> bool:
+        # hashes: artifact name -> current hash, as in manifest.json
+        return all(hashes.get(name) == h for name, h in self.inputs.items())
+
+    def read(self, name: str, start = 0, size = None) -> bytes:
+        section = self.sections[name]
+        offset = self.start + section["offset"] + start
+        return self.data[offset:offset + (size if size is not None else section["size"] - start)]
+
+    def words(self, length: int):
+        # The words of dictionary_eN.txt, or None if they aren't in the snapshot
+        name = f"dictionary_e{length}"
+        if name not in self.sections:
+            return None
+        return self.read(name, 0, self.sections[name]["words_size"]).decode("ascii").split("\n")
+
+    def postings(self, length: int):
+        # The bitsets of TemplateIndex for the words of dictionary_eN.txt, or None if they aren't in the snapshot
+        name = f"dictionary_e{length}"
+        if name not in self.sections:
+            return None
+        section = self.sections[name]
+        size = (section["words"] + 7) // 8
+        data = self.read(name, section["words_size"])
+        postings = []
+        offset = 0
+        for letters in section["letters"]:
+            postings.append({})
+            for char in letters:
+                postings[-1][char] = int.from_bytes(data[offset:offset + size], "little")
+                offset += size
+        return postings
+
+    def anagram_index(self, length: int):
+        # The anagram index of anagram_eN.json, into the words of the snapshot, or None if it isn't in the snapshot
+        name = f"anagram_e{length}"
+        return AnagramIndex(self.read(name)) if name in self.sections else None
+
+    def related_lookup(self):
+        # The expressions of related_e0.txt and their indexes, or None if they aren't in the snapshot
+        if "related_e0" not in self.sections:
+            return None
+        section = self.sections["related_e0"]
+        lines = self.read("related_e0", 0, section["lines_size"]).decode("utf8").split("\n")
+        tokens = self.read("related_e0", section["lines_size"], section["tokens_size"])
+        ngrams = self.read("related_e0", section["lines_size"] + section["tokens_size"])
+        return RelatedLookup(lines, PostingsIndex(tokens), PostingsIndex(ngrams))
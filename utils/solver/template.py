@@ -0,0 +1,48 @@
+import re
+
+# A character followed by an apostrophe is considered one character (see CrosswordSolver.js)
+TEMPLATE_CHARS = re.compile(r"(\?|[\u0590-\u05fe]'?| )")
+
+WILDCARD = None
+
+class IllegalTemplateError(ValueError):
+    def __init__(self, message, allow_spaces = None, allow_question_marks = None):
+        super().__init__(message)
+        self.allow_spaces = allow_spaces
+        self.allow_question_marks = allow_question_marks
+
+def tokenize(template: str, wordlists, allow_spaces = True, allow_question_marks = True) -> list:
+    # Splits the template into its characters, validating it like isLegalTemplate() does
+    tokens = []
+    end = 0
+    for match in TEMPLATE_CHARS.finditer(template):
+        char = match.group(1)
+        if match.start() != end or not (char in wordlists.translate_mapping
+                                        or (char == " " and allow_spaces)
+                                        or (char == "?" and allow_question_marks)):
+            break
+        tokens.append(char)
+        end = match.end()
+
+    if end != len(template) or not tokens:
+        raise IllegalTemplateError(f"Illegal template: '{template}'", allow_spaces, allow_question_marks)
+
+    return tokens
+
+def parse_template(template: str, wordlists, allow_spaces = True) -> list:
+    # Returns the allowed encoded characters for every position of the template,
+    # or WILDCARD for positions that accept any letter.
+    # Like the application, a letter which can have an apostrophe but doesn't have one in the
+    # template matches both versions, while an explicit apostrophe only matches that version.
+    positions = []
+    for char in tokenize(template, wordlists, allow_spaces):
+        if char == "?":
+            positions.append(WILDCARD)
+            continue
+
+        options = {wordlists.encode(char)}
+        if char in wordlists.apostrophe_mapping:
+            options.add(wordlists.encode(wordlists.apostrophe_mapping[char]))
+        positions.append(options)
+
+    return positions
@@ -0,0 +1,148 @@
+import json
+
+from pathlib import Path
+
+from .anagram_index import AnagramIndex
+from .bloom import BLOOM_NAME, BloomFilter
+from .dawg import DawgIndex
+from .fixed_width import FixedWidthIndex
+from .related_index import PostingsIndex, RelatedLookup
+from .shards import ShardLayout
+from .snapshot import SNAPSHOT_NAME, Snapshot
+
+WORDLISTS_DIR = Path(__file__).parent / ".." / ".." / "wordlists"
+MANIFEST_NAME = "manifest.json"
+
+# Mirrors the "allowSpaces" attribute of dictSources in CrosswordSolver.js
+ALLOW_SPACES = {
+    "encyclopedia": True,
+    "wikidict": True,
+    "hspell": False,
+    "wordnet": True,
+}
+
+class Wordlists:
+    # Read access to the word-lists created by utils/words/word_processor.py.
+    # Words are kept in their Latin encoding, the mappings are read from config.json
+    # just like the application does.
+
+    def __init__(self, path = WORDLISTS_DIR):
+        self.path = Path(path)
+        with open(self.path / "config.json", "r", encoding = "utf8") as f:
+            self.config = json.load(f)
+
+        self.translate_mapping = self.config["translate_mapping"]
+        self.final_form_mapping = self.config["final_form_mapping"]
+        self.list_source = self.config["list_source"]
+        # Binary formats which only the Python tools read, structured like list_source
+        self.binary_source = self.config.get("binary_source", {})
+
+        # Characters which can be followed by an apostrophe, mapped to the version with the apostrophe
+        self.apostrophe_mapping = {k[0]: k for k in self.translate_mapping if len(k) > 1}
+
+        self._artifact_hashes = None
+
+        self.decode_table = str.maketrans({**{v: k for k, v in self.translate_mapping.items()}, "_": " "})
+
+    def sources(self, category = "dictionary") -> list:
+        return list(self.list_source.get(category, {}))
+
+    def lengths(self, source: str, category = "dictionary") -> list:
+        db_types = self.list_source.get(category, {}).get(source, [])
+        return [length for length, db_type in enumerate(db_types) if db_type]
+
+    def encode(self, char: str) -> str:
+        # Encodes a single template character (a letter, optionally followed by an apostrophe)
+        if char == " ":
+            return "_"
+        return self.translate_mapping[char]
+
+    def decode(self, word: str) -> str:
+        return word.translate(self.decode_table)
+
+    def allow_spaces(self, source: str) -> bool:
+        return ALLOW_SPACES.get(source, True)
+
+    def read_words(self, name: str) -> list:
+        try:
+            with open(self.path / name, "r", encoding = "utf8") as f:
+                return f.read().splitlines()
+        except FileNotFoundError:
+            return []
+
+    def read_dictionary(self, source: str, length: int) -> list:
+        return self.read_words(f"{source}/dictionary_e{length}.txt")
+
+    def shard_layout(self, source: str, length: int):
+        # The shards of the bucket, or None if it wasn't sharded
+        boundaries = self.config.get("shards", {}).get("dictionary", {}).get(source, {}).get(str(length))
+        return ShardLayout(boundaries) if boundaries else None
+
+    def read_fixed_width(self, source: str, length: int):
+        # The memory-mapped bucket, or None if there is no fixed-width copy for this length
+        db_types = self.binary_source.get("dictionary", {}).get(source, [])
+        if length >= len(db_types) or db_types[length] != "bin":
+            return None
+        return FixedWidthIndex.load(self.path / source / f"dictionary_e{length}.bin", length)
+
+    def read_dawg(self, source: str, length: int):
+        # The DAWG of the bucket, or None if it wasn't built
+        path = self.path / source / f"dictionary_e{length}.dawg"
+        if length not in self.lengths(source, "dictionary") or not path.exists():
+            return None
+        return DawgIndex.load(path, self.translate_mapping.values())
+
+    def read_related(self, source: str) -> list:
+        return self.read_words(f"{source}/related_e0.txt")
+
+    def read_anagram_index(self, source: str, length: int):
+        # The binary anagram index, or None if there is none for this length
+        db_types = self.binary_source.get("anagram", {}).get(source, [])
+        if length >= len(db_types) or db_types[length] != "bin":
+            return None
+        return AnagramIndex.load(self.path / source / f"anagram_e{length}.bin")
+
+    def read_related_lookup(self, source: str):
+        # The indexed expressions, or None if there are no indexes for this source
+        db_types = self.binary_source.get("related", {}).get(source, [])
+        if not db_types or db_types[0] != "idx":
+            return None
+        return RelatedLookup(self.read_related(source),
+                             PostingsIndex.load(self.path / source / "related_e0.tokens.bin"),
+                             PostingsIndex.load(self.path / source / "related_e0.ngrams.bin"))
+
+    def read_bloom_filter(self, source: str):
+        # The Bloom filter of the words of the source, or None if it wasn't built
+        db_types = self.binary_source.get("bloom", {}).get(source, [])
+        if not db_types or db_types[0] != "bloom":
+            return None
+        return BloomFilter.load(self.path / source / BLOOM_NAME)
+
+    def artifact_hashes(self) -> dict:
+        # The content hash of every artifact, from the manifest of word_processor.py (empty if there is none)
+        if self._artifact_hashes is None:
+            try:
+                with open(self.path / MANIFEST_NAME, "r", encoding = "utf8") as f:
+                    self._artifact_hashes = {name: entry["hash"] for name, entry in json.load(f)["artifacts"].items()}
+            except FileNotFoundError:
+                self._artifact_hashes = {}
+        return self._artifact_hashes
+
+    def read_snapshot(self, source: str):
+        # The snapshot of the source, or None if there is none or the artifacts changed since it was built
+        db_types = self.binary_source.get("snapshot", {}).get(source, [])
+        if not db_types or db_types[0] != "snap":
+            return None
+        try:
+            snapshot = Snapshot.load(self.path / source / SNAPSHOT_NAME)
+        except (OSError, ValueError):
+            return None
+        return snapshot if snapshot.is_fresh(self.artifact_hashes()) else None
+
+    def read_anagrams(self, source: str, length: int) -> dict:
+        # Anagram signature -> encoded words
+        try:
+            with open(self.path / source / f"anagram_e{length}.json", "r", encoding = "utf8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
@@ -0,0 +1,79 @@
+import argparse
+import gzip
+import json
+import random
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+from anagram_index import build_anagram_index
+from word_processor import OUTPUT_DIR, read_words
+
+sys.path.insert(0, str(Path(__file__).parent / ".."))
+
+from solver import AnagramIndex
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare the binary anagram indexes with the JSON mappings")
+    parser.add_argument("-s", "--source", default = "hspell", help = "Source to compare (default: hspell)")
+    parser.add_argument("-n", "--lookups", type = int, default = 10000, help = "Number of lookups to time")
+    args = parser.parse_args()
+
+    source_path = OUTPUT_DIR / args.source
+    rng = random.Random(0)
+
+    print(f"{'Length':<8}{'JSON':>12}{'.gz':>10}{'Binary':>12}{'.gz':>10}{'JSON load':>12}{'Binary load':>13}"
+          f"{'JSON get':>11}{'Binary get':>12}")
+    totals = [0] * 8
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_paths = sorted(source_path.glob("anagram_e*.json"), key = lambda p: int(p.stem.replace("anagram_e", "")))
+        for json_path in json_paths:
+            length = int(json_path.stem.replace("anagram_e", ""))
+
+            # The binary index is built from the JSON, so that the comparison also works with older outputs
+            with open(json_path, "r", encoding = "utf8") as f:
+                anagram_mapping = json.load(f)
+            buckets = {len(word) for words in anagram_mapping.values() for word in words}
+            dictionaries = {bucket: read_words(source_path / f"dictionary_e{bucket}.txt") for bucket in buckets}
+            bin_path = Path(tmp_dir) / f"anagram_e{length}.bin"
+            bin_path.write_bytes(build_anagram_index(anagram_mapping, dictionaries))
+
+            json_data = json_path.read_bytes()
+            bin_data = bin_path.read_bytes()
+
+            start = time.perf_counter()
+            anagram_mapping = json.loads(json_data)
+            json_load = time.perf_counter() - start
+
+            start = time.perf_counter()
+            index = AnagramIndex(bin_data)
+            bin_load = time.perf_counter() - start
+
+            signatures = rng.choices(list(anagram_mapping), k = args.lookups)
+            start = time.perf_counter()
+            for signature in signatures:
+                anagram_mapping.get(signature)
+            json_get = (time.perf_counter() - start) / len(signatures)
+
+            start = time.perf_counter()
+            for signature in signatures:
+                index.lookup(signature)
+            bin_get = (time.perf_counter() - start) / len(signatures)
+
+            for signature in signatures[:100]:
+                words = [dictionaries[bucket][i] for bucket, i in index.lookup(signature)]
+                assert set(anagram_mapping[signature]) <= set(words), signature
+
+            row = [len(json_data), len(gzip.compress(json_data)), len(bin_data), len(gzip.compress(bin_data)),
+                   json_load, bin_load]
+            totals = [total + value for total, value in zip(totals, row + [0, 0])]
+            print(f"{length:<8}{row[0]:>12}{row[1]:>10}{row[2]:>12}{row[3]:>10}{json_load * 1000:>10.2f}ms"
+                  f"{bin_load * 1000:>11.2f}ms{json_get * 1e6:>9.2f}us{bin_get * 1e6:>10.2f}us")
+
+    print(f"{'Total':<8}{totals[0]:>12}{totals[1]:>10}{totals[2]:>12}{totals[3]:>10}{totals[4] * 1000:>10.2f}ms"
+          f"{totals[5] * 1000:>11.2f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import hashlib
+import struct
+
+from bisect import bisect_left
+from pathlib import Path
+
+#
+# Binary anagram index (anagram_eN.bin), an alternative to anagram_eN.json.
+# Instead of repeating the words, it points into the dictionary_eN.txt word store.
+#
+# All integers are little-endian:
+#   header:  magic "ANAG", version (uint16), number of buckets (uint16), number of words (uint32)
+#   buckets: the lengths of the dictionary_eN.txt files referenced by the index (uint16 each)
+#   hashes:  the 32-bit signature hash of every word, sorted (uint32 each)
+#   refs:    for every hash, the word it belongs to: the bucket slot in the top 8 bits and
+#            the line number in that bucket's dictionary_eN.txt in the low 24 bits (uint32 each)
+#
+# Anagrams share a signature, so they are adjacent and can be found with a binary search.
+# Words whose signatures collide are adjacent too, so readers must verify the signatures of the results.
+# The reader is solver/anagram_index.py.
+#
+
+MAGIC = b"ANAG"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+MAX_BUCKETS = 1 << 8
+MAX_INDEX = 1 << 24
+
+def signature_hash(signature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(signature.encode("utf8"), digest_size = 4).digest(), "little")
+
+def build_anagram_index(anagram_mapping: dict, dictionaries: dict) -> bytes:
+    # anagram_mapping: signature -> encoded words, dictionaries: bucket -> sorted words of dictionary_e<bucket>.txt
+    buckets = sorted(dictionaries)
+    if len(buckets) > MAX_BUCKETS:
+        raise ValueError(f"Too many buckets for an anagram index: {len(buckets)}")
+    slots = {bucket: slot for slot, bucket in enumerate(buckets)}
+
+    entries = []
+    for signature, words in anagram_mapping.items():
+        h = signature_hash(signature)
+        for word in words:
+            bucket = len(word)
+            index = bisect_left(dictionaries[bucket], word)
+            if index >= MAX_INDEX:
+                raise ValueError(f"Bucket {bucket} is too large for an anagram index")
+            entries.append((h, (slots[bucket] << 24) | index))
+    # A stable sort keeps the words of every signature in their original order
+    entries.sort(key = lambda entry: entry[0])
+
+    return b"".join([HEADER.pack(MAGIC, VERSION, len(buckets), len(entries)),
+                     struct.pack(f"<{len(buckets)}H", *buckets),
+                     struct.pack(f"<{len(entries)}I", *(h for h, _ in entries)),
+                     struct.pack(f"<{len(entries)}I", *(ref for _, ref in entries))])
+
+def write_anagram_index(path: Path, anagram_mapping: dict, dictionaries: dict):
+    with open(path, "wb") as o:
+        o.write(build_anagram_index(anagram_mapping, dictionaries))
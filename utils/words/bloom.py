@@ -0,0 +1,59 @@
+import hashlib
+import struct
+import time
+
+from pathlib import Path
+
+from executors import get_executor
+
+#
+# Bloom filter of the words of every bucket of a source (words.bloom, in the source directory), so that a membership
+# check for a word which isn't in the source rarely needs to read its bucket. A positive answer still has to be
+# confirmed against the bucket (e.g. its DAWG): about 1% of the other words are false positives.
+#
+# All integers are little-endian:
+#   header: magic "BLOM", version (uint16), number of hashes (uint16), number of bits (uint32), number of words (uint32)
+#   bits:   the bit array, bit i of the filter is bit i % 8 of byte i // 8
+#
+# The bits of an encoded word are (h1 + i * h2) % number of bits for i < number of hashes, where h1 is the low half
+# of the 8-byte blake2b digest of the word (UTF-8) and h2 the high half, with its lowest bit set.
+# The reader is solver/bloom.py.
+#
+
+MAGIC = b"BLOM"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+BLOOM_NAME = "words.bloom"
+BITS_PER_WORD = 10
+NUM_HASHES = 7
+
+def word_hashes(word: str) -> tuple:
+    digest = int.from_bytes(hashlib.blake2b(word.encode("utf8"), digest_size = 8).digest(), "little")
+    return digest & 0xFFFFFFFF, (digest >> 32) | 1
+
+def build_bloom_filter(words: list, bits_per_word = BITS_PER_WORD, num_hashes = NUM_HASHES) -> bytes:
+    num_bits = max(len(words) * bits_per_word, 64)
+    bits = bytearray((num_bits + 7) // 8)
+    for word in words:
+        h1, h2 = word_hashes(word)
+        for i in range(num_hashes):
+            bit = (h1 + i * h2) % num_bits
+            bits[bit >> 3] |= 1 << (bit & 7)
+    return HEADER.pack(MAGIC, VERSION, num_hashes, num_bits, len(words)) + bytes(bits)
+
+def write_bloom_filter(path: Path, names: list) -> tuple:
+    # path: the directory of a source, names: its dictionary_eN.txt files to add, as recorded in the manifest
+    # (a bucket which no longer has words may still be on disk until the manifest is pruned)
+    start = time.perf_counter()
+    words = []
+    for name in names:
+        with open(path / name, "r", encoding = "utf8") as f:
+            words += [word for word in f.read().split("\n") if word]
+
+    output_path = path / BLOOM_NAME
+    output_path.write_bytes(build_bloom_filter(words))
+    return output_path, len(words), time.perf_counter() - start
+
+def write_files(paths, names, max_workers = None):
+    with get_executor(max_workers) as executor:
+        yield from executor.map(write_bloom_filter, paths, names)
@@ -0,0 +1,106 @@
+#
+# Hebrew <-> Latin transliteration, niqqud stripping and anagram signatures.
+# Everything is done with precomputed translate tables, which run in C; the batch functions
+# join the words into a single string, so the per-word overhead is paid only once.
+#
+
+import re
+
+translate_mapping = {
+    "א": "a", "ב": "b", "ג": "g", "ג'": "j", "ד": "d", "ה": "h",
+    "ו": "v", "ז": "z", "ז'": "Z", "ח": "H", "ט": "T", "י": "y",
+    "כ": "c", "ך": "C", "ל": "l", "מ": "m", "ם": "M", "נ": "n",
+    "ן": "N", "ס": "s", "ע": "e", "פ": "p", "ף": "P", "צ": "w",
+    "צ'": "W", "ץ": "x", "ץ'": "X", "ק": "k", "ר": "r", "ש": "S",
+    "ת": "t", "ת'": "q"
+}
+
+final_form_mapping = {
+    translate_mapping["ך"]: translate_mapping["כ"],
+    translate_mapping["ם"]: translate_mapping["מ"],
+    translate_mapping["ן"]: translate_mapping["נ"],
+    translate_mapping["ף"]: translate_mapping["פ"],
+    translate_mapping["ץ"]: translate_mapping["צ"]
+}
+
+# The digraphs (letter + geresh) are replaced before the single letters
+DIGRAPHS = [(k, v) for k, v in translate_mapping.items() if len(k) > 1]
+ENCODE_TABLE = str.maketrans({k: v for k, v in translate_mapping.items() if len(k) == 1})
+DECODE_TABLE = str.maketrans({v: k for k, v in translate_mapping.items()})
+FINAL_FORM_TABLE = str.maketrans(final_form_mapping)
+NIQQUD_TABLE = dict.fromkeys(range(1456, 1480))
+NIQQUD_RE = re.compile("[\u05b0-\u05c7]")
+
+# All Hebrew letters have a single-byte code in ISO-8859-8, which allows using bytes.translate:
+# it is several times faster than str.translate, which looks up every character in a dict.
+# Batches that can't be represented in ISO-8859-8 (e.g. with niqqud) fall back to str.translate.
+SINGLE_BYTE_ENCODING = "iso8859_8"
+
+def _bytes_table(mapping: dict) -> bytes:
+    table = bytearray(range(256))
+    for k, v in mapping.items():
+        table[ord(k.encode(SINGLE_BYTE_ENCODING))] = ord(v.encode(SINGLE_BYTE_ENCODING))
+    return bytes(table)
+
+ENCODE_BYTES_TABLE = _bytes_table({k: v for k, v in translate_mapping.items() if len(k) == 1})
+DECODE_BYTES_TABLE = _bytes_table({v: k for k, v in translate_mapping.items() if len(k) == 1})
+
+def encode(word: str) -> str:
+    if "'" in word:
+        for digraph, replacement in DIGRAPHS:
+            word = word.replace(digraph, replacement)
+    return word.translate(ENCODE_TABLE)
+
+def decode(word: str) -> str:
+    return word.translate(DECODE_TABLE)
+
+def encode_words(words) -> list:
+    # Encodes a whole batch at once, words must not contain newlines
+    if not words:
+        return []
+    text = "\n".join(words)
+    if "'" in text:
+        for digraph, replacement in DIGRAPHS:
+            text = text.replace(digraph, replacement)
+    try:
+        text = text.encode(SINGLE_BYTE_ENCODING).translate(ENCODE_BYTES_TABLE).decode(SINGLE_BYTE_ENCODING)
+    except UnicodeEncodeError:
+        text = text.translate(ENCODE_TABLE)
+    return text.split("\n")
+
+def decode_words(words) -> list:
+    if not words:
+        return []
+    text = "\n".join(words)
+    try:
+        text = text.encode(SINGLE_BYTE_ENCODING).translate(DECODE_BYTES_TABLE).decode(SINGLE_BYTE_ENCODING)
+    except UnicodeEncodeError:
+        return text.translate(DECODE_TABLE).split("\n")
+    for digraph, replacement in DIGRAPHS:
+        if replacement in text:
+            text = text.replace(replacement, digraph)
+    return text.split("\n")
+
+def strip_niqqud(string: str) -> str:
+    # Most strings have no niqqud at all, and searching is much cheaper than translating
+    if not NIQQUD_RE.search(string):
+        return string
+    return string.translate(NIQQUD_TABLE)
+
+def letter_count(word: str) -> int:
+    # Number of letters, excluding spaces, apostrophes and the like
+    return len(word) if word.isalpha() else sum(c.isalpha() for c in word)
+
+def _signature(word: str) -> str:
+    if not word.isalpha():
+        word = "".join(c for c in word if c.isalpha())
+    return "".join(f"{c}{word.count(c)}" for c in sorted(set(word)))
+
+def anagram_signature(word: str) -> str:
+    # Letter counts of an encoded word, with final forms mapped to their regular forms: "abM" -> "a1b1m1"
+    return _signature(word.translate(FINAL_FORM_TABLE))
+
+def anagram_signatures(words) -> list:
+    if not words:
+        return []
+    return [_signature(word) for word in "\n".join(words).translate(FINAL_FORM_TABLE).split("\n")]
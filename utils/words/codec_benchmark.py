@@ -0,0 +1,77 @@
+import argparse
+import re
+import timeit
+
+from collections import Counter
+
+import codec
+
+from word_processor import OUTPUT_DIR
+
+#
+# The implementations that codec.py replaced, kept for comparison
+#
+
+TRANSLATE_CHARS = re.compile(r"([\u0590-\u05fe]'?)")
+
+def reference_translate(word: str) -> str:
+    return TRANSLATE_CHARS.sub(lambda m: codec.translate_mapping.get(m.group(1), m.group(1)), word)
+
+def reference_anagram_encoder(s: str) -> str:
+    s = s.translate(s.maketrans("".join(codec.final_form_mapping.keys()), "".join(codec.final_form_mapping.values())))
+    counter = Counter(s)
+    sorted_items = sorted(counter.items())
+
+    return "".join(f"{char}{count}" for char, count in sorted_items if char.isalpha())
+
+def reference_clean_length(encoding: str) -> int:
+    return sum(int(count) for count in re.split(r"[a-zA-Z]", encoding) if count)
+
+def reference_remove_niqqud(my_string):
+    return ''.join(['' if  1456 <= ord(c) <= 1479 else c for c in my_string])
+
+def load_words(source: str) -> list:
+    words = []
+    for txt_file in sorted((OUTPUT_DIR / source).glob("dictionary_e*.txt")):
+        with open(txt_file, "r", encoding = "utf8") as f:
+            words.extend(f.read().split("\n"))
+    return words
+
+def bench(name: str, reference, current, repeat: int):
+    reference_time = min(timeit.repeat(reference, number = 1, repeat = repeat))
+    current_time = min(timeit.repeat(current, number = 1, repeat = repeat))
+    print(f"{name:<25}{reference_time * 1000:>12.1f}ms{current_time * 1000:>12.1f}ms{reference_time / current_time:>9.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare the codec functions with the implementations they replaced")
+    parser.add_argument("-s", "--source", default = "hspell", help = "Source whose words are used (default: hspell)")
+    parser.add_argument("-r", "--repeat", type = int, default = 3, help = "Number of repetitions, the best one is reported")
+    args = parser.parse_args()
+
+    encoded = load_words(args.source)
+    hebrew = codec.decode_words(encoded)
+    # Wordnet and Wiktionary entries, some of which have niqqud
+    dotted = ["\u05b8".join(word) if i % 10 == 0 else word for i, word in enumerate(hebrew)]
+    signatures = codec.anagram_signatures(encoded)
+
+    assert codec.encode_words(hebrew) == [reference_translate(word) for word in hebrew]
+    assert signatures == [reference_anagram_encoder(word) for word in encoded]
+    assert [codec.strip_niqqud(word) for word in dotted] == [reference_remove_niqqud(word) for word in dotted]
+
+    print(f"{len(encoded)} words from {args.source}\n")
+    print(f"{'Function':<25}{'Reference':>14}{'Codec':>14}{'Speedup':>10}")
+    bench("encode (per word)", lambda: [reference_translate(word) for word in hebrew],
+                               lambda: [codec.encode(word) for word in hebrew], args.repeat)
+    bench("encode (batch)", lambda: [reference_translate(word) for word in hebrew],
+                            lambda: codec.encode_words(hebrew), args.repeat)
+    bench("anagram signature", lambda: [reference_anagram_encoder(word) for word in encoded],
+                               lambda: [codec.anagram_signature(word) for word in encoded], args.repeat)
+    bench("anagram signature (batch)", lambda: [reference_anagram_encoder(word) for word in encoded],
+                                       lambda: codec.anagram_signatures(encoded), args.repeat)
+    bench("letter count", lambda: [reference_clean_length(signature) for signature in signatures],
+                          lambda: [codec.letter_count(word) for word in encoded], args.repeat)
+    bench("strip niqqud", lambda: [reference_remove_niqqud(word) for word in dotted],
+                          lambda: [codec.strip_niqqud(word) for word in dotted], args.repeat)
+
+if __name__ == "__main__":
+    main()
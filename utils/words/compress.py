@@ -0,0 +1,39 @@
+import gzip
+import time
+
+from pathlib import Path
+
+from executors import get_executor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Precompressed siblings of every artifact, served by utils/server/local_server.py.
+# Brotli is optional (pip install brotli), gzip is always available.
+SUFFIXES = [".gz"] + ([".br"] if brotli is not None else [])
+
+def compress(data: bytes, suffix: str) -> bytes:
+    if suffix == ".gz":
+        # A fixed mtime keeps the output identical across builds
+        return gzip.compress(data, compresslevel = 9, mtime = 0)
+    if suffix == ".br":
+        return brotli.compress(data, quality = 11)
+    raise ValueError(f"Unknown compression: {suffix}")
+
+def compress_file(path: Path, suffixes = None) -> tuple:
+    start = time.perf_counter()
+    data = path.read_bytes()
+    output_paths = []
+    for suffix in suffixes or SUFFIXES:
+        output_path = path.with_name(path.name + suffix)
+        output_path.write_bytes(compress(data, suffix))
+        output_paths.append(output_path)
+    return path, output_paths, time.perf_counter() - start
+
+def compress_files(paths, max_workers = None):
+    with get_executor(max_workers) as executor:
+        # Largest files first so that a long compression doesn't end up last in the queue
+        paths = sorted(paths, key = lambda p: p.stat().st_size, reverse = True)
+        yield from executor.map(compress_file, paths)
@@ -0,0 +1,428 @@
+# Pure-Python port of the builders used by `dawgdic-build -g`:
+# https://code.google.com/archive/p/dawgdic/ (Copyright (c) 2009-2012, Susumu Yata, BSD license)
+#
+# The output is byte-compatible with dawgdic-build: a double-array dictionary
+# followed by a guide, which is exactly what modules/dawg/wrapper.js reads.
+
+import sys
+import time
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+BLOCK_SIZE = 256
+NUM_OF_UNFIXED_BLOCKS = 16
+
+OFFSET_MAX = 1 << 21
+IS_LEAF_BIT = 1 << 31
+HAS_LEAF_BIT = 1 << 8
+EXTENSION_BIT = 1 << 9
+
+UPPER_MASK = ~(OFFSET_MAX - 1) & 0xFFFFFFFF
+LOWER_MASK = 0xFF
+
+class DawgBuilder:
+    def __init__(self):
+        # Units of the (not yet minimized) trie, indexed by unit id
+        self._child = [0]
+        self._sibling = [0]
+        self._label = [0xFF]
+        self._is_state = [False]
+        self._has_sibling = [False]
+        self._unused_units = []
+        self._unfixed_units = [0]
+
+        # Transitions of the minimized DAWG
+        self._bases = [0]
+        self._labels = bytearray(1)
+        self._flags = bytearray(1)
+
+        self._states = {}
+
+    def insert(self, key: bytes, value: int = 0):
+        if not key:
+            raise ValueError("Empty keys are not supported")
+
+        length = len(key)
+        index = 0
+        key_pos = 0
+        while key_pos <= length:
+            child_index = self._child[index]
+            if not child_index:
+                break
+
+            key_label = key[key_pos] if key_pos < length else 0
+            if key_pos < length and key_label == 0:
+                raise ValueError(f"Key contains a null character: {key!r}")
+
+            unit_label = self._label[child_index]
+            if key_label < unit_label:
+                raise ValueError(f"Keys must be inserted in sorted order: {key!r}")
+            elif key_label > unit_label:
+                self._has_sibling[child_index] = True
+                self._fix_units(child_index)
+                break
+
+            index = child_index
+            key_pos += 1
+
+        while key_pos <= length:
+            key_label = key[key_pos] if key_pos < length else 0
+            child_index = self._allocate_unit()
+
+            if not self._child[index]:
+                self._is_state[child_index] = True
+            self._sibling[child_index] = self._child[index]
+            self._label[child_index] = key_label
+            self._child[index] = child_index
+            self._unfixed_units.append(child_index)
+
+            index = child_index
+            key_pos += 1
+
+        self._child[index] = value
+
+    def finish(self) -> "Dawg":
+        self._fix_units(0)
+        self._bases[0] = self._unit_base(0)
+        self._labels[0] = self._label[0]
+        return Dawg(self._bases, self._labels, self._flags)
+
+    def _allocate_unit(self) -> int:
+        if self._unused_units:
+            index = self._unused_units.pop()
+            self._child[index] = 0
+            self._sibling[index] = 0
+            self._label[index] = 0
+            self._is_state[index] = False
+            self._has_sibling[index] = False
+            return index
+
+        self._child.append(0)
+        self._sibling.append(0)
+        self._label.append(0)
+        self._is_state.append(False)
+        self._has_sibling.append(False)
+        return len(self._child) - 1
+
+    def _unit_base(self, index: int) -> int:
+        if self._label[index] == 0:
+            return ((self._child[index] << 1) | self._has_sibling[index]) & 0xFFFFFFFF
+        return ((self._child[index] << 2) | (self._is_state[index] << 1) | self._has_sibling[index]) & 0xFFFFFFFF
+
+    def _fix_units(self, index: int):
+        unfixed_units = self._unfixed_units
+        while unfixed_units[-1] != index:
+            unfixed_index = unfixed_units.pop()
+
+            siblings = []
+            i = unfixed_index
+            while i:
+                siblings.append(i)
+                i = self._sibling[i]
+
+            state = tuple((self._unit_base(i), self._label[i]) for i in siblings)
+            matched_index = self._states.get(state)
+            if matched_index is not None:
+                self._flags[matched_index] = 1
+            else:
+                # Siblings are linked in descending label order, transitions are stored ascending
+                matched_index = len(self._bases)
+                for base, label in reversed(state):
+                    self._bases.append(base)
+                    self._labels.append(label)
+                    self._flags.append(0)
+                self._states[state] = matched_index
+
+            self._unused_units.extend(siblings)
+            self._child[unfixed_units[-1]] = matched_index
+        unfixed_units.pop()
+
+class Dawg:
+    def __init__(self, bases, labels, flags):
+        self.bases = bases
+        self.labels = labels
+        self.flags = flags
+
+    def size(self) -> int:
+        return len(self.bases)
+
+    def child(self, index: int) -> int:
+        return self.bases[index] >> 2
+
+    def sibling(self, index: int) -> int:
+        return index + 1 if self.bases[index] & 1 else 0
+
+    def value(self, index: int) -> int:
+        return self.bases[index] >> 1
+
+    def is_leaf(self, index: int) -> bool:
+        return self.labels[index] == 0
+
+    def is_merging(self, index: int) -> bool:
+        return bool(self.flags[index])
+
+    def children(self, index: int):
+        child = self.child(index)
+        while child:
+            yield child
+            child = self.sibling(child)
+
+class DictionaryBuilder:
+    def __init__(self, dawg: Dawg):
+        self._dawg = dawg
+        self._units = array("I")
+        self._next = array("I")
+        self._prev = array("I")
+        self._is_fixed = bytearray()
+        self._is_used = bytearray()
+        self._link_table = {}
+        self._unfixed_index = 0
+        self._labels = []
+
+    def build(self) -> array:
+        self._reserve_unit(0)
+        self._is_used[0] = 1
+        self._set_offset(0, 1)
+        self._set_label(0, 0)
+
+        if self._dawg.size() > 1:
+            self._build_dictionary(0, 0)
+
+        self._fix_all_blocks()
+        return self._units
+
+    def _build_dictionary(self, dawg_index: int, dic_index: int):
+        dawg = self._dawg
+        # Iterative depth-first traversal, children are visited in label order
+        stack = [(dawg_index, dic_index)]
+        while stack:
+            dawg_index, dic_index = stack.pop()
+            if dawg.is_leaf(dawg_index):
+                continue
+
+            # Uses an existing offset if available
+            dawg_child_index = dawg.child(dawg_index)
+            if dawg.is_merging(dawg_child_index):
+                offset = self._link_table.get(dawg_child_index, 0)
+                if offset != 0:
+                    offset ^= dic_index
+                    if not (offset & UPPER_MASK) or not (offset & LOWER_MASK):
+                        if dawg.is_leaf(dawg_child_index):
+                            self._units[dic_index] |= HAS_LEAF_BIT
+                        self._set_offset(dic_index, offset)
+                        continue
+
+            offset = self._arrange_child_nodes(dawg_index, dic_index)
+
+            if dawg.is_merging(dawg_child_index):
+                self._link_table[dawg_child_index] = offset
+
+            stack.extend((child, offset ^ dawg.labels[child]) for child in reversed(list(dawg.children(dawg_index))))
+
+    def _arrange_child_nodes(self, dawg_index: int, dic_index: int) -> int:
+        dawg = self._dawg
+        children = list(dawg.children(dawg_index))
+        self._labels = [dawg.labels[child] for child in children]
+
+        offset = self._find_good_offset(dic_index)
+        self._set_offset(dic_index, dic_index ^ offset)
+
+        for dawg_child_index, label in zip(children, self._labels):
+            dic_child_index = offset ^ label
+            self._reserve_unit(dic_child_index)
+
+            if dawg.is_leaf(dawg_child_index):
+                self._units[dic_index] |= HAS_LEAF_BIT
+                self._units[dic_child_index] = dawg.value(dawg_child_index) | IS_LEAF_BIT
+            else:
+                self._set_label(dic_child_index, label)
+
+        self._is_used[offset] = 1
+        return offset
+
+    def _find_good_offset(self, index: int) -> int:
+        num_of_units = len(self._units)
+        if self._unfixed_index >= num_of_units:
+            return num_of_units | (index & 0xFF)
+
+        # Scans empty units
+        unfixed_index = self._unfixed_index
+        while True:
+            offset = unfixed_index ^ self._labels[0]
+            if self._is_good_offset(index, offset):
+                return offset
+            unfixed_index = self._next[unfixed_index]
+            if unfixed_index == self._unfixed_index:
+                break
+
+        return num_of_units | (index & 0xFF)
+
+    def _is_good_offset(self, index: int, offset: int) -> bool:
+        if self._is_used[offset]:
+            return False
+
+        relative_offset = index ^ offset
+        if (relative_offset & LOWER_MASK) and (relative_offset & UPPER_MASK):
+            return False
+
+        # Finds a collision
+        is_fixed = self._is_fixed
+        for label in self._labels[1:]:
+            if is_fixed[offset ^ label]:
+                return False
+
+        return True
+
+    def _reserve_unit(self, index: int):
+        if index >= len(self._units):
+            self._expand_dictionary()
+
+        # Removes an unused unit from a circular linked list
+        if index == self._unfixed_index:
+            self._unfixed_index = self._next[index]
+            if self._unfixed_index == index:
+                self._unfixed_index = len(self._units)
+
+        self._next[self._prev[index]] = self._next[index]
+        self._prev[self._next[index]] = self._prev[index]
+        self._is_fixed[index] = 1
+
+    def _expand_dictionary(self):
+        src_num_of_units = len(self._units)
+        src_num_of_blocks = src_num_of_units // BLOCK_SIZE
+
+        dest_num_of_units = src_num_of_units + BLOCK_SIZE
+        dest_num_of_blocks = src_num_of_blocks + 1
+
+        # Fixes an old block
+        if dest_num_of_blocks > NUM_OF_UNFIXED_BLOCKS:
+            self._fix_block(src_num_of_blocks - NUM_OF_UNFIXED_BLOCKS)
+
+        self._units.extend([0] * BLOCK_SIZE)
+        self._is_fixed.extend(bytes(BLOCK_SIZE))
+        self._is_used.extend(bytes(BLOCK_SIZE))
+
+        # Creates a circular linked list for a new block
+        self._next.extend(range(src_num_of_units + 1, dest_num_of_units + 1))
+        self._prev.append(0)
+        self._prev.extend(range(src_num_of_units, dest_num_of_units - 1))
+        self._prev[src_num_of_units] = dest_num_of_units - 1
+        self._next[dest_num_of_units - 1] = src_num_of_units
+
+        # Merges 2 circular linked lists
+        unfixed_index = self._unfixed_index
+        self._prev[src_num_of_units] = self._prev[unfixed_index]
+        self._next[dest_num_of_units - 1] = unfixed_index
+
+        self._next[self._prev[unfixed_index]] = src_num_of_units
+        self._prev[unfixed_index] = dest_num_of_units - 1
+
+    def _fix_all_blocks(self):
+        num_of_blocks = len(self._units) // BLOCK_SIZE
+        begin = max(0, num_of_blocks - NUM_OF_UNFIXED_BLOCKS)
+        for block_id in range(begin, num_of_blocks):
+            self._fix_block(block_id)
+
+    def _fix_block(self, block_id: int):
+        begin = block_id * BLOCK_SIZE
+        end = begin + BLOCK_SIZE
+
+        # Finds an unused offset
+        unused_offset_for_label = 0
+        for offset in range(begin, end):
+            if not self._is_used[offset]:
+                unused_offset_for_label = offset
+                break
+
+        # Labels of unused units are modified
+        for index in range(begin, end):
+            if not self._is_fixed[index]:
+                self._reserve_unit(index)
+                self._set_label(index, (index ^ unused_offset_for_label) & 0xFF)
+
+    def _set_label(self, index: int, label: int):
+        self._units[index] = (self._units[index] & ~0xFF & 0xFFFFFFFF) | label
+
+    def _set_offset(self, index: int, offset: int):
+        if offset >= (OFFSET_MAX << 8):
+            raise OverflowError("DAWG too large for dictionary offsets")
+        base = self._units[index] & (IS_LEAF_BIT | HAS_LEAF_BIT | 0xFF)
+        if offset < OFFSET_MAX:
+            base |= offset << 10
+        else:
+            base |= (offset << 2) | EXTENSION_BIT
+        self._units[index] = base & 0xFFFFFFFF
+
+def follow(units: array, label: int, index: int):
+    base = units[index]
+    next_index = index ^ ((base >> 10) << ((base & EXTENSION_BIT) >> 6)) & 0xFFFFFFFF ^ label
+    if units[next_index] & (IS_LEAF_BIT | 0xFF) != label:
+        return None
+    return next_index
+
+def build_guide(dawg: Dawg, units: array) -> bytearray:
+    guide = bytearray(len(units) * 2)
+    if dawg.size() <= 1:
+        return bytearray()
+
+    is_fixed = bytearray(len(units))
+    stack = [(0, 0)]
+    while stack:
+        dawg_index, dic_index = stack.pop()
+        if is_fixed[dic_index]:
+            continue
+        is_fixed[dic_index] = 1
+
+        # Finds the first non-terminal child
+        children = [child for child in dawg.children(dawg_index) if not dawg.is_leaf(child)]
+        if not children:
+            continue
+        guide[dic_index * 2] = dawg.labels[children[0]]
+
+        pending = []
+        for i, dawg_child_index in enumerate(children):
+            dic_child_index = follow(units, dawg.labels[dawg_child_index], dic_index)
+            if dic_child_index is None:
+                raise RuntimeError("Failed to build guide: dictionary is inconsistent")
+            if i + 1 < len(children):
+                guide[dic_child_index * 2 + 1] = dawg.labels[children[i + 1]]
+            pending.append((dawg_child_index, dic_child_index))
+        stack.extend(reversed(pending))
+
+    return guide
+
+def build_dawg(words) -> bytes:
+    builder = DawgBuilder()
+    for word in words:
+        builder.insert(word.encode("utf8"))
+    dawg = builder.finish()
+
+    units = DictionaryBuilder(dawg).build()
+    guide = build_guide(dawg, units)
+
+    if sys.byteorder != "little":
+        units.byteswap()
+
+    return b"".join([
+        len(units).to_bytes(4, "little"), units.tobytes(),
+        (len(guide) // 2).to_bytes(4, "little"), bytes(guide)
+    ])
+
+def encode_file(path: Path) -> tuple:
+    start = time.perf_counter()
+    with open(path, "r", encoding = "utf8") as f:
+        words = [line for line in f.read().split("\n") if line]
+
+    output_path = Path(path).with_suffix(".dawg")
+    with open(output_path, "wb") as o:
+        o.write(build_dawg(words))
+
+    return (output_path, time.perf_counter() - start, output_path.stat().st_size)
+
+def encode_files(paths, max_workers = None):
+    with ProcessPoolExecutor(max_workers = max_workers) as executor:
+        # Largest files first so that a long bucket doesn't end up last in the queue
+        paths = sorted(paths, key = lambda p: p.stat().st_size, reverse = True)
+        yield from executor.map(encode_file, paths)
@@ -0,0 +1,53 @@
+import argparse
+import sys
+
+from pathlib import Path
+
+from codec import decode_words
+from word_processor import OUTPUT_DIR
+
+def read_hebrew(path: Path) -> list:
+    # The Hebrew words sorted in Hebrew order, like the former dictionary_hN.txt files.
+    # Every Hebrew letter (and letter + geresh) is transliterated to a single distinct character
+    # and the parsers only allow Hebrew letters, geresh and spaces, so the transliteration is lossless.
+    with open(path, "r", encoding = "utf8") as f:
+        return sorted(decode_words(f.read().split("\n")))
+
+def bucket_path(source: str, length: int) -> Path:
+    return OUTPUT_DIR / source / f"dictionary_e{length}.txt"
+
+def compare_sizes():
+    # Size of the canonical store vs. the previous layout, which also stored a Hebrew copy of every bucket
+    print(f"{'Source':<15}{'Encoded':>15}{'Hebrew copy':>15}{'Saved':>10}")
+    total_encoded = total_hebrew = 0
+    for directory in sorted(path for path in OUTPUT_DIR.iterdir() if path.is_dir()):
+        encoded = hebrew = 0
+        for txt_file in directory.glob("dictionary_e*.txt"):
+            encoded += txt_file.stat().st_size
+            hebrew += len("\n".join(read_hebrew(txt_file)).encode("utf8"))
+        total_encoded += encoded
+        total_hebrew += hebrew
+        print(f"{directory.name:<15}{encoded:>15}{hebrew:>15}{hebrew / (encoded + hebrew):>10.1%}")
+    print(f"{'total':<15}{total_encoded:>15}{total_hebrew:>15}{total_hebrew / (total_encoded + total_hebrew):>10.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description = "Print the Hebrew view of a dictionary bucket")
+    parser.add_argument("source", nargs = "?", help = "Source name (e.g. hspell)")
+    parser.add_argument("length", nargs = "?", type = int, help = "Word length")
+    parser.add_argument("--compare", action = "store_true",
+                        help = "Compare the size of the canonical store with storing a Hebrew copy as well")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_sizes()
+        return
+
+    if args.source is None or args.length is None:
+        parser.error("source and length are required")
+
+    sys.stdout.reconfigure(encoding = "utf8")
+    sys.stdout.write("\n".join(read_hebrew(bucket_path(args.source, args.length))))
+    sys.stdout.write("\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+
+class SerialExecutor(Executor):
+    # Runs every task inline, so the serial and parallel code paths are the same
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+def get_executor(max_workers: int) -> Executor:
+    if max_workers == 1:
+        return SerialExecutor()
+    return ProcessPoolExecutor(max_workers = max_workers)
@@ -0,0 +1,88 @@
+import heapq
+import os
+import sys
+import tempfile
+
+MAX_FAN_IN = 128
+
+class ExternalSorter:
+    # Sorts an unbounded number of lines within a fixed memory budget (in bytes):
+    # whenever the buffer exceeds the budget it is sorted and spilled to a temporary file,
+    # and the sorted runs are lazily k-way merged when iterating the result.
+    # Lines must not contain newlines.
+
+    def __init__(self, memory_budget: int, tmp_dir = None):
+        self.memory_budget = memory_budget
+        self._tmp_dir = tempfile.TemporaryDirectory(prefix = "external_sort_", dir = tmp_dir)
+        self._runs = []
+        self._num_run_files = 0
+        self._buffer = []
+        self._buffer_size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._tmp_dir.cleanup()
+
+    def add(self, line: str):
+        self._buffer.append(line)
+        self._buffer_size += sys.getsizeof(line) + 8
+        if self._buffer_size >= self.memory_budget:
+            self._spill()
+
+    def sorted(self, unique = False):
+        if not self._runs:
+            # Everything fit within the budget, no need to touch the disk
+            self._buffer.sort()
+            lines = iter(self._buffer)
+        else:
+            self._spill()
+            while len(self._runs) > MAX_FAN_IN:
+                self._merge_runs(MAX_FAN_IN)
+            lines = self._iter_merged(self._runs)
+
+        if not unique:
+            yield from lines
+            return
+
+        previous = None
+        for line in lines:
+            if line != previous:
+                yield line
+                previous = line
+
+    def _write_run(self, lines) -> str:
+        path = os.path.join(self._tmp_dir.name, f"run_{self._num_run_files}.txt")
+        self._num_run_files += 1
+        with open(path, "w", encoding = "utf8", newline = "\n") as o:
+            for line in lines:
+                o.write(line)
+                o.write("\n")
+        return path
+
+    def _spill(self):
+        if not self._buffer:
+            return
+        self._buffer.sort()
+        self._runs.append(self._write_run(self._buffer))
+        self._buffer = []
+        self._buffer_size = 0
+
+    def _merge_runs(self, count: int):
+        runs, self._runs = self._runs[:count], self._runs[count:]
+        self._runs.append(self._write_run(self._iter_merged(runs)))
+        for path in runs:
+            os.remove(path)
+
+    @staticmethod
+    def _iter_merged(paths):
+        files = [open(path, "r", encoding = "utf8", newline = "\n") for path in paths]
+        try:
+            yield from heapq.merge(*((line[:-1] for line in f) for f in files))
+        finally:
+            for f in files:
+                f.close()
@@ -0,0 +1,34 @@
+import time
+
+from pathlib import Path
+
+from executors import get_executor
+
+#
+# Fixed-width copies of the dictionary buckets (dictionary_eN.bin), next to dictionary_eN.txt.
+# Every transliterated word of bucket N is exactly N ASCII characters long (one per letter, "_" for a space),
+# so the words are simply stored back to back without separators: word i is at bytes [i * N, (i + 1) * N).
+# There is no header, which lets readers map the file directly as an (words x N) array.
+# The reader is solver/fixed_width.py.
+#
+
+def encode_fixed_width(words: list, length: int) -> bytes:
+    for word in words:
+        if len(word) != length:
+            raise ValueError(f"Word of length {len(word)} in bucket {length}: {word}")
+    return "".join(words).encode("ascii")
+
+def write_fixed_width(path: Path) -> tuple:
+    # path: a dictionary_eN.txt file, the records are written next to it
+    start = time.perf_counter()
+    length = int(path.stem.replace("dictionary_e", ""))
+    with open(path, "r", encoding = "utf8") as f:
+        words = f.read().split("\n")
+
+    output_path = path.with_suffix(".bin")
+    output_path.write_bytes(encode_fixed_width([word for word in words if word], length))
+    return output_path, time.perf_counter() - start
+
+def write_files(paths, max_workers = None):
+    with get_executor(max_workers) as executor:
+        yield from executor.map(write_fixed_width, paths)
@@ -0,0 +1,174 @@
+import gzip
+import json
+import re
+import sys
+import time
+
+from pathlib import Path
+
+from manifest import Manifest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.insert(0, str(Path(__file__).parent / ".."))
+
+from solver import AnagramIndex, DawgIndex, FixedWidthIndex
+from solver.template import WILDCARD
+
+#
+# Cost model for the format of every word-list in config.json.
+# Every candidate (a format, served as is or precompressed) is measured for the bytes it takes to transfer
+# and the CPU time it takes to load and answer a first query the way the application does, e.g. a DAWG
+# is expanded with keys() before the regex runs. The cost of a candidate is its transfer time at the given
+# bandwidth plus its CPU time times cpu_weight (the measurements are taken in Python, the weight can account
+# for a slower client). The CPU figures are only proxies: they are wall-clock timings of the Python readers on the
+# build machine (e.g. DawgIndex.keys() rather than the application's DAWG decoder), which vary from run to run.
+# So that identical inputs give the same config.json, the format picked by size (like create_config() does without
+# measurements) is kept unless another format the application can read is cheaper by at least MIN_SAVING of its
+# cost and MIN_SAVING_MS.
+# Binary formats are measured as well, but only the Python tools read them for now.
+# Measurements are written to format_costs.json next to config.json, and reused while the files don't change.
+#
+
+COSTS_NAME = "format_costs.json"
+DEFAULT_BANDWIDTH = 10
+DEFAULT_CPU_WEIGHT = 1.0
+MAX_REPEATS = 3
+MAX_MEASURE_TIME = 0.2
+MIN_SAVING = 0.1
+MIN_SAVING_MS = 1.0
+
+CATEGORY_PATTERNS = {"dictionary": "*/dictionary_e*.txt", "related": "*/related_e*.txt", "anagram": "*/anagram_e*.json"}
+CANDIDATES = {"dictionary": ["txt", "dawg", "bin"], "related": ["txt", "dawg"], "anagram": ["json", "bin"]}
+CLIENT_FORMATS = {"dictionary": ["txt", "dawg"], "related": ["txt", "dawg"], "anagram": ["json"]}
+ENCODINGS = {".gz": gzip.decompress, ".br": brotli.decompress if brotli is not None else None}
+
+def first_query(category: str, sample: str):
+    # A query like the application's, for the words starting with the first letter of the sample word
+    if category == "related":
+        return re.compile(f"(?=.*_)(?=.*{re.escape(sample[:2])}).*")
+    return re.compile(f"{re.escape(sample[:1])}[a-zA-Z]{{{max(len(sample) - 1, 0)}}}")
+
+def load_and_query(category: str, db_type: str, data: bytes, sample: str):
+    if db_type == "txt":
+        text = data.decode("utf8")
+        return lambda: first_query(category, sample).findall(text)
+    if db_type == "dawg":
+        text = "\n".join(DawgIndex(data).keys())
+        return lambda: first_query(category, sample).findall(text)
+    if db_type == "json":
+        mapping = json.loads(data)
+        return lambda: mapping.get(next(iter(mapping), ""))
+    if db_type == "bin" and category == "anagram":
+        index = AnagramIndex(data)
+        return lambda: index.lookup(sample)
+    if db_type == "bin":
+        index = FixedWidthIndex(np.frombuffer(data, dtype = np.uint8), len(sample))
+        return lambda: index.match([{sample[0]}] + [WILDCARD] * (len(sample) - 1))
+    raise ValueError(f"Unknown DB type: {db_type}")
+
+def measure(path: Path, category: str, db_type: str, sample: str) -> dict:
+    data = path.read_bytes()
+    decompress = ENCODINGS.get(path.suffix)
+    best_load = best_query = float("inf")
+    spent = 0
+    for _ in range(MAX_REPEATS):
+        start = time.perf_counter()
+        query = load_and_query(category, db_type, decompress(data) if decompress else data, sample)
+        loaded = time.perf_counter()
+        query()
+        end = time.perf_counter()
+        best_load = min(best_load, loaded - start)
+        best_query = min(best_query, end - loaded)
+        spent += end - start
+        if spent > MAX_MEASURE_TIME:
+            break
+    return {"size": len(data), "load_ms": round(best_load * 1000, 3), "query_ms": round(best_query * 1000, 3)}
+
+def cost(measurement: dict, bandwidth: float, cpu_weight: float) -> float:
+    # Milliseconds, bandwidth in Mbit/s
+    transfer_ms = measurement["size"] * 8 / (bandwidth * 1e6) * 1000
+    return transfer_ms + cpu_weight * (measurement["load_ms"] + measurement["query_ms"])
+
+def size_based_format(category: str, candidates: dict):
+    # The format create_config() picks without measurements: the smaller uncompressed file, or JSON for anagrams
+    if category == "anagram":
+        return "json"
+    sizes = {key: candidate["size"] for key, candidate in candidates.items() if key in CLIENT_FORMATS[category]}
+    return min(sizes, key = lambda key: (sizes[key], key != "txt")) if sizes else None
+
+def read_costs(output_dir: Path) -> dict:
+    try:
+        with open(output_dir / COSTS_NAME, "r", encoding = "utf8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def select_formats(manifest: Manifest, output_dir: Path, bandwidth = DEFAULT_BANDWIDTH,
+                   cpu_weight = DEFAULT_CPU_WEIGHT) -> dict:
+    # Returns the chosen format of every word-list, e.g. {"hspell/dictionary_e5": "txt"}
+    print(f"Measuring word-list formats ({bandwidth} Mbit/s, CPU weight {cpu_weight})")
+    start = time.perf_counter()
+
+    previous = read_costs(output_dir).get("word_lists", {})
+    word_lists = {}
+    formats = {}
+    num_measured = 0
+    for category, pattern in CATEGORY_PATTERNS.items():
+        for name in manifest.current(pattern):
+            base = name.rsplit(".", 1)[0]
+            sample = ""
+            if category != "anagram":
+                with open(output_dir / name, "r", encoding = "utf8") as f:
+                    sample = f.readline().rstrip("\n")
+
+            candidates = {}
+            for db_type in CANDIDATES[category]:
+                for suffix in [""] + [suffix for suffix, decompress in ENCODINGS.items() if decompress is not None]:
+                    candidate_name = f"{base}.{db_type}{suffix}"
+                    if candidate_name not in manifest.artifacts or not (output_dir / candidate_name).exists():
+                        continue
+                    if db_type == "bin" and category == "dictionary" and np is None:
+                        continue
+
+                    artifact_hash = manifest.artifact_hash(candidate_name)
+                    measurement = previous.get(base, {}).get("candidates", {}).get(f"{db_type}{suffix}")
+                    if measurement is None or measurement.get("hash") != artifact_hash:
+                        measurement = {"hash": artifact_hash, **measure(output_dir / candidate_name, category, db_type, sample)}
+                        num_measured += 1
+                    candidates[f"{db_type}{suffix}"] = {**measurement,
+                                                        "cost_ms": round(cost(measurement, bandwidth, cpu_weight), 3)}
+
+            client_candidates = [key for key in candidates if key.split(".")[0] in CLIENT_FORMATS[category]]
+            if not client_candidates:
+                continue
+            format_costs = {}
+            for key in client_candidates:
+                db_type = key.split(".")[0]
+                format_costs[db_type] = min(format_costs.get(db_type, float("inf")), candidates[key]["cost_ms"])
+            cheapest = min(format_costs, key = format_costs.get)
+            default = size_based_format(category, candidates)
+            if default in format_costs:
+                margin = max(MIN_SAVING * format_costs[default], MIN_SAVING_MS)
+                if format_costs[cheapest] > format_costs[default] - margin:
+                    cheapest = default
+            formats[base] = cheapest
+            best = min((key for key in client_candidates if key.split(".")[0] == cheapest),
+                       key = lambda key: candidates[key]["cost_ms"])
+            word_lists[base] = {"format": formats[base], "best": best, "candidates": candidates}
+
+    content = json.dumps({"bandwidth_mbps": bandwidth, "cpu_weight": cpu_weight, "word_lists": word_lists},
+                         indent = 4, sort_keys = True)
+    with open(output_dir / COSTS_NAME, "w", encoding = "utf8") as o:
+        o.write(content)
+
+    print(f"Done measuring {num_measured} candidates in {time.perf_counter() - start:.2f}s")
+    return formats
@@ -0,0 +1,96 @@
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+import synthetic_corpus
+
+from pipeline_benchmark import copy_scripts, run_script
+
+#
+# Checks that an incremental build of the word-lists gives the same files as a clean one.
+# The pipeline runs on a synthetic corpus (synthetic_corpus.py) in a scratch directory, then some multi-word
+# entries of every source are added to the ignore list: their dictionary buckets change, but not the anagram groups
+# of the other words of these buckets, whose binary indexes still have to be rebuilt as they point into the buckets.
+# word_processor.py then runs again, once incrementally and once with --clean on a copy, and both trees are compared.
+# Formats are picked by size, as the measured costs vary from run to run.
+#
+
+IGNORED_PER_SOURCE = 3
+
+def ignore_words(words_dir: Path, seed: int) -> list:
+    # Appends multi-word entries of every source to the ignore list, returns them
+    rng = random.Random(seed)
+    words = []
+    for path in sorted(words_dir.glob("words_*.txt")):
+        with open(path, "r", encoding = "utf8") as f:
+            candidates = sorted({line.rstrip("\n") for line in f if "_" in line})
+        words += rng.sample(candidates, min(IGNORED_PER_SOURCE, len(candidates)))
+    with open(words_dir / "ignore_list.txt", "a", encoding = "utf8") as o:
+        o.write("".join(f"\n{word}" for word in words))
+    return words
+
+def compare_trees(first: Path, second: Path) -> list:
+    # The relative paths of the files which differ or only exist on one side
+    first_files = {path.relative_to(first).as_posix() for path in first.rglob("*") if path.is_file()}
+    second_files = {path.relative_to(second).as_posix() for path in second.rglob("*") if path.is_file()}
+    return sorted((first_files ^ second_files) |
+                  {name for name in first_files & second_files if (first / name).read_bytes() != (second / name).read_bytes()})
+
+def run_check(work_dir: Path, size: int, seed: int, workers: int, memory_budget = None) -> list:
+    incremental_dir = work_dir / "incremental"
+    words_dir = copy_scripts(incremental_dir)
+    log_path = work_dir / "pipeline.log"
+    synthetic_corpus.generate(words_dir, size, seed)
+
+    args = ["-w", str(workers), "--by-size"] + (["-m", str(memory_budget)] if memory_budget is not None else [])
+    run_script(words_dir, log_path, "parser.py", "-w", str(workers))
+    duration = run_script(words_dir, log_path, "word_processor.py", *args)
+    print(f"First build in {duration:.2f}s")
+
+    words = ignore_words(words_dir, seed)
+    print(f"Added {len(words)} words to the ignore list")
+    clean_dir = work_dir / "clean"
+    shutil.copytree(incremental_dir, clean_dir)
+
+    duration = run_script(words_dir, log_path, "word_processor.py", *args)
+    print(f"Incremental build in {duration:.2f}s")
+    duration = run_script(clean_dir / "utils" / "words", log_path, "word_processor.py", "--clean", *args)
+    print(f"Clean build in {duration:.2f}s")
+    return compare_trees(incremental_dir / "wordlists", clean_dir / "wordlists")
+
+def main():
+    parser = argparse.ArgumentParser(description = "Check that incremental builds of the word-lists match clean builds")
+    parser.add_argument("-n", "--size", type = int, default = 20000,
+                        help = "Number of entries of the largest synthetic source (default: 20000)")
+    parser.add_argument("--seed", type = int, default = 0, help = "Seed for the corpus and the ignored words")
+    parser.add_argument("-w", "--workers", type = int, default = 1,
+                        help = "Number of worker processes of parser.py and word_processor.py (default: 1)")
+    parser.add_argument("-m", "--memory-budget", type = int, default = None, metavar = "MB",
+                        help = "Pass --memory-budget to word_processor.py")
+    parser.add_argument("-d", "--work-dir", type = Path, default = None,
+                        help = "Directory to run in, which is kept for inspection (default: a temporary directory)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.work_dir is not None:
+        if args.work_dir.exists() and any(args.work_dir.iterdir()):
+            parser.error(f"{args.work_dir} is not empty")
+        args.work_dir.mkdir(parents = True, exist_ok = True)
+        differences = run_check(args.work_dir, args.size, args.seed, args.workers, args.memory_budget)
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            differences = run_check(Path(work_dir), args.size, args.seed, args.workers, args.memory_budget)
+
+    if differences:
+        print(f"{len(differences)} files differ between the incremental and the clean build:")
+        print("\n".join(f"  {name}" for name in differences))
+        sys.exit(1)
+    print(f"The incremental and the clean build are identical ({time.perf_counter() - start:.2f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import json
+import sys
+import time
+
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+#
+# Measurements of the pipeline (parser.py, word_processor.py), written as a JSON report:
+# wall time and throughput of every stage, and how many lines every filter rule rejected.
+# Peak RSS is only known over the lifetime of a process (and its children), so it is reported once for the process,
+# and for the stages which ran in a process of their own.
+#
+
+def peak_memory_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = (1 << 20) if sys.platform == "darwin" else (1 << 10)
+    return max(resource.getrusage(who).ru_maxrss for who in [resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN]) / scale
+
+class Rejections:
+    # Counts the lines rejected by every filter rule of the current process.
+    # Rather than printing every rejected line, they can be written to a file and/or only every Nth one printed.
+    def __init__(self):
+        self.counts = Counter()
+        self.accepted = 0
+        self.log = None
+        self.sample_every = 0
+
+    def configure(self, log_path = None, sample_every = 0):
+        self.close()
+        self.log = open(log_path, "w", encoding = "utf8") if log_path is not None else None
+        self.sample_every = sample_every
+
+    def reject(self, rule: str, line: str):
+        self.counts[rule] += 1
+        if self.log is not None:
+            self.log.write(f"{rule}\t{line}\n")
+        # The first rejected line is always printed when sampling, then every sample_every-th one
+        if self.sample_every and (sum(self.counts.values()) - 1) % self.sample_every == 0:
+            print(f"Skipping {line} ({rule})")
+
+    def count_accepted(self, lines):
+        for line in lines:
+            self.accepted += 1
+            yield line
+
+    def summary(self) -> dict:
+        return {"accepted": self.accepted, "rejected": sum(self.counts.values()), "rejected_by_rule": dict(self.counts)}
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+rejections = Rejections()
+
+class Report:
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.started = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str, unit = "lines"):
+        # The body sets record["count"] to the number of units it processed
+        record = {"name": name, "unit": unit, "count": 0}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.add(record, time.perf_counter() - start)
+
+    def add(self, record: dict, duration: float, memory = None):
+        # Also used for stages measured in another process, memory: the peak RSS of that process if it ran nothing else
+        record["wall_time_s"] = round(duration, 3)
+        if memory is not None:
+            record["process_peak_rss_mb"] = round(memory, 1)
+        record[f"{record['unit']}_per_sec"] = round(record["count"] / duration, 1) if duration > 0 else None
+        self.stages.append(record)
+
+    def write(self, path: Path):
+        memory = peak_memory_mb()
+        report = {
+            "tool": self.tool,
+            "started": self.started.isoformat(timespec = "seconds"),
+            "wall_time_s": round(time.perf_counter() - self.start, 3),
+            "process_peak_rss_mb": round(memory, 1) if memory is not None else None,
+            "stages": self.stages,
+        }
+        with open(path, "w", encoding = "utf8") as o:
+            o.write(json.dumps(report, indent = 4, ensure_ascii = False))
+        print(f"Wrote the report to {path}")
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import shutil
+
+from fnmatch import fnmatch
+from pathlib import Path
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 3
+
+def hash_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def hash_strings(*strings) -> str:
+    h = hashlib.sha256()
+    for s in strings:
+        h.update(s.encode("utf8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+class Manifest:
+    # Tracks the content hash of every generated artifact together with a hash of the inputs
+    # it was generated from, so that only artifacts whose inputs changed need to be regenerated.
+    # Artifact names are paths relative to the output directory.
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / MANIFEST_NAME
+        self.sources = {}
+        self.artifacts = {}
+        self._seen_sources = set()
+        self._seen_artifacts = set()
+        self._loaded = False
+
+        try:
+            with open(self.path, "r", encoding = "utf8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.sources = data["sources"]
+                self.artifacts = data["artifacts"]
+                self._loaded = True
+        except FileNotFoundError:
+            pass
+
+    def exists(self) -> bool:
+        # A manifest of an older version describes a different output layout, so it doesn't count
+        return self._loaded
+
+    def is_fresh(self, name: str, inputs: str) -> bool:
+        entry = self.artifacts.get(name)
+        if entry is None or entry["inputs"] != inputs:
+            return False
+        path = self.output_dir / name
+        if not path.exists() or hash_file(path) != entry["hash"]:
+            return False
+        self._seen_artifacts.add(name)
+        return True
+
+    def is_fresh_source(self, identifier: str, inputs: str) -> bool:
+        if self.sources.get(identifier) != inputs:
+            return False
+        names = [name for name in self.artifacts if name.startswith(f"{identifier}/")]
+        if not all(self.is_fresh(name, self.artifacts[name]["inputs"]) for name in names):
+            return False
+        self._seen_sources.add(identifier)
+        return True
+
+    def record(self, name: str, inputs: str):
+        self.artifacts[name] = {"inputs": inputs, "hash": hash_file(self.output_dir / name)}
+        self._seen_artifacts.add(name)
+
+    def record_source(self, identifier: str, inputs: str):
+        self.sources[identifier] = inputs
+        self._seen_sources.add(identifier)
+
+    def artifact_hash(self, name: str) -> str:
+        return self.artifacts[name]["hash"]
+
+    def dependent_inputs(self, inputs: str, dependencies) -> str:
+        # The inputs of an artifact which is also built from other artifacts (e.g. an index into the dictionary files):
+        # their content hashes are part of its inputs, so that it is rebuilt whenever one of them changes.
+        # The dependencies have to be recorded, or found fresh, first.
+        return hash_strings(inputs, *(f"{name}:{self.artifact_hash(name)}" for name in sorted(dependencies)))
+
+    def current(self, pattern: str) -> list:
+        return sorted(name for name in self._seen_artifacts if fnmatch(name, pattern))
+
+    def discard(self, pattern: str):
+        # Marks the matching artifacts as no longer produced, so that prune() removes them
+        self._seen_artifacts = {name for name in self._seen_artifacts if not fnmatch(name, pattern)}
+
+    def prune(self):
+        # Removes artifacts (and whole sources) that were not produced or verified during this run
+        for identifier in set(self.sources) - self._seen_sources:
+            shutil.rmtree(self.output_dir / identifier, ignore_errors = True)
+            del self.sources[identifier]
+
+        for name in set(self.artifacts) - self._seen_artifacts:
+            (self.output_dir / name).unlink(missing_ok = True)
+            del self.artifacts[name]
+
+    def save(self):
+        with open(self.path, "w", encoding = "utf8") as o:
+            o.write(json.dumps({"version": MANIFEST_VERSION, "sources": self.sources, "artifacts": self.artifacts},
+                               indent = 4, sort_keys = True))
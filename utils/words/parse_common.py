@@ -1,4 +1,11 @@
+import bz2
+import gzip
+import io
 import re
+import tarfile
+import xml.etree.ElementTree as ET
+
+from contextlib import contextmanager
 from pathlib import Path
 
 EXCLUDE_CHARS_BASE = "([^א-ת'{}]|(?<![גזצתץ])')"
@@ -19,5 +26,63 @@ def has_excluded_characters(string, allow_spaces = False):
     else:
         return EXCLUDE_CHARS_DISALLOW_SPACES.search(string)
 
-def remove_niqqud_from_string(my_string):
-    return ''.join(['' if  1456 <= ord(c) <= 1479 else c for c in my_string])
+def rejection_reason(word, allow_spaces = False, reject_short_apostrophe = False):
+    # The filter rule which rejects the word, or None if it is accepted
+    if has_excluded_characters(word, allow_spaces):
+        return "excluded_characters"
+    if len(word) == 1 or (reject_short_apostrophe and len(word) == 2 and word[-1] == "'"):
+        return "too_short"
+    if is_ignored(word):
+        return "ignore_list"
+    return None
+
+def find_input(paths):
+    for path in paths:
+        if path.exists():
+            return path
+    raise FileNotFoundError(f"Can't find any of: {', '.join(str(path) for path in paths)}")
+
+@contextmanager
+def open_input(path, member = None, text = False):
+    # Streams a raw input, decompressing .gz, .bz2 and tar archives on the fly.
+    # For archives, the first file whose name ends with `member` is opened.
+    if tarfile.is_tarfile(path):
+        with tarfile.open(path, "r|*") as tar:
+            for info in tar:
+                if info.isfile() and (member is None or info.name.endswith(member)):
+                    f = tar.extractfile(info)
+                    break
+            else:
+                raise FileNotFoundError(f"Can't find {member} in {path}")
+            yield io.TextIOWrapper(f, encoding = "utf8") if text else f
+        return
+
+    if path.suffix == ".gz":
+        f = gzip.open(path, "rb")
+    elif path.suffix == ".bz2":
+        f = bz2.open(path, "rb")
+    else:
+        f = open(path, "rb")
+
+    with f:
+        yield io.TextIOWrapper(f, encoding = "utf8") if text else f
+
+def iterparse_elements(f, tags):
+    # Yields (tag, text) for elements with the given (namespace-less) tags.
+    # Elements are discarded as soon as their top-level ancestor is closed, so memory
+    # stays bounded regardless of the size of the document.
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(f, events = ("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+
+        depth -= 1
+        tag = elem.tag.rsplit("}", 1)[-1]
+        if tag in tags:
+            yield tag, elem.text
+        if depth == 1:
+            root.clear()
@@ -1,24 +1,24 @@
 from pathlib import Path
+from instrumentation import rejections
 from parse_common import *
 
 # Source: https://github.com/LibreOffice/dictionaries/blob/master/he_IL/he_IL.dic
 
-INPUT_PATH = Path(__file__).parent / "he_IL.dic" 
+INPUT_PATHS = [Path(__file__).parent / "he_IL.dic.gz", Path(__file__).parent / "he_IL.dic"]
 
 def extract_words():
-    res = set()
     print("Extracting words for Hspell")
-    with open(INPUT_PATH, "r", encoding = "utf8") as f:
+    with open_input(find_input(INPUT_PATHS), text = True) as f:
         for line in f:
             if "/" not in line:
-                print(f"Skipping {line.rstrip()}")
+                rejections.reject("no_affix_flags", line.rstrip())
                 continue
             line = line.rstrip().split("/")[0]
-            if has_excluded_characters(line) or len(line) == 1  or is_ignored(line):
-                print(f"Skipping {line}")
+            reason = rejection_reason(line)
+            if reason is not None:
+                rejections.reject(reason, line)
                 continue
-            res.add(line)
-    return res
+            yield line
 
 
 LICENSE = """
@@ -1,92 +1,132 @@
+import time
+
+from collections import deque
 from pathlib import Path
+from codec import strip_niqqud
+from instrumentation import rejections
 from parse_common import *
-import xml.etree.ElementTree as ET
+from executors import get_executor
 
 # Source 1: https://dumps.wikimedia.org/hewiktionary/latest/hewiktionary-latest-all-titles-in-ns0.gz
 
-INPUT_PATH1 = Path(__file__).parent / "hewiktionary-latest-all-titles-in-ns0.txt" 
+INPUT_PATHS1 = [Path(__file__).parent / "hewiktionary-latest-all-titles-in-ns0.gz",
+                Path(__file__).parent / "hewiktionary-latest-all-titles-in-ns0.txt"]
 
 # Source 2: https://dumps.wikimedia.org/other/mediawiki_content_current/hewiktionary/2026-02-01/xml/bzip2/hewiktionary-2026-02-01-p2p64150.xml.bz2
 
-INPUT_PATH2 = Path(__file__).parent / "hewiktionary-2026-02-01-p2p64150.xml"
+INPUT_PATHS2 = [Path(__file__).parent / "hewiktionary-2026-02-01-p2p64150.xml.bz2",
+                Path(__file__).parent / "hewiktionary-2026-02-01-p2p64150.xml"]
 
-def extract_words():
-    res = set()
-    with open(INPUT_PATH1, "r", encoding = "utf8") as f:
-        for line in f:
-            line = line.rstrip()
-            if  (has_excluded_characters(line, allow_spaces=True)) or (len(line) == 1) or (len(line) == 2 and line[-1] == "'") or is_ignored(line):
-                print(f"Skipping {line}")
-                continue
-            res.add(line)
+SECTION_RE = re.compile(r"===צירופים===\s*(.*?)(?:\n===|\Z)", re.DOTALL)
+TEMPLATE_RE = re.compile(r"\{\{.*?\}\}", re.DOTALL)
+PAREN_RE = re.compile(r"\([^)]*\)")
+WIKILINK_RE = re.compile(r"\[\[(.*?)\]\]")
+
+BIDI_RE = re.compile(r"[\u200E\u200F\u202A-\u202E]")
 
-    SECTION_RE = re.compile(r"===צירופים===\s*(.*?)(?:\n===|\Z)", re.DOTALL)
-    TEMPLATE_RE = re.compile(r"\{\{.*?\}\}", re.DOTALL)
-    PAREN_RE = re.compile(r"\([^)]*\)")
-    WIKILINK_RE = re.compile(r"\[\[(.*?)\]\]")
-    
-    BIDI_RE = re.compile(r"[\u200E\u200F\u202A-\u202E]")
+BATCH_SIZE = 500
+MAX_PENDING_BATCHES = 64
 
+def iter_page_batches(path, batch_size = BATCH_SIZE):
+    batch = []
+    with open_input(path) as f:
+        for tag, text in iterparse_elements(f, {"text"}):
+            if not text:
+                continue
+            batch.append(text)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def extract_phrases(texts):
     phrases = set()
+    for text in texts:
+        text = text.replace("&quot;", '"')
+        for section in SECTION_RE.findall(text):
 
-    for event, elem in ET.iterparse(INPUT_PATH2, events=("end",)):
-        if elem.tag.endswith("text") and elem.text:
-            text = elem.text.replace("&quot;", '"')
-            for section in SECTION_RE.findall(text):
+            for line in section.splitlines():
+                line = line.strip()
 
-                for line in section.splitlines():
-                    line = line.strip()
+                if not line.startswith("*"):
+                    continue
 
-                    if not line.startswith("*"):
-                        continue
+                line = line.lstrip("*").strip()
 
-                    line = line.lstrip("*").strip()
+                # remove templates {{ ... }}
+                line = TEMPLATE_RE.sub("", line)
 
-                    # remove templates {{ ... }}
-                    line = TEMPLATE_RE.sub("", line)
+                # remove parentheses
+                line = PAREN_RE.sub("", line)
 
-                    # remove parentheses
-                    line = PAREN_RE.sub("", line)
+                # replace hyphens with spaces
+                line = re.sub(r"[-־–—]", " ", line)
 
-                    # replace hyphens with spaces
-                    line = re.sub(r"[-־–—]", " ", line)
+                links = WIKILINK_RE.findall(line)
 
-                    links = WIKILINK_RE.findall(line)
+                extracted = []
 
-                    extracted = []
+                if links:
+                    for w in links:
+                        w = w.split("|")[-1].strip()
+                        extracted.append(w)
+                else:
+                    extracted.append(line)
 
-                    if links:
-                        for w in links:
-                            w = w.split("|")[-1].strip()
-                            extracted.append(w)
-                    else:
-                        extracted.append(line)
+                for phrase in extracted:
 
-                    for phrase in extracted:
+                    phrase = strip_niqqud(phrase)
 
-                        phrase = remove_niqqud_from_string(phrase)
+                    # remove bidi control characters
+                    phrase = BIDI_RE.sub("", phrase)
 
-                        # remove bidi control characters
-                        phrase = BIDI_RE.sub("", phrase)
+                    # normalize whitespace
+                    phrase = re.sub(r"\s+", " ", phrase).strip()
 
-                        # normalize whitespace
-                        phrase = re.sub(r"\s+", " ", phrase).strip()
+                    if not phrase:
+                        continue
 
-                        if not phrase:
-                            continue
+                    phrases.add(phrase)
+    return phrases
 
-                        phrases.add(phrase)
+def extract_words(max_workers = 1):
+    with open_input(find_input(INPUT_PATHS1), text = True) as f:
+        for line in f:
+            line = line.rstrip()
+            reason = rejection_reason(line, allow_spaces = True, reject_short_apostrophe = True)
+            if reason is not None:
+                rejections.reject(reason, line)
+                continue
+            yield line
 
-        elem.clear()
+    phrases = set()
+    num_pages = 0
+    start = time.perf_counter()
+
+    with get_executor(max_workers) as executor:
+        pending = deque()
+        for batch in iter_page_batches(find_input(INPUT_PATHS2)):
+            num_pages += len(batch)
+            pending.append(executor.submit(extract_phrases, batch))
+            # Bounds the number of batches held in memory
+            while len(pending) > MAX_PENDING_BATCHES:
+                phrases.update(pending.popleft().result())
+        while pending:
+            phrases.update(pending.popleft().result())
+
+    duration = time.perf_counter() - start
+    print(f"Extracted {len(phrases)} phrases from {num_pages} pages in {duration:.2f}s "
+          f"({num_pages / max(duration, 1e-9):.0f} pages/sec)")
 
     for line in phrases:
         line = line.rstrip()
         line = line.replace(" ", "_")
-        if  (has_excluded_characters(line, allow_spaces=True)) or (len(line) == 1) or (len(line) == 2 and line[-1] == "'") or is_ignored(line):
-            print(f"Skipping {line}")
+        reason = rejection_reason(line, allow_spaces = True, reject_short_apostrophe = True)
+        if reason is not None:
+            rejections.reject(reason, line)
             continue
-        res.add(line)
-    return res
+        yield line
 
 LICENSE = """
 THE WORK (AS DEFINED BELOW) IS PROVIDED UNDER THE TERMS OF THIS CREATIVE COMMONS PUBLIC LICENSE ("CCPL" OR "LICENSE"). THE WORK IS PROTECTED BY COPYRIGHT AND/OR OTHER APPLICABLE LAW. ANY USE OF THE WORK OTHER THAN AS AUTHORIZED UNDER THIS LICENSE OR COPYRIGHT LAW IS PROHIBITED.
@@ -1,20 +1,21 @@
 from pathlib import Path
+from instrumentation import rejections
 from parse_common import *
 
 # Source: https://dumps.wikimedia.org/hewiki/latest/hewiki-latest-all-titles-in-ns0.gz
 
-INPUT_PATH = Path(__file__).parent / "hewiki-latest-all-titles-in-ns0.txt" 
+INPUT_PATHS = [Path(__file__).parent / "hewiki-latest-all-titles-in-ns0.gz",
+               Path(__file__).parent / "hewiki-latest-all-titles-in-ns0.txt"]
 
 def extract_words():
-    res = set()
-    with open(INPUT_PATH, "r", encoding = "utf8") as f:
+    with open_input(find_input(INPUT_PATHS), text = True) as f:
         for line in f:
             line = line.rstrip()
-            if  (has_excluded_characters(line, allow_spaces = True)) or (len(line) == 1) or (len(line) == 2 and line[-1] == "'") or is_ignored(line):
-                print(f"Skipping {line}")
+            reason = rejection_reason(line, allow_spaces = True, reject_short_apostrophe = True)
+            if reason is not None:
+                rejections.reject(reason, line)
                 continue
-            res.add(line)
-    return res
+            yield line
 
 LICENSE = """
 THE WORK (AS DEFINED BELOW) IS PROVIDED UNDER THE TERMS OF THIS CREATIVE COMMONS PUBLIC LICENSE ("CCPL" OR "LICENSE"). THE WORK IS PROTECTED BY COPYRIGHT AND/OR OTHER APPLICABLE LAW. ANY USE OF THE WORK OTHER THAN AS AUTHORIZED UNDER THIS LICENSE OR COPYRIGHT LAW IS PROHIBITED.
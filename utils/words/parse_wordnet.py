@@ -1,26 +1,27 @@
-import xml.etree.ElementTree as ET
 from pathlib import Path
+from codec import strip_niqqud
+from instrumentation import rejections
 from parse_common import *
 
 # Source: http://cl.haifa.ac.il/projects/mwn/HWN.tar.gz
 
-INPUT_PATH = Path(__file__).parent / "hebrew_synonyms.xml" 
+INPUT_PATHS = [Path(__file__).parent / "HWN.tar.gz", Path(__file__).parent / "hebrew_synonyms.xml"]
+INPUT_MEMBER = "hebrew_synonyms.xml"
 
 def extract_words():
-    res = set()
-    with open(INPUT_PATH, "r", encoding = "utf8") as f:
-        root = ET.fromstring(f.read())
-        for name in ["lemma", "undotted", "dotted_without_dots"]:
-            for node in root.findall(f'.//{name}'):
-                word = remove_niqqud_from_string(node.text)
-                word = word.strip("\n!")
-                word = word.replace(" ", "_")
-                word = word.replace("-", "_")
-                if  (has_excluded_characters(word, allow_spaces=True)) or is_ignored(word) or (len(word) == 1):
-                    print(f"Skipping {word}")
-                    continue
-                res.add(word)
-    return res
+    with open_input(find_input(INPUT_PATHS), member = INPUT_MEMBER) as f:
+        for name, text in iterparse_elements(f, {"lemma", "undotted", "dotted_without_dots"}):
+            if text is None:
+                continue
+            word = strip_niqqud(text)
+            word = word.strip("\n!")
+            word = word.replace(" ", "_")
+            word = word.replace("-", "_")
+            reason = rejection_reason(word, allow_spaces = True)
+            if reason is not None:
+                rejections.reject(reason, word)
+                continue
+            yield word
 
 LICENSE = """
 Copyright: 2007 Noam Ordan and Shuly Wintner.
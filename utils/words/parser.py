@@ -1,5 +1,14 @@
+import argparse
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
+from external_sort import ExternalSorter
+from instrumentation import Report, peak_memory_mb, rejections
+
 import parse_hspell
 import parse_wikidict
 import parse_wikipedia
@@ -7,12 +16,43 @@ import parse_wordnet
 
 BASE_PATH = Path(__file__).parent
 
-def generate_general_terms():
-    words = set()
-    words.update(parse_wikipedia.extract_words())
-
-    with open(BASE_PATH / "words_encyclopedia.txt", "w", encoding="utf8") as o:
-        o.write("\n".join(words))
+def unique_words(words, memory_budget = None):
+    # Drops duplicates, keeping the first occurrence of every word.
+    # With a memory budget (in bytes) the words are deduplicated by an external sort instead,
+    # so the output is sorted rather than in order of appearance.
+    if memory_budget is None:
+        seen = set()
+        for word in words:
+            if word not in seen:
+                seen.add(word)
+                yield word
+        return
+
+    with ExternalSorter(memory_budget) as sorter:
+        for word in words:
+            sorter.add(word)
+        yield from sorter.sorted(unique = True)
+
+def write_words(path, words, memory_budget = None):
+    # Streams the words to the output file, dropping duplicates.
+    # The previous file is only replaced once all words were written successfully.
+    num_words = 0
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf8") as o:
+            for word in unique_words(words, memory_budget):
+                if num_words > 0:
+                    o.write("\n")
+                o.write(word)
+                num_words += 1
+    except BaseException:
+        tmp_path.unlink(missing_ok = True)
+        raise
+    os.replace(tmp_path, path)
+    return num_words
+
+def generate_general_terms(memory_budget = None):
+    num_words = write_words(BASE_PATH / "words_encyclopedia.txt", rejections.count_accepted(parse_wikipedia.extract_words()), memory_budget)
     with open(BASE_PATH / "license_encyclopedia.txt", "w", encoding="utf8") as o:
         o.write("The terms from this dictionary were retrieved from the following open-source repositories:\n")
         o.write(" - Wikipedia\n")
@@ -21,12 +61,10 @@ def generate_general_terms():
         o.write(parse_wikidict.LICENSE)
         o.write(f"\n\n{'=' * 80}\n\n")
 
-def generate_wikidict():
-    words = set()
-    words.update(parse_wikidict.extract_words())
+    return num_words
 
-    with open(BASE_PATH / "words_wikidict.txt", "w", encoding="utf8") as o:
-        o.write("\n".join(words))
+def generate_wikidict(max_workers = 1, memory_budget = None):
+    num_words = write_words(BASE_PATH / "words_wikidict.txt", rejections.count_accepted(parse_wikidict.extract_words(max_workers)), memory_budget)
 
     with open(BASE_PATH / "license_wikidict.txt", "w", encoding="utf8") as o:
         o.write("The words from this dictionary were retrieved from the following open-source dictionaries:\n")
@@ -36,12 +74,10 @@ def generate_wikidict():
         o.write(parse_wikidict.LICENSE)
         o.write(f"\n\n{'=' * 80}\n\n")
 
-def generate_wordnet():
-    words = set()
-    words.update(parse_wordnet.extract_words())
+    return num_words
 
-    with open(BASE_PATH / "words_wordnet.txt", "w", encoding="utf8") as o:
-        o.write("\n".join(words))
+def generate_wordnet(memory_budget = None):
+    num_words = write_words(BASE_PATH / "words_wordnet.txt", rejections.count_accepted(parse_wordnet.extract_words()), memory_budget)
 
     with open(BASE_PATH / "license_wordnet.txt", "w", encoding="utf8") as o:
         o.write("The words from this dictionary were retrieved from the following open-source dictionaries:\n")
@@ -51,23 +87,81 @@ def generate_wordnet():
         o.write(parse_wordnet.LICENSE)
         o.write(f"\n\n{'=' * 80}\n\n")
 
+    return num_words
 
-def generate_spellcheck_words():
-    words = set()
-    words.update(parse_hspell.extract_words())
-
-    with open(BASE_PATH / "words_hspell.txt", "w", encoding="utf8") as o:
-        o.write("\n".join(words))
+def generate_spellcheck_words(memory_budget = None):
+    num_words = write_words(BASE_PATH / "words_hspell.txt", rejections.count_accepted(parse_hspell.extract_words()), memory_budget)
 
     with open(BASE_PATH / "license_hspell.txt", "w", encoding="utf8") as o:
         o.write(parse_hspell.LICENSE)
 
+    return num_words
+
+def run_generator(generator, rejections_path = None, sample_rejections = 0):
+    rejections.configure(rejections_path, sample_rejections)
+    start = time.perf_counter()
+    try:
+        num_words = generator()
+    finally:
+        rejections.close()
+    return num_words, rejections.summary(), time.perf_counter() - start, peak_memory_mb()
 
 def main():
-    generate_wikidict()
-    # generate_wordnet()
-    # generate_spellcheck_words()
-    # generate_general_terms()
+    parser = argparse.ArgumentParser(description = "Parse the raw word-lists into a clean word-list per source")
+    parser.add_argument("sources", nargs = "*",
+                        help = "Sources to generate (default: all of them)")
+    parser.add_argument("-w", "--workers", type = int, default = os.cpu_count(),
+                        help = "Number of worker processes to use within a source (1 processes it serially)")
+    parser.add_argument("-m", "--memory-budget", type = int, default = None, metavar = "MB",
+                        help = "Deduplicate the words on disk using at most roughly this much memory (in MB) per source; "
+                               "the resulting word lists are sorted")
+    parser.add_argument("-r", "--report", type = Path, default = BASE_PATH / "report_parser.json",
+                        help = "Where to write the JSON report of timings, memory and rejected lines")
+    parser.add_argument("--rejections", type = Path, default = None, metavar = "DIR",
+                        help = "Write the rejected lines of every source, with the rule which rejected them, "
+                               "to rejected_<source>.txt in this directory")
+    parser.add_argument("--sample-rejections", type = int, default = 0, metavar = "N",
+                        help = "Print every Nth rejected line (default: none)")
+    args = parser.parse_args()
+
+    memory_budget = args.memory_budget * 1024 * 1024 if args.memory_budget is not None else None
+    generators = {
+        "wikidict": partial(generate_wikidict, args.workers, memory_budget),
+        "wordnet": partial(generate_wordnet, memory_budget),
+        "hspell": partial(generate_spellcheck_words, memory_budget),
+        "encyclopedia": partial(generate_general_terms, memory_budget),
+    }
+
+    unknown_sources = set(args.sources) - set(generators)
+    if unknown_sources:
+        parser.error(f"Unknown sources: {', '.join(sorted(unknown_sources))}")
+
+    # Every source runs in a process of its own, so that peak memory is measured per source
+    executors = {name: ProcessPoolExecutor(max_workers = 1) for name in (args.sources or generators)}
+    if args.rejections is not None:
+        args.rejections.mkdir(parents = True, exist_ok = True)
+    futures = {name: executor.submit(run_generator, generators[name],
+                                     args.rejections / f"rejected_{name}.txt" if args.rejections is not None else None,
+                                     args.sample_rejections)
+               for name, executor in executors.items()}
+
+    report = Report("parser")
+    summary = []
+    for name, future in futures.items():
+        try:
+            num_words, filters, duration, memory = future.result()
+            # Every line read is either accepted or rejected by one of the rules
+            report.add({"name": f"extract_words:{name}", "unit": "lines", "count": filters["accepted"] + filters["rejected"],
+                        "words": num_words, **filters}, duration, memory)
+            memory = f"{memory:.1f} MB" if memory is not None else "n/a"
+            summary.append(f"{name:<15}{num_words:>12}{filters['rejected']:>12}{duration:>11.2f}s{memory:>15}")
+        except Exception as e:
+            summary.append(f"{name:<15}failed: {e!r}")
+        executors[name].shutdown()
+
+    print(f"\n{'Source':<15}{'Words':>12}{'Rejected':>12}{'Time':>12}{'Peak RSS':>15}")
+    print("\n".join(summary))
+    report.write(args.report)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,250 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from collections import Counter
+from pathlib import Path
+
+import shards
+import synthetic_corpus
+
+sys.path.insert(0, str(Path(__file__).parent / ".."))
+
+from solver import BACKENDS, Solver, Wordlists
+from solver.benchmark import random_templates
+
+#
+# End-to-end benchmark of the pipeline on a synthetic corpus (synthetic_corpus.py), without any downloads:
+# the scripts are copied to a scratch directory together with the generated raw inputs, parser.py and
+# word_processor.py run there as they would on the real dumps, and a fixed mix of dictionary, anagram and related
+# queries is timed against the resulting word-lists, first with cold caches and then warm.
+# The stage timings of both reports and the query timings are written to a single JSON file; --compare prints
+# the changes from the results of another run, e.g. of another commit.
+#
+
+UTILS_DIR = Path(__file__).parent / ".."
+RESULTS_VERSION = 1
+QUERY_CATEGORIES = ["dictionary", "anagram", "related"]
+
+def copy_scripts(work_dir: Path) -> Path:
+    # Only the code is copied: the raw inputs, word lists and reports of the working tree are left alone
+    for package in ["words", "solver"]:
+        shutil.copytree(UTILS_DIR / package, work_dir / "utils" / package,
+                        ignore = lambda directory, names: [name for name in names
+                                                           if not name.endswith(".py") and name != "ignore_list.txt"])
+    return work_dir / "utils" / "words"
+
+def run_script(words_dir: Path, log_path: Path, *args) -> float:
+    start = time.perf_counter()
+    with open(log_path, "a", encoding = "utf8") as log:
+        subprocess.run([sys.executable, *args], cwd = words_dir, stdout = log, stderr = subprocess.STDOUT, check = True)
+    return time.perf_counter() - start
+
+def read_report(path: Path) -> dict:
+    with open(path, "r", encoding = "utf8") as f:
+        report = json.load(f)
+    stages = {report["tool"]: {"wall_time_s": report["wall_time_s"], "process_peak_rss_mb": report["process_peak_rss_mb"]}}
+    for stage in report["stages"]:
+        keys = ["unit", "count", "wall_time_s", "process_peak_rss_mb", f"{stage['unit']}_per_sec"]
+        stages[f"{report['tool']}:{stage['name']}"] = {key: stage[key] for key in keys if key in stage}
+    return stages
+
+def split_letters(word: str) -> list:
+    # Template characters: a letter together with its apostrophe, or a space
+    chars = []
+    for char in word:
+        if char == "'":
+            chars[-1] += char
+        else:
+            chars.append(char)
+    return chars
+
+def query_mix(solver: Solver, count: int, seed: int) -> list:
+    # (category, source, template), the same for every run with the same word-lists and seed
+    rng = random.Random(seed)
+    wordlists = solver.wordlists
+    queries = []
+    for source in wordlists.sources("dictionary"):
+        queries += [("dictionary", source, template) for template in random_templates(solver, source, count, rng)]
+    for source in wordlists.sources("anagram"):
+        lengths = [length for length in wordlists.lengths(source) if length > 1]
+        for _ in range(count if lengths else 0):
+            words = wordlists.read_dictionary(source, rng.choice(lengths))
+            chars = split_letters(wordlists.decode(rng.choice(words)).replace(" ", ""))
+            rng.shuffle(chars)
+            queries.append(("anagram", source, "".join(chars)))
+    for source in wordlists.sources("related"):
+        lines = wordlists.read_related(source)
+        for _ in range(count if lines else 0):
+            chars = split_letters(wordlists.decode(rng.choice(lines)))
+            start = rng.randrange(len(chars))
+            queries.append(("related", source, "".join(chars[start:start + rng.randint(2, 4)]).strip() or chars[0]))
+    return queries
+
+def time_queries(solver: Solver, queries: list) -> dict:
+    times = {category: [] for category in QUERY_CATEGORIES}
+    results = {category: 0 for category in QUERY_CATEGORIES}
+    for category, source, template in queries:
+        start = time.perf_counter()
+        words = solver.get_words(source, template, category)
+        times[category].append(time.perf_counter() - start)
+        results[category] += len(words)
+    return times, results
+
+def bucket_backends(wordlists_dir: Path, backend: str) -> dict:
+    # The number of dictionary buckets answered by every storage, those which aren't available for the backend
+    # fall back to the bitset indexes
+    solver = Solver(Wordlists(wordlists_dir), backend)
+    return dict(Counter(solver.index_backend(source, length) for source in solver.wordlists.sources("dictionary")
+                        for length in solver.wordlists.lengths(source, "dictionary")))
+
+def benchmark_queries(wordlists_dir: Path, count: int, seed: int, backend: str) -> dict:
+    queries = query_mix(Solver(Wordlists(wordlists_dir), backend), count, seed)
+
+    # Cold: every bucket and index is read on first use, warm: the same queries again
+    solver = Solver(Wordlists(wordlists_dir), backend)
+    cold_times, results = time_queries(solver, queries)
+    warm_times, _ = time_queries(solver, queries)
+
+    summary = {}
+    for category in QUERY_CATEGORIES:
+        if not warm_times[category]:
+            continue
+        warm = sorted(warm_times[category])
+        summary[category] = {
+            "queries": len(warm),
+            "results": results[category],
+            "cold_total_ms": round(sum(cold_times[category]) * 1000, 3),
+            "warm_mean_ms": round(statistics.mean(warm) * 1000, 3),
+            "warm_median_ms": round(statistics.median(warm) * 1000, 3),
+            "warm_p95_ms": round(warm[min(int(len(warm) * 0.95), len(warm) - 1)] * 1000, 3),
+            "warm_max_ms": round(warm[-1] * 1000, 3),
+        }
+    return summary
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd = UTILS_DIR, capture_output = True,
+                              text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(work_dir: Path, size: int, seed: int, workers: int, queries: int, backend: str, shard = None) -> dict:
+    words_dir = copy_scripts(work_dir)
+    log_path = work_dir / "pipeline.log"
+
+    start = time.perf_counter()
+    corpus = synthetic_corpus.generate(words_dir, size, seed)
+    generate_time = time.perf_counter() - start
+    print(f"Generated {sum(corpus.values()) / (1 << 20):.1f} MB of raw inputs in {generate_time:.2f}s")
+
+    duration = run_script(words_dir, log_path, "parser.py", "-w", str(workers), "-r", "report_parser.json")
+    print(f"parser.py finished in {duration:.2f}s")
+    processor_args = ["--shard", shard] if shard is not None else []
+    duration = run_script(words_dir, log_path, "word_processor.py", "-w", str(workers), "-r", "report_word_processor.json",
+                          *processor_args)
+    print(f"word_processor.py finished in {duration:.2f}s (log: {log_path})")
+
+    wordlists_dir = work_dir / "wordlists"
+    artifacts = [path for path in wordlists_dir.rglob("*") if path.is_file()]
+    stages = {**read_report(words_dir / "report_parser.json"), **read_report(words_dir / "report_word_processor.json")}
+
+    buckets = bucket_backends(wordlists_dir, backend)
+    fallbacks = sum(num_buckets for name, num_buckets in buckets.items() if name != backend)
+    if fallbacks:
+        print(f"{fallbacks} of {sum(buckets.values())} buckets aren't available for the {backend} backend "
+              f"and fall back to the bitset indexes")
+
+    start = time.perf_counter()
+    query_results = benchmark_queries(wordlists_dir, queries, seed, backend)
+    print(f"Ran the query mix in {time.perf_counter() - start:.2f}s")
+
+    return {
+        "version": RESULTS_VERSION,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": {"size": size, "seed": seed, "workers": workers, "queries": queries, "backend": backend,
+                       "shard": shard},
+        "corpus": {"generate_time_s": round(generate_time, 3), "files": corpus},
+        "wordlists": {"files": len(artifacts), "bytes": sum(path.stat().st_size for path in artifacts)},
+        "stages": stages,
+        "buckets": buckets,
+        "queries": query_results,
+    }
+
+def metrics(results: dict) -> dict:
+    # The timings which are compared between runs, lower is better
+    values = {f"{name} wall_time_s": stage["wall_time_s"] for name, stage in results["stages"].items()}
+    for category, summary in results["queries"].items():
+        for key in ["cold_total_ms", "warm_mean_ms", "warm_p95_ms"]:
+            values[f"{category} {key}"] = summary[key]
+    return values
+
+def compare(old: dict, new: dict, threshold: float):
+    if old["parameters"] != new["parameters"]:
+        print(f"Warning: the runs used different parameters ({old['parameters']} and {new['parameters']})")
+    old_values = metrics(old)
+    new_values = metrics(new)
+    print(f"\n{'Metric':<60}{old['commit'] or 'old':>12}{new['commit'] or 'new':>12}{'Change':>10}")
+    for name, value in new_values.items():
+        previous = old_values.get(name)
+        if previous is None:
+            print(f"{name:<60}{'':>12}{value:>12}")
+            continue
+        change = (value - previous) / previous if previous else 0
+        flag = "  slower" if change > threshold else "  faster" if change < -threshold else ""
+        print(f"{name:<60}{previous:>12}{value:>12}{change:>+10.1%}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmark the whole pipeline and a fixed query mix on a synthetic corpus")
+    parser.add_argument("-n", "--size", type = int, default = 100000,
+                        help = "Number of entries of the largest synthetic source (default: 100000)")
+    parser.add_argument("--seed", type = int, default = 0, help = "Seed for the corpus and the queries")
+    parser.add_argument("-w", "--workers", type = int, default = os.cpu_count(),
+                        help = "Number of worker processes of parser.py and word_processor.py")
+    parser.add_argument("-q", "--queries", type = int, default = 100,
+                        help = "Number of queries per source and category (default: 100)")
+    parser.add_argument("-b", "--backend", choices = BACKENDS, default = "index",
+                        help = "Storage to search with the dictionary queries (default: index)")
+    parser.add_argument("-s", "--shard", choices = shards.MODES, default = None,
+                        help = "Pass --shard to word_processor.py")
+    parser.add_argument("-o", "--output", type = Path, default = Path(__file__).parent / "benchmark_pipeline.json",
+                        help = "Where to write the JSON results")
+    parser.add_argument("-d", "--work-dir", type = Path, default = None,
+                        help = "Directory to run in, which is kept for inspection (default: a temporary directory)")
+    parser.add_argument("-c", "--compare", type = Path, default = None, metavar = "JSON",
+                        help = "Results of a previous run to compare with")
+    parser.add_argument("--threshold", type = float, default = 0.1,
+                        help = "Relative change above which a metric is flagged when comparing (default: 0.1)")
+    args = parser.parse_args()
+
+    if args.work_dir is not None:
+        if args.work_dir.exists() and any(args.work_dir.iterdir()):
+            parser.error(f"{args.work_dir} is not empty")
+        args.work_dir.mkdir(parents = True, exist_ok = True)
+        results = run_benchmark(args.work_dir, args.size, args.seed, args.workers, args.queries, args.backend, args.shard)
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            results = run_benchmark(Path(work_dir), args.size, args.seed, args.workers, args.queries, args.backend,
+                                    args.shard)
+
+    with open(args.output, "w", encoding = "utf8") as o:
+        o.write(json.dumps(results, indent = 4, ensure_ascii = False))
+    print(f"Wrote the results to {args.output}")
+
+    if args.compare is not None:
+        with open(args.compare, "r", encoding = "utf8") as f:
+            compare(json.load(f), results, args.threshold)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import struct
+import time
+
+from collections import defaultdict
+from pathlib import Path
+
+from executors import get_executor
+
+#
+# Indexes of the multi-word expressions (the lines with a "_") of related_e0.txt, next to it:
+#   related_e0.tokens.bin: every token (a word between the "_" separators) -> the expressions which contain it
+#   related_e0.ngrams.bin: every n-gram (NGRAM_SIZE characters, "_" included) -> the expressions which contain it
+# Expressions are identified by their line number in related_e0.txt.
+#
+# Both files share the same layout, all integers are little-endian:
+#   header:   magic "RIDX", version (uint16), n-gram size (uint16, 0 for tokens),
+#             number of keys (uint32), number of postings (uint32), size of the keys (uint32)
+#   keys:     the sorted keys, UTF-8, separated by "\n"
+#   offsets:  for every key, the index of its first posting, plus the total at the end (uint32 each)
+#   postings: the line numbers of every key, ascending (uint32 each)
+#
+# The reader is solver/related_index.py.
+#
+
+MAGIC = b"RIDX"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIII")
+NGRAM_SIZE = 3
+SUFFIXES = [".tokens.bin", ".ngrams.bin"]
+
+def build_postings_index(postings: dict, ngram_size: int) -> bytes:
+    # postings: key -> ascending line numbers
+    keys = sorted(postings)
+    key_data = "\n".join(keys).encode("utf8")
+    offsets = [0]
+    for key in keys:
+        offsets.append(offsets[-1] + len(postings[key]))
+
+    return b"".join([HEADER.pack(MAGIC, VERSION, ngram_size, len(keys), offsets[-1], len(key_data)),
+                     key_data,
+                     struct.pack(f"<{len(offsets)}I", *offsets),
+                     struct.pack(f"<{offsets[-1]}I", *(line for key in keys for line in postings[key]))])
+
+def build_related_indexes(lines: list, ngram_size = NGRAM_SIZE) -> tuple:
+    tokens = defaultdict(list)
+    ngrams = defaultdict(list)
+    for i, line in enumerate(lines):
+        if "_" not in line:
+            continue
+        # Lines are visited in order, so every posting list is ascending; sets drop repeated keys within a line
+        for token in set(line.split("_")):
+            if token:
+                tokens[token].append(i)
+        for ngram in {line[j:j + ngram_size] for j in range(len(line) - ngram_size + 1)}:
+            ngrams[ngram].append(i)
+    return build_postings_index(tokens, 0), build_postings_index(ngrams, ngram_size)
+
+def write_related_indexes(path: Path) -> tuple:
+    # path: a related_e0.txt file, the indexes are written next to it
+    start = time.perf_counter()
+    with open(path, "r", encoding = "utf8") as f:
+        lines = f.read().split("\n")
+
+    output_paths = []
+    for suffix, data in zip(SUFFIXES, build_related_indexes(lines)):
+        output_path = path.with_name(path.stem + suffix)
+        output_path.write_bytes(data)
+        output_paths.append(output_path)
+    return path, output_paths, time.perf_counter() - start
+
+def write_files(paths, max_workers = None):
+    with get_executor(max_workers) as executor:
+        yield from executor.map(write_related_indexes, paths)
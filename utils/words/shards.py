@@ -0,0 +1,73 @@
+import itertools
+import time
+
+from pathlib import Path
+
+from executors import get_executor
+
+#
+# Prefix shards of the dictionary buckets (shard_eN_I.txt), next to dictionary_eN.txt.
+# A bucket is sorted, so every shard is a contiguous range of it, in the same text format;
+# config.json lists the first word of every shard, which is all a reader needs to pick the shards
+# that can hold the words starting with a given prefix (see solver/shards.py).
+#   letter:   one shard per leading letter
+#   adaptive: prefixes are extended until their words fit in the target size, and adjacent small
+#             groups are merged back together, so shards stay close to the target size
+# Buckets which are already within the target size are not sharded.
+#
+
+MODES = ["letter", "adaptive"]
+
+def text_size(words: list) -> int:
+    return sum(len(word) + 1 for word in words)
+
+def split_groups(words: list, depth: int, target_size: int) -> list:
+    groups = []
+    for _, group in itertools.groupby(words, key = lambda word: word[:depth + 1]):
+        group = list(group)
+        if text_size(group) > target_size and depth + 1 < len(group[0]):
+            groups.extend(split_groups(group, depth + 1, target_size))
+        else:
+            groups.append(group)
+    return groups
+
+def plan_shards(words: list, mode: str, target_size: int) -> list:
+    if text_size(words) <= target_size:
+        return [words]
+
+    if mode == "letter":
+        return [list(group) for _, group in itertools.groupby(words, key = lambda word: word[:1])]
+    if mode != "adaptive":
+        raise ValueError(f"Unknown shard mode: {mode}")
+
+    shards = []
+    for group in split_groups(words, 0, target_size):
+        if shards and text_size(shards[-1]) + text_size(group) <= target_size:
+            shards[-1].extend(group)
+        else:
+            shards.append(group)
+    return shards
+
+def shard_name(length: int, index: int) -> str:
+    return f"shard_e{length}_{index}.txt"
+
+def write_shards(path: Path, mode: str, target_size: int) -> tuple:
+    # path: a dictionary_eN.txt file, the shards are written next to it
+    start = time.perf_counter()
+    length = int(path.stem.replace("dictionary_e", ""))
+    with open(path, "r", encoding = "utf8") as f:
+        words = [word for word in f.read().split("\n") if word]
+
+    output_paths = []
+    shards = plan_shards(words, mode, target_size)
+    if len(shards) > 1:
+        for i, shard in enumerate(shards):
+            output_path = path.with_name(shard_name(length, i))
+            with open(output_path, "w", encoding = "utf8") as o:
+                o.write("\n".join(shard))
+            output_paths.append(output_path)
+    return path, output_paths, time.perf_counter() - start
+
+def write_files(paths, mode: str, target_size: int, max_workers = None):
+    with get_executor(max_workers) as executor:
+        yield from executor.map(write_shards, paths, itertools.repeat(mode), itertools.repeat(target_size))
@@ -0,0 +1,89 @@
+import json
+import struct
+import sys
+import time
+
+from pathlib import Path
+
+from anagram_index import build_anagram_index
+from executors import get_executor
+from related_index import build_related_indexes
+
+sys.path.insert(0, str(Path(__file__).parent / ".."))
+
+from solver import TemplateIndex
+
+#
+# Snapshot of the query indexes of a source (snapshot.bin, in the source directory), so that a long-running process
+# can start answering queries without re-reading and re-indexing every word-list of the source.
+#
+# All integers are little-endian:
+#   header:   magic "SNAP", version (uint16), size of the contents (uint32)
+#   contents: JSON, UTF-8, with
+#               "inputs":   the hash of every artifact the snapshot was built from, as in manifest.json
+#               "sections": the offset (from the end of the contents) and the sizes of every section, by name
+#   sections: dictionary_eN: the words of dictionary_eN.txt, "\n"-separated, followed by the bitsets of TemplateIndex,
+#                            ceil(words / 8) bytes each, for every position and every letter of "letters"[position]
+#             anagram_eN:    the anagram index of anagram_eN.json (see anagram_index.py), into the dictionary sections
+#             related_e0:    the lines of related_e0.txt, "\n"-separated, followed by their token and n-gram indexes
+#                            (see related_index.py)
+#
+# A snapshot whose inputs don't match the current hashes of the artifacts is stale, and readers ignore it.
+# The reader is solver/snapshot.py.
+#
+
+MAGIC = b"SNAP"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+SNAPSHOT_NAME = "snapshot.bin"
+
+def read_lines(path: Path) -> list:
+    with open(path, "r", encoding = "utf8") as f:
+        return f.read().split("\n")
+
+def dictionary_section(words: list) -> tuple:
+    index = TemplateIndex(words)
+    size = (len(words) + 7) // 8
+    letters = ["".join(sorted(postings)) for postings in index.postings]
+    text = "\n".join(words).encode("ascii")
+    bitsets = [postings[char].to_bytes(size, "little") for postings, chars in zip(index.postings, letters) for char in chars]
+    return {"words": len(words), "words_size": len(text), "letters": letters}, b"".join([text, *bitsets])
+
+def related_section(lines: list) -> tuple:
+    text = "\n".join(lines).encode("utf8")
+    tokens, ngrams = build_related_indexes(lines)
+    return {"lines_size": len(text), "tokens_size": len(tokens)}, b"".join([text, tokens, ngrams])
+
+def build_snapshot(path: Path, inputs: dict) -> bytes:
+    # path: the directory of a source, inputs: the names (relative to its parent) and hashes of its artifacts
+    stems = [Path(name).stem for name in inputs]
+    sections = {}
+    # The dictionaries come first, the anagram indexes point into them
+    dictionaries = {}
+    for stem in sorted(stem for stem in stems if stem.startswith("dictionary_e")):
+        length = int(stem.replace("dictionary_e", ""))
+        dictionaries[length] = [word for word in read_lines(path / f"{stem}.txt") if word]
+        sections[stem] = dictionary_section(dictionaries[length])
+    for stem in sorted(stem for stem in stems if stem.startswith("anagram_e")):
+        with open(path / f"{stem}.json", "r", encoding = "utf8") as f:
+            sections[stem] = {}, build_anagram_index(json.load(f), dictionaries)
+    for stem in sorted(stem for stem in stems if stem.startswith("related_e")):
+        sections[stem] = related_section(read_lines(path / f"{stem}.txt"))
+
+    contents = {"inputs": inputs, "sections": {}}
+    offset = 0
+    for stem, (info, data) in sections.items():
+        contents["sections"][stem] = {"offset": offset, "size": len(data), **info}
+        offset += len(data)
+    contents = json.dumps(contents, ensure_ascii = False).encode("utf8")
+    return b"".join([HEADER.pack(MAGIC, VERSION, len(contents)), contents, *(data for _, data in sections.values())])
+
+def write_snapshot(path: Path, inputs: dict) -> tuple:
+    start = time.perf_counter()
+    output_path = path / SNAPSHOT_NAME
+    output_path.write_bytes(build_snapshot(path, inputs))
+    return output_path, time.perf_counter() - start
+
+def write_files(paths, inputs, max_workers = None):
+    with get_executor(max_workers) as executor:
+        yield from executor.map(write_snapshot, paths, inputs)
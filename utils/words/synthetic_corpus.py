@@ -0,0 +1,148 @@
+import argparse
+import bz2
+import gzip
+import random
+import time
+
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import parse_hspell
+import parse_wikidict
+import parse_wikipedia
+import parse_wordnet
+
+#
+# Synthetic raw inputs for parser.py, in the formats of the real dumps, so that the whole pipeline can be run
+# (and benchmarked) at any scale without downloading anything:
+#   hspell:       he_IL.dic, a count line followed by "word/FLAGS" lines
+#   encyclopedia: hewiki titles (.gz), single words and "_"-joined phrases
+#   wikidict:     hewiktionary titles (.gz) and a pages dump (.xml.bz2) whose צירופים sections link to phrases
+#   wordnet:      hebrew_synonyms.xml, with dotted and undotted lemmas
+# Words are drawn from a shared vocabulary, with letters weighted roughly by their frequency in Hebrew, final forms
+# at the end of words and the apostrophe letters (ג' ז' צ' ת' ץ'). Phrases in the pages dump and the dotted lemmas
+# carry niqqud, and a share of every source consists of lines which the parsers reject.
+# The output only depends on the seed and the size.
+#
+
+LETTERS = "אבגדהוזחטיכלמנסעפצקרשת"
+LETTER_WEIGHTS = [6, 5, 1.2, 2.5, 9, 10, 0.8, 2.3, 0.9, 11, 2.5, 7, 6.5, 4.5, 1.3, 2.5, 1.8, 1.2, 2, 5.5, 4, 5.5]
+FINAL_FORMS = {"כ": "ך", "מ": "ם", "נ": "ן", "פ": "ף", "צ": "ץ"}
+GERESH_LETTERS = "גזצתץ"
+GERESH_RATE = 0.04
+NIQQUD = [chr(c) for c in range(0x05B0, 0x05BD)]
+WORD_LENGTHS = range(2, 12)
+WORD_LENGTH_WEIGHTS = [4, 10, 18, 20, 17, 12, 8, 5, 3, 2]
+PREFIXES = ["", "", "", "ה", "ו", "ב", "ל", "מ", "ש", "וה", "שה"]
+# Lines without flags are rejected by the parser
+HSPELL_FLAGS = ["A", "B", "AB", "C", "DE", "F", ""]
+
+# The number of raw entries of every source, relative to the requested size (roughly like the real dumps)
+SOURCE_SCALES = {"encyclopedia": 1.0, "hspell": 0.6, "wikidict": 0.1, "wordnet": 0.02}
+PHRASES_PER_PAGE = 3
+JUNK_RATE = 0.03
+JUNK_LINES = ["Python", "1948", "COVID-19", "א", 'צה"ל', "ת.ד", "(פירושונים)", "Route_66", "ג'ו'"]
+
+def make_word(rng: random.Random) -> str:
+    length = rng.choices(WORD_LENGTHS, weights = WORD_LENGTH_WEIGHTS)[0]
+    letters = rng.choices(LETTERS, weights = LETTER_WEIGHTS, k = length)
+    letters[-1] = FINAL_FORMS.get(letters[-1], letters[-1])
+    return "".join(f"{letter}'" if letter in GERESH_LETTERS and rng.random() < GERESH_RATE else letter
+                   for letter in letters)
+
+def add_niqqud(rng: random.Random, word: str) -> str:
+    return "".join(f"{char}{rng.choice(NIQQUD)}" if char not in "'_ " and rng.random() < 0.7 else char
+                   for char in word)
+
+class Vocabulary:
+    # A fixed set of words which the sources share, so that the same words and phrases recur across sources
+
+    def __init__(self, words: list, rng: random.Random):
+        self.words = words
+        self.rng = rng
+
+    def word(self) -> str:
+        return self.rng.choice(self.words)
+
+    def phrase(self, max_words = 3, separator = "_") -> str:
+        return separator.join(self.word() for _ in range(self.rng.randint(2, max_words)))
+
+    def junk(self) -> str:
+        return self.rng.choice(JUNK_LINES)
+
+    def lines(self, count: int, make_line):
+        for _ in range(count):
+            yield self.junk() if self.rng.random() < JUNK_RATE else make_line()
+
+def write_hspell(vocabulary: Vocabulary, path: Path, count: int):
+    rng = vocabulary.rng
+    with open(path, "w", encoding = "utf8") as o:
+        o.write(f"{count}\n")
+        for line in vocabulary.lines(count, lambda: f"{rng.choice(PREFIXES)}{vocabulary.word()}"):
+            flags = rng.choice(HSPELL_FLAGS)
+            o.write(f"{line}/{flags}\n" if flags else f"{line}\n")
+
+def write_titles(vocabulary: Vocabulary, path: Path, count: int, phrase_rate: float):
+    rng = vocabulary.rng
+    with gzip.open(path, "wt", compresslevel = 6, encoding = "utf8") as o:
+        for line in vocabulary.lines(count, lambda: vocabulary.phrase() if rng.random() < phrase_rate else vocabulary.word()):
+            o.write(f"{line}\n")
+
+def write_pages(vocabulary: Vocabulary, path: Path, count: int):
+    rng = vocabulary.rng
+    with bz2.open(path, "wt", encoding = "utf8") as o:
+        o.write('<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/">\n')
+        for _ in range(count):
+            links = "\n".join(f"* [[{add_niqqud(rng, vocabulary.phrase(separator = ' '))}]]" for _ in range(PHRASES_PER_PAGE))
+            text = f"'''{vocabulary.word()}'''\n===צירופים===\n{links}\n===ראו גם===\n* {vocabulary.word()}\n"
+            o.write(f"<page><title>{escape(vocabulary.word())}</title><revision>"
+                    f"<text>{escape(text)}</text></revision></page>\n")
+        o.write("</mediawiki>\n")
+
+def write_wordnet(vocabulary: Vocabulary, path: Path, count: int):
+    rng = vocabulary.rng
+    with open(path, "w", encoding = "utf8") as o:
+        o.write("<synsets>\n")
+        for i, line in enumerate(vocabulary.lines(count, lambda: vocabulary.phrase(2) if rng.random() < 0.2 else vocabulary.word())):
+            o.write(f'<synset id="{i}"><lemma>{escape(add_niqqud(rng, line))}</lemma>'
+                    f"<undotted>{escape(line)}</undotted></synset>\n")
+        o.write("</synsets>\n")
+
+def generate(output_dir: Path, size: int, seed = 0) -> dict:
+    # Writes the raw inputs of every source to output_dir, returns the size in bytes of every file
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents = True, exist_ok = True)
+    counts = {source: max(int(size * scale), 1) for source, scale in SOURCE_SCALES.items()}
+
+    rng = random.Random(f"{seed}:vocabulary")
+    words = [make_word(rng) for _ in range(max(size // 4, 1000))]
+    # Every source draws from a generator of its own, so that its content doesn't depend on the others
+    vocabularies = {source: Vocabulary(words, random.Random(f"{seed}:{source}")) for source in SOURCE_SCALES}
+
+    paths = [output_dir / parse_hspell.INPUT_PATHS[1].name, output_dir / parse_wikipedia.INPUT_PATHS[0].name,
+             output_dir / parse_wikidict.INPUT_PATHS1[0].name, output_dir / parse_wikidict.INPUT_PATHS2[0].name,
+             output_dir / parse_wordnet.INPUT_PATHS[1].name]
+    write_hspell(vocabularies["hspell"], paths[0], counts["hspell"])
+    write_titles(vocabularies["encyclopedia"], paths[1], counts["encyclopedia"], phrase_rate = 0.6)
+    write_titles(vocabularies["wikidict"], paths[2], counts["wikidict"], phrase_rate = 0.1)
+    write_pages(vocabularies["wikidict"], paths[3], max(counts["wikidict"] // PHRASES_PER_PAGE, 1))
+    write_wordnet(vocabularies["wordnet"], paths[4], counts["wordnet"])
+    return {path.name: path.stat().st_size for path in paths}
+
+def main():
+    parser = argparse.ArgumentParser(description = "Generate synthetic raw word-lists for parser.py")
+    parser.add_argument("-o", "--output", type = Path, required = True,
+                        help = "Directory to write the raw inputs to (parser.py reads them from its own directory)")
+    parser.add_argument("-n", "--size", type = int, default = 100000,
+                        help = "Number of entries of the largest source (default: 100000)")
+    parser.add_argument("--seed", type = int, default = 0, help = "Seed for the generated words")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sizes = generate(args.output, args.size, args.seed)
+    for name, size in sizes.items():
+        print(f"{name:<50}{size / 1024:>12.1f} KB")
+    print(f"Generated {len(sizes)} files in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
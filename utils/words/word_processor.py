@@ -1,33 +1,39 @@
-import re
+import argparse
+import hashlib
+import os
 import shutil
-import subprocess
 import json
+import tempfile
+import time
 
-from collections import defaultdict, Counter
+from collections import defaultdict
+from fnmatch import fnmatch
 from pathlib import Path
 
+import bloom
+import codec
+import compress
+import dawg_builder
+import format_costs
+import fixed_width
+import related_index
+import shards
+import snapshot
+
+from anagram_index import write_anagram_index
+from external_sort import ExternalSorter
+from executors import get_executor
+from instrumentation import Report, rejections
+from manifest import Manifest, hash_file, hash_strings
+from parse_common import is_ignored
+
 INPUT_DIR = Path(__file__).parent
 INPUT_PREFIX = "words_"
 OUTPUT_DIR = Path(__file__).parent / ".." / ".." / "wordlists"
-
-TRANSLATE_CHARS = re.compile(r"([\u0590-\u05fe]'?)")
-
-translate_mapping = {
-    "א": "a", "ב": "b", "ג": "g", "ג'": "j", "ד": "d", "ה": "h", 
-    "ו": "v", "ז": "z", "ז'": "Z", "ח": "H", "ט": "T", "י": "y", 
-    "כ": "c", "ך": "C", "ל": "l", "מ": "m", "ם": "M", "נ": "n", 
-    "ן": "N", "ס": "s", "ע": "e", "פ": "p", "ף": "P", "צ": "w", 
-    "צ'": "W", "ץ": "x", "ץ'": "X", "ק": "k", "ר": "r", "ש": "S", 
-    "ת": "t", "ת'": "q"
-}
-
-final_form_mapping = {
-    translate_mapping["ך"]: translate_mapping["כ"],
-    translate_mapping["ם"]: translate_mapping["מ"],
-    translate_mapping["ן"]: translate_mapping["נ"],
-    translate_mapping["ף"]: translate_mapping["פ"],
-    translate_mapping["ץ"]: translate_mapping["צ"]
-}
+IGNORE_LIST_PATH = INPUT_DIR / "ignore_list.txt"
+ARTIFACT_PATTERNS = ["*/dictionary_e*.txt", "*/dictionary_e*.dawg", "*/shard_e*.txt", "*/anagram_e*.json",
+                     "*/related_e*.txt", "*/related_e*.dawg"]
+ETAG_LENGTH = 16
 
 def init():
     try:
@@ -36,165 +42,603 @@ def init():
         pass
     OUTPUT_DIR.mkdir(parents = True, exist_ok = True)
 
-def anagram_encoder(s: str) -> str:
-    s = s.translate(s.maketrans("".join(final_form_mapping.keys()), "".join(final_form_mapping.values())))
-    counter = Counter(s)
-    sorted_items = sorted(counter.items())
-    
-    return "".join(f"{char}{count}" for char, count in sorted_items if char.isalpha())
-
-def process_words_to_text():
-    for source in INPUT_DIR.glob(f"{INPUT_PREFIX}*.txt"):
-
-        print(f"Processing {source}")
-
-        identifier = source.stem.replace(INPUT_PREFIX, "")
-
-        output_path = OUTPUT_DIR / identifier
-        output_path.mkdir()
-
-        #
-        # Dictionary
-        #
-
-        words_mapping = defaultdict(list)
-        words_mapping_translated = defaultdict(list)
-        words_mapping_full = defaultdict(list)
-        num_words = 0
-
+def read_source(source: Path) -> dict:
+    words_mapping = defaultdict(list)
+    with open(source, "r", encoding = "utf8") as f:
+        for line in f:
+            line = line.rstrip()
+            if is_ignored(line):
+                rejections.reject("ignore_list", line)
+                continue
+            bucket = len(line) - line.count("'")
+            words_mapping[bucket].append(line)
+    return words_mapping
+
+def read_words(path: Path) -> list:
+    with open(path, "r", encoding = "utf8") as f:
+        return f.read().split("\n")
+
+def process_bucket(output_path: Path, length: int, words: list) -> list:
+    # Only the transliterated words are stored, the Hebrew view can be rebuilt using decode.py
+    translated = sorted(codec.encode_words(words))
+    with open(output_path / f"dictionary_e{length}.txt", "w", encoding = "utf8") as o:
+        o.write("\n".join(translated))
+
+    return translated
+
+def write_related(output_path: Path, words: list):
+    with open(output_path / f"related_e0.txt", "w", encoding = "utf8") as o:
+        o.write("\n".join(sorted(words)))
+
+def write_anagrams(output_path: Path, length: int, words: list):
+    anagram_mapping = defaultdict(list)
+    for word, signature in zip(words, codec.anagram_signatures(words)):
+        anagram_mapping[signature].append(word)
+
+    with open(output_path / f"anagram_e{length}.json", "w", encoding = "utf8") as o:
+        o.write(json.dumps(anagram_mapping))
+
+    # The binary index refers to the words by their position in the dictionary files
+    dictionaries = {bucket: read_words(output_path / f"dictionary_e{bucket}.txt") for bucket in {len(word) for word in words}}
+    write_anagram_index(output_path / f"anagram_e{length}.bin", anagram_mapping, dictionaries)
+
+class StreamWriter:
+    # Writes words in the same layout as "\n".join(words) while computing hash_strings(*words).
+    # Without a path, the words are only hashed.
+    def __init__(self, path = None):
+        self.file = open(path, "w", encoding = "utf8") if path is not None else None
+        self.hash = hashlib.sha256()
+        self.count = 0
+
+    def write(self, word: str):
+        if self.file is not None:
+            if self.count > 0:
+                self.file.write("\n")
+            self.file.write(word)
+        self.hash.update(word.encode("utf8"))
+        self.hash.update(b"\n")
+        self.count += 1
+
+    def close(self) -> str:
+        if self.file is not None:
+            self.file.close()
+        return self.hash.hexdigest()
+
+def process_source_external(source: Path, output_path: Path, memory_budget: int) -> dict:
+    # Same output as read_source + process_bucket + write_related + write_anagrams, but the source is
+    # never held in memory: every word is tagged with its destination file and sorted externally
+    bucket_order = {}
+    num_ignored = 0
+    with ExternalSorter(memory_budget) as sorter:
         with open(source, "r", encoding = "utf8") as f:
             for line in f:
                 line = line.rstrip()
+                if is_ignored(line):
+                    # Counted by the parent process, which holds the report
+                    num_ignored += 1
+                    continue
                 bucket = len(line) - line.count("'")
-                words_mapping[bucket].append(line)
-                words_mapping_translated[bucket].append(TRANSLATE_CHARS.sub(lambda m: translate_mapping.get(m.group(1), 
-                                                                                                            m.group(1)), 
-                                                                                                            line))
-                num_words += 1
-
-        for mapping, prefix in [(words_mapping, "h"), (words_mapping_translated, "e")]:
-            for length, words in mapping.items():
-                words_mapping_full[prefix].extend(words)
-                with open(output_path / f"dictionary_{prefix}{length}.txt", "w", encoding = "utf8") as o:
-                    o.write("\n".join(sorted(words)))
-
-        with open(output_path / f"related_e0.txt", "w", encoding = "utf8") as o:
-            o.write("\n".join(sorted(words_mapping_full["e"])))
-            
-
-        #
-        # Anagrams
-        #
-
-        full_anagram_mapping = defaultdict(lambda: defaultdict(list))
-        for length, words in words_mapping_translated.items():
-            for word in sorted(words):
-                encoding = anagram_encoder(word)
-                clean_length = sum([int(x) for x in re.split(r"[a-zA-Z]", encoding) if x != ""])
-                full_anagram_mapping[clean_length][encoding].append(word)
-
-        for length, words in full_anagram_mapping.items():
-            with open(output_path / f"anagram_e{length}.json", "w", encoding = "utf8") as o:
-                o.write(json.dumps(words))
-        license_path = INPUT_DIR / f"license_{identifier}.txt"
-        if license_path.exists():
-            shutil.copyfile(license_path, output_path / "LICENSE")
-        
-        print(f"Processed {num_words} words")
-
-def process_words_to_dawg():
-    print("Creating DAWGs")
-
-    container_name = "crossword_solver"
-
-    try:
-        subprocess.run(f"docker build -t {container_name} .", 
-                        shell=True, check=True, capture_output=True, cwd=INPUT_DIR)
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError("Failed to build docker container") from e
-
-
-    subcommand = "/bin/bash -c ./dawg_encode.sh"
-    command = f'docker run -it --rm --mount type=bind,source="{INPUT_DIR}",target=/app ' \
-              f'--mount type=bind,source="{OUTPUT_DIR}",target=/words {container_name} {subcommand}' 
-              
-    try:
-        output = subprocess.run(command, shell=True, check=True, capture_output=True, cwd=INPUT_DIR)
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError("Failed to encode DAWG") from e
-    print("Done creating DAWGs")
+                bucket_order.setdefault(bucket, len(bucket_order))
+                translated = codec.encode(line)
+                sorter.add(f"h\t{bucket:06d}\t{line}")
+                sorter.add(f"e\t{bucket:06d}\t{translated}")
+                sorter.add(f"r\t{0:06d}\t{translated}")
 
-def create_config():
-    print("Creating configuration")
-    with open(OUTPUT_DIR / "config.json", "w", encoding="utf8") as o:
-        config = {}
-        config["translate_mapping"] = translate_mapping
-        config["final_form_mapping"] = final_form_mapping
-        config["list_source"] = {}
+        buckets = {}
+        num_words = 0
+        writer = None
+        current = None
+        for record in sorter.sorted():
+            kind, bucket, word = record.split("\t", 2)
+            if (kind, bucket) != current:
+                if writer is not None:
+                    inputs = writer.close()
+                    if current[0] == "h":
+                        buckets[int(current[1])] = inputs
+                current = (kind, bucket)
+                if kind == "h":
+                    # The Hebrew words are not stored, they only identify the inputs of the bucket
+                    writer = StreamWriter()
+                elif kind == "r":
+                    writer = StreamWriter(output_path / "related_e0.txt")
+                else:
+                    writer = StreamWriter(output_path / f"dictionary_e{int(bucket)}.txt")
+            writer.write(word)
+            if kind == "h":
+                num_words += 1
+        if writer is not None:
+            writer.close()
+
+    # Anagram groups are keyed by the number of letters, so the words are regrouped from the
+    # dictionary files (in the order in which their buckets first appeared in the source)
+    anagrams = {}
+    with tempfile.TemporaryDirectory(prefix = "anagrams_") as tmp_dir:
+        spill_files = {}
+        for bucket in sorted(bucket_order, key = bucket_order.get):
+            with open(output_path / f"dictionary_e{bucket}.txt", "r", encoding = "utf8") as f:
+                for word in f:
+                    word = word.rstrip("\n")
+                    length = codec.letter_count(word)
+                    if length not in spill_files:
+                        spill_files[length] = open(Path(tmp_dir) / f"{length}.txt", "w", encoding = "utf8", newline = "\n")
+                    spill_files[length].write(word + "\n")
+
+        for length, spill_file in spill_files.items():
+            spill_file.close()
+            with open(spill_file.name, "r", encoding = "utf8", newline = "\n") as f:
+                words = [word[:-1] for word in f]
+            write_anagrams(output_path, length, words)
+            anagrams[length] = (hash_strings(*words), sorted({len(word) for word in words}))
+
+    return {"buckets": buckets, "anagrams": anagrams, "num_words": num_words, "num_ignored": num_ignored}
+
+def anagram_records(manifest: Manifest, identifier: str, length: int, inputs: str, buckets) -> list:
+    # (name, inputs) of the anagram files of a group of words. The binary index points into the dictionary files
+    # of its words, so their contents are part of its inputs: a change to another group in the same bucket shifts the lines.
+    dependencies = [f"{identifier}/dictionary_e{bucket}.txt" for bucket in buckets]
+    return [(f"{identifier}/anagram_e{length}.json", inputs),
+            (f"{identifier}/anagram_e{length}.bin", manifest.dependent_inputs(inputs, dependencies))]
+
+def finish_source(manifest: Manifest, identifier: str, output_path: Path, source_inputs: str, num_words: int):
+    license_path = INPUT_DIR / f"license_{identifier}.txt"
+    if license_path.exists():
+        shutil.copyfile(license_path, output_path / "LICENSE")
+
+    manifest.record_source(identifier, source_inputs)
+    print(f"Processed {num_words} words from {identifier}")
+
+def process_words_to_text(manifest: Manifest, max_workers = 1, memory_budget = None) -> int:
+    # Returns the number of words processed
+    ignore_list_hash = hash_file(IGNORE_LIST_PATH)
+    total_words = 0
+
+    with get_executor(max_workers) as executor:
 
         #
         # Dictionary
         #
 
-        dict_source = {}
-        for directory in OUTPUT_DIR.iterdir():
-            if not directory.is_dir():
+        sources = []
+        external = []
+        for source in INPUT_DIR.glob(f"{INPUT_PREFIX}*.txt"):
+            identifier = source.stem.replace(INPUT_PREFIX, "")
+
+            source_inputs = hash_strings(hash_file(source), ignore_list_hash)
+            if manifest.is_fresh_source(identifier, source_inputs):
+                print(f"Skipping {source}, no changes since the last build")
                 continue
-            current_dict_source = {}
-            for txt_file in Path(directory).glob("dictionary_e*.txt"):
-                word_length = int(txt_file.stem.replace("dictionary_e", ""))
-                txt_size = txt_file.stat().st_size
-                dawg_size = Path(txt_file.with_suffix(".dawg")).stat().st_size
-                current_dict_source[word_length] = "txt" if txt_size <= dawg_size else "dawg"
-
-            max_key = max(current_dict_source.keys())
-            dict_source[directory.name] = [""] * (max_key + 1)
-            for k, v in current_dict_source.items():
-                dict_source[directory.name][k] = v
-        
-        config["list_source"]["dictionary"] = dict_source
 
-        #
-        # Anagrams
-        #
+            print(f"Processing {source}")
 
-        anagram_source = {}
-        for directory in OUTPUT_DIR.iterdir():
-            if not directory.is_dir():
-                continue
-            current_anagram_source = {}
-            for json_file in Path(directory).glob("anagram_e*.json"):
-                word_length = int(json_file.stem.replace("anagram_e", ""))
-                current_anagram_source[word_length] = "json"
-
-            max_key = max(current_anagram_source.keys())
-            anagram_source[directory.name] = [""] * (max_key + 1)
-            for k, v in current_anagram_source.items():
-                anagram_source[directory.name][k] = v
-        
-        config["list_source"]["anagram"] = anagram_source
+            output_path = OUTPUT_DIR / identifier
+            output_path.mkdir(exist_ok = True)
 
-        # 
-        # Related expressions
-        #
+            if memory_budget is not None:
+                external.append((identifier, output_path, source_inputs,
+                                 executor.submit(process_source_external, source, output_path, memory_budget)))
+                continue
 
-        related_source = {}
-        for name in dict_source.keys():
-            txt_file = OUTPUT_DIR / name / f"related_e0.txt"
+            words_mapping = read_source(source)
+            buckets = {}
+            for length, words in words_mapping.items():
+                inputs = hash_strings(*sorted(words))
+                if manifest.is_fresh(f"{identifier}/dictionary_e{length}.txt", inputs):
+                    buckets[length] = (inputs, None)
+                else:
+                    buckets[length] = (inputs, executor.submit(process_bucket, output_path, length, words))
+            num_words = sum(len(words) for words in words_mapping.values())
+            sources.append((identifier, output_path, source_inputs, num_words, buckets))
+
+        pending = []
+        for identifier, output_path, source_inputs, num_words, buckets in sources:
+            results = []
+            for length, (inputs, future) in buckets.items():
+                if future is None:
+                    results.append(read_words(output_path / f"dictionary_e{length}.txt"))
+                    continue
+                results.append(future.result())
+                manifest.record(f"{identifier}/dictionary_e{length}.txt", inputs)
+
+            #
+            # Related expressions
+            #
+
+            name = f"{identifier}/related_e0.txt"
+            inputs = hash_strings(*sorted(inputs for inputs, _ in buckets.values()))
+            if not manifest.is_fresh(name, inputs):
+                pending.append(([(name, inputs)], executor.submit(write_related, output_path,
+                                                                [word for translated in results for word in translated])))
+
+            #
+            # Anagrams
+            #
+
+            anagram_words = defaultdict(list)
+            for translated in results:
+                for word in translated:
+                    anagram_words[codec.letter_count(word)].append(word)
+
+            for length, words in anagram_words.items():
+                records = anagram_records(manifest, identifier, length, hash_strings(*words), {len(word) for word in words})
+                if not all(manifest.is_fresh(name, inputs) for name, inputs in records):
+                    pending.append((records, executor.submit(write_anagrams, output_path, length, words)))
+
+            finish_source(manifest, identifier, output_path, source_inputs, num_words)
+            total_words += num_words
+
+        for identifier, output_path, source_inputs, future in external:
+            result = future.result()
+            for length, inputs in result["buckets"].items():
+                manifest.record(f"{identifier}/dictionary_e{length}.txt", inputs)
+            manifest.record(f"{identifier}/related_e0.txt", hash_strings(*sorted(result["buckets"].values())))
+            for length, (inputs, buckets) in result["anagrams"].items():
+                for name, record_inputs in anagram_records(manifest, identifier, length, inputs, buckets):
+                    manifest.record(name, record_inputs)
+
+            finish_source(manifest, identifier, output_path, source_inputs, result["num_words"])
+            total_words += result["num_words"]
+            rejections.counts["ignore_list"] += result["num_ignored"]
+
+        for records, future in pending:
+            future.result()
+            for name, inputs in records:
+                manifest.record(name, inputs)
+
+    return total_words
+
+def process_words_to_dawg(manifest: Manifest, max_workers = None):
+    print("Creating DAWGs")
+    start = time.perf_counter()
+
+    paths = []
+    for name in manifest.current("*/related_e*.txt") + manifest.current("*/dictionary_e*.txt"):
+        dawg_name = str(Path(name).with_suffix(".dawg").as_posix())
+        if not manifest.is_fresh(dawg_name, manifest.artifact_hash(name)):
+            paths.append(OUTPUT_DIR / name)
+
+    for output_path, duration, size in dawg_builder.encode_files(paths, max_workers):
+        name = output_path.relative_to(OUTPUT_DIR).as_posix()
+        manifest.record(name, manifest.artifact_hash(Path(name).with_suffix(".txt").as_posix()))
+        print(f"Created {name}: {size} bytes in {duration:.2f}s")
+
+    print(f"Done creating DAWGs in {time.perf_counter() - start:.2f}s")
+    return len(paths)
+
+def process_fixed_width(manifest: Manifest, max_workers = None):
+    print("Creating fixed-width buckets")
+    start = time.perf_counter()
+
+    paths = []
+    for name in manifest.current("*/dictionary_e*.txt"):
+        bin_name = str(Path(name).with_suffix(".bin").as_posix())
+        if not manifest.is_fresh(bin_name, manifest.artifact_hash(name)):
+            paths.append(OUTPUT_DIR / name)
+
+    for output_path, duration in fixed_width.write_files(paths, max_workers):
+        name = output_path.relative_to(OUTPUT_DIR).as_posix()
+        manifest.record(name, manifest.artifact_hash(Path(name).with_suffix(".txt").as_posix()))
+
+    print(f"Done creating {len(paths)} fixed-width buckets in {time.perf_counter() - start:.2f}s")
+    return len(paths)
+
+def process_shards(manifest: Manifest, mode: str, target_size: int, max_workers = None):
+    print(f"Sharding buckets by {mode} prefix")
+    start = time.perf_counter()
+
+    paths = []
+    for name in manifest.current("*/dictionary_e*.txt"):
+        # Shards are only recorded for buckets which were split; smaller buckets are checked again every time
+        pattern = name.replace("/dictionary_e", "/shard_e").replace(".txt", "_*.txt")
+        inputs = hash_strings(manifest.artifact_hash(name), mode, str(target_size))
+        shard_names = [shard_name for shard_name in manifest.artifacts if fnmatch(shard_name, pattern)]
+        if not shard_names or not all(manifest.is_fresh(shard_name, inputs) for shard_name in shard_names):
+            # The bucket may now be split differently, so none of its previous shards (or their compressed siblings) are kept
+            manifest.discard(pattern + "*")
+            paths.append(OUTPUT_DIR / name)
+
+    for path, output_paths, duration in shards.write_files(paths, mode, target_size, max_workers):
+        name = path.relative_to(OUTPUT_DIR).as_posix()
+        inputs = hash_strings(manifest.artifact_hash(name), mode, str(target_size))
+        for output_path in output_paths:
+            manifest.record(output_path.relative_to(OUTPUT_DIR).as_posix(), inputs)
+        if output_paths:
+            print(f"Sharded {name} into {len(output_paths)} shards in {duration:.2f}s")
+
+    print(f"Done sharding in {time.perf_counter() - start:.2f}s")
+    return len(paths)
+
+def process_related_indexes(manifest: Manifest, max_workers = None):
+    print("Indexing related expressions")
+    start = time.perf_counter()
+
+    paths = []
+    for name in manifest.current("*/related_e*.txt"):
+        names = [str(Path(name).with_suffix(suffix).as_posix()) for suffix in related_index.SUFFIXES]
+        if not all(manifest.is_fresh(index_name, manifest.artifact_hash(name)) for index_name in names):
+            paths.append(OUTPUT_DIR / name)
+
+    for path, output_paths, duration in related_index.write_files(paths, max_workers):
+        name = path.relative_to(OUTPUT_DIR).as_posix()
+        for output_path in output_paths:
+            manifest.record(output_path.relative_to(OUTPUT_DIR).as_posix(), manifest.artifact_hash(name))
+        sizes = ", ".join(f"{output_path.name} {output_path.stat().st_size}" for output_path in output_paths)
+        print(f"Indexed {name}: {sizes} bytes in {duration:.2f}s")
+
+    print(f"Done indexing related expressions in {time.perf_counter() - start:.2f}s")
+    return len(paths)
+
+def process_bloom_filters(manifest: Manifest, max_workers = None):
+    print("Creating Bloom filters")
+    start = time.perf_counter()
+
+    paths = []
+    names = []
+    inputs = []
+    for identifier in sorted(manifest.sources):
+        dictionaries = manifest.current(f"{identifier}/dictionary_e*.txt")
+        hashes = [manifest.artifact_hash(name) for name in dictionaries]
+        if not manifest.is_fresh(f"{identifier}/{bloom.BLOOM_NAME}", hash_strings(*hashes)):
+            paths.append(OUTPUT_DIR / identifier)
+            names.append([Path(name).name for name in dictionaries])
+            inputs.append(hash_strings(*hashes))
+
+    # Results come in the order of the paths
+    for (output_path, num_words, duration), source_inputs in zip(bloom.write_files(paths, names, max_workers), inputs):
+        name = output_path.relative_to(OUTPUT_DIR).as_posix()
+        manifest.record(name, source_inputs)
+        print(f"Created {name}: {num_words} words, {output_path.stat().st_size} bytes in {duration:.2f}s")
+
+    print(f"Done creating {len(paths)} Bloom filters in {time.perf_counter() - start:.2f}s")
+    return len(paths)
+
+def snapshot_inputs(hashes: dict) -> str:
+    # A new version of the format rebuilds every snapshot
+    return hash_strings(str(snapshot.VERSION), *(f"{name}:{h}" for name, h in hashes.items()))
+
+def process_snapshots(manifest: Manifest, max_workers = None):
+    print("Creating snapshots")
+    start = time.perf_counter()
+
+    paths = []
+    inputs = []
+    for identifier in sorted(manifest.sources):
+        names = [name for pattern in ["dictionary_e*.txt", "anagram_e*.json", "related_e0.txt"]
+                 for name in manifest.current(f"{identifier}/{pattern}")]
+        hashes = {name: manifest.artifact_hash(name) for name in names}
+        if not manifest.is_fresh(f"{identifier}/{snapshot.SNAPSHOT_NAME}", snapshot_inputs(hashes)):
+            paths.append(OUTPUT_DIR / identifier)
+            inputs.append(hashes)
+
+    # Results come in the order of the paths
+    for (output_path, duration), hashes in zip(snapshot.write_files(paths, inputs, max_workers), inputs):
+        name = output_path.relative_to(OUTPUT_DIR).as_posix()
+        manifest.record(name, snapshot_inputs(hashes))
+        print(f"Created {name}: {output_path.stat().st_size} bytes in {duration:.2f}s")
+
+    print(f"Done creating {len(paths)} snapshots in {time.perf_counter() - start:.2f}s")
+    return len(paths)
+
+def process_compressed(manifest: Manifest, max_workers = None):
+    print(f"Compressing artifacts ({', '.join(compress.SUFFIXES)})")
+    start = time.perf_counter()
+
+    paths = []
+    for name in artifact_names(manifest):
+        if not all(manifest.is_fresh(name + suffix, manifest.artifact_hash(name)) for suffix in compress.SUFFIXES):
+            paths.append(OUTPUT_DIR / name)
+
+    for path, output_paths, duration in compress.compress_files(paths, max_workers):
+        name = path.relative_to(OUTPUT_DIR).as_posix()
+        for output_path in output_paths:
+            manifest.record(output_path.relative_to(OUTPUT_DIR).as_posix(), manifest.artifact_hash(name))
+        sizes = ", ".join(f"{output_path.suffix} {output_path.stat().st_size}" for output_path in output_paths)
+        print(f"Compressed {name} ({path.stat().st_size} bytes): {sizes} bytes in {duration:.2f}s")
+
+    print(f"Done compressing in {time.perf_counter() - start:.2f}s")
+    return len(paths)
+
+def artifact_names(manifest: Manifest) -> list:
+    # The files which the application fetches
+    return [name for pattern in ARTIFACT_PATTERNS for name in manifest.current(pattern)]
+
+def create_config(manifest: Manifest, formats = None) -> int:
+    # formats: the measured format of every word-list (see format_costs.py), otherwise the smaller file is used.
+    # Returns the number of artifacts listed.
+    print("Creating configuration")
+    formats = formats or {}
+    config = {}
+    config["translate_mapping"] = codec.translate_mapping
+    config["final_form_mapping"] = codec.final_form_mapping
+    config["list_source"] = {}
+
+    #
+    # Dictionary
+    #
+
+    dict_source = {}
+    for directory in OUTPUT_DIR.iterdir():
+        if not directory.is_dir():
+            continue
+        current_dict_source = {}
+        for txt_file in Path(directory).glob("dictionary_e*.txt"):
+            word_length = int(txt_file.stem.replace("dictionary_e", ""))
             txt_size = txt_file.stat().st_size
-            dawg_file = txt_file.with_suffix(".dawg")
-            dawg_size = dawg_file.stat().st_size if dawg_file.exists() else float('inf')
-            related_source[name] = {0: "txt" if txt_size <= dawg_size else "dawg"}
-        config["list_source"]["related"] = related_source
-            
-        o.write(json.dumps(config, indent=4))
+            dawg_size = Path(txt_file.with_suffix(".dawg")).stat().st_size
+            current_dict_source[word_length] = formats.get(f"{directory.name}/dictionary_e{word_length}",
+                                                           "txt" if txt_size <= dawg_size else "dawg")
+
+        max_key = max(current_dict_source.keys())
+        dict_source[directory.name] = [""] * (max_key + 1)
+        for k, v in current_dict_source.items():
+            dict_source[directory.name][k] = v
+    
+    config["list_source"]["dictionary"] = dict_source
+
+    # Shards of the buckets which were split (by process_shards), as the first word of every shard
+    shard_source = {}
+    for directory in OUTPUT_DIR.iterdir():
+        if not directory.is_dir():
+            continue
+        boundaries = defaultdict(dict)
+        for shard_file in directory.glob("shard_e*_*.txt"):
+            length, index = shard_file.stem.replace("shard_e", "").split("_")
+            with open(shard_file, "r", encoding = "utf8") as f:
+                boundaries[int(length)][int(index)] = f.readline().rstrip("\n")
+        if boundaries:
+            shard_source[directory.name] = {length: [first_words[i] for i in sorted(first_words)]
+                                            for length, first_words in sorted(boundaries.items())}
+    if shard_source:
+        config["shards"] = {"dictionary": shard_source}
+
+    # Fixed-width buckets, only read by the Python tools (utils/solver) for now
+    binary_dict_source = {}
+    for name, db_types in dict_source.items():
+        binary_dict_source[name] = ["bin" if db_type and (OUTPUT_DIR / name / f"dictionary_e{length}.bin").exists() else ""
+                                    for length, db_type in enumerate(db_types)]
+
+    #
+    # Anagrams
+    #
+
+    anagram_source = {}
+    for directory in OUTPUT_DIR.iterdir():
+        if not directory.is_dir():
+            continue
+        current_anagram_source = {}
+        for json_file in Path(directory).glob("anagram_e*.json"):
+            word_length = int(json_file.stem.replace("anagram_e", ""))
+            current_anagram_source[word_length] = "json"
+
+        max_key = max(current_anagram_source.keys())
+        anagram_source[directory.name] = [""] * (max_key + 1)
+        for k, v in current_anagram_source.items():
+            anagram_source[directory.name][k] = v
+    
+    config["list_source"]["anagram"] = anagram_source
+
+    # Binary anagram indexes, only read by the Python tools (utils/solver) for now
+    binary_anagram_source = {}
+    for name, db_types in anagram_source.items():
+        binary_anagram_source[name] = ["bin" if (OUTPUT_DIR / name / f"anagram_e{length}.bin").exists() else ""
+                                       for length in range(len(db_types))]
+    config["binary_source"] = {"dictionary": binary_dict_source, "anagram": binary_anagram_source}
+
+    #
+    # Related expressions
+    #
+
+    related_source = {}
+    for name in dict_source.keys():
+        txt_file = OUTPUT_DIR / name / f"related_e0.txt"
+        txt_size = txt_file.stat().st_size
+        dawg_file = txt_file.with_suffix(".dawg")
+        dawg_size = dawg_file.stat().st_size if dawg_file.exists() else float('inf')
+        related_source[name] = {0: formats.get(f"{name}/related_e0", "txt" if txt_size <= dawg_size else "dawg")}
+    config["list_source"]["related"] = related_source
+
+    # Token and n-gram indexes of the expressions, only read by the Python tools (utils/solver) for now
+    config["binary_source"]["related"] = {
+        name: ["idx" if all((OUTPUT_DIR / name / f"related_e0{suffix}").exists() for suffix in related_index.SUFFIXES) else ""]
+        for name in related_source}
+
+    # Bloom filters of the words of every source, only read by the Python tools (utils/solver)
+    config["binary_source"]["bloom"] = {
+        name: ["bloom" if (OUTPUT_DIR / name / bloom.BLOOM_NAME).exists() else ""] for name in dict_source}
+
+    # Snapshots of the indexes of every source, only read by the Python tools (utils/solver)
+    config["binary_source"]["snapshot"] = {
+        name: ["snap" if (OUTPUT_DIR / name / snapshot.SNAPSHOT_NAME).exists() else ""] for name in dict_source}
+
+    # Content hashes of the artifacts, so that the application can cache them for as long as they don't change
+    config["etags"] = {name: manifest.artifact_hash(name)[:ETAG_LENGTH] for name in sorted(artifact_names(manifest))}
+        
+    content = json.dumps(config, indent=4)
+    config_path = OUTPUT_DIR / "config.json"
+    if config_path.exists() and config_path.read_text(encoding = "utf8") == content:
+        print("Configuration is up to date")
+        return len(config["etags"])
+
+    with open(config_path, "w", encoding="utf8") as o:
+        o.write(content)
     print("Done creating configuration")
+    return len(config["etags"])
 
 def main():
-    init()
-    process_words_to_text()
-    process_words_to_dawg()
-    create_config()
+    parser = argparse.ArgumentParser(description = "Create the word-list databases for the application")
+    parser.add_argument("-w", "--workers", type = int, default = os.cpu_count(),
+                        help = "Number of worker processes to use (1 processes everything serially)")
+    parser.add_argument("-c", "--clean", action = "store_true",
+                        help = "Delete all previous output and rebuild everything from scratch")
+    parser.add_argument("-s", "--shard", choices = shards.MODES, default = None,
+                        help = "Also split every dictionary bucket into shards by leading letter, or by "
+                               "an adaptive prefix which keeps the shards close to --shard-size")
+    parser.add_argument("--shard-size", type = int, default = 64, metavar = "KB",
+                        help = "Target size of a shard, buckets within it are not split (default: 64)")
+    parser.add_argument("-b", "--bandwidth", type = float, default = format_costs.DEFAULT_BANDWIDTH, metavar = "MBIT",
+                        help = "Client bandwidth (Mbit/s) for choosing between the word-list formats "
+                               f"(default: {format_costs.DEFAULT_BANDWIDTH})")
+    parser.add_argument("--cpu-weight", type = float, default = format_costs.DEFAULT_CPU_WEIGHT,
+                        help = "Weight of the measured load and query time against the transfer time "
+                               f"(default: {format_costs.DEFAULT_CPU_WEIGHT})")
+    parser.add_argument("--by-size", action = "store_true",
+                        help = "Choose the smaller file of every word-list instead of measuring the formats")
+    parser.add_argument("-m", "--memory-budget", type = int, default = None, metavar = "MB",
+                        help = "Sort each source on disk using at most roughly this much memory (in MB) "
+                               "instead of loading it entirely into memory")
+    parser.add_argument("-r", "--report", type = Path, default = INPUT_DIR / "report_word_processor.json",
+                        help = "Where to write the JSON report of timings, memory and rejected lines")
+    parser.add_argument("--rejections", type = Path, default = None, metavar = "PATH",
+                        help = "Write the rejected lines, with the rule which rejected them, to this file")
+    parser.add_argument("--sample-rejections", type = int, default = 0, metavar = "N",
+                        help = "Print every Nth rejected line (default: none)")
+    args = parser.parse_args()
+
+    manifest = Manifest(OUTPUT_DIR)
+    if args.clean or not manifest.exists():
+        init()
+        manifest = Manifest(OUTPUT_DIR)
+
+    memory_budget = args.memory_budget * 1024 * 1024 if args.memory_budget is not None else None
+    report = Report("word_processor")
+    rejections.configure(args.rejections, args.sample_rejections)
+    try:
+        with report.stage("process_words_to_text") as stage:
+            num_words = process_words_to_text(manifest, args.workers, memory_budget)
+            filters = rejections.summary()
+            # Every line of the (changed) sources is either a word or rejected by the ignore list
+            stage.update(count = num_words + filters["rejected"], words = num_words,
+                         rejected = filters["rejected"], rejected_by_rule = filters["rejected_by_rule"])
+    finally:
+        rejections.close()
+
+    with report.stage("process_words_to_dawg", unit = "files") as stage:
+        stage["count"] = process_words_to_dawg(manifest, args.workers)
+    with report.stage("process_fixed_width", unit = "files") as stage:
+        stage["count"] = process_fixed_width(manifest, args.workers)
+    if args.shard is not None:
+        with report.stage("process_shards", unit = "files") as stage:
+            stage["count"] = process_shards(manifest, args.shard, args.shard_size * 1024, args.workers)
+    else:
+        manifest.discard("*/shard_e*.txt*")
+    with report.stage("process_related_indexes", unit = "files") as stage:
+        stage["count"] = process_related_indexes(manifest, args.workers)
+    with report.stage("process_bloom_filters", unit = "files") as stage:
+        stage["count"] = process_bloom_filters(manifest, args.workers)
+    with report.stage("process_snapshots", unit = "files") as stage:
+        stage["count"] = process_snapshots(manifest, args.workers)
+    with report.stage("process_compressed", unit = "files") as stage:
+        stage["count"] = process_compressed(manifest, args.workers)
+    manifest.prune()
+
+    formats = None
+    if not args.by_size:
+        with report.stage("select_formats", unit = "word_lists") as stage:
+            formats = format_costs.select_formats(manifest, OUTPUT_DIR, args.bandwidth, args.cpu_weight)
+            stage["count"] = len(formats)
+    with report.stage("create_config", unit = "artifacts") as stage:
+        stage["count"] = create_config(manifest, formats)
+    manifest.save()
+    report.write(args.report)
 
 
 if __name__ == "__main__":